@@ -1,387 +1,2521 @@
-# IMPORTS
-import random
-import math
-
-
-# DEFINITIONS / REPRESENTATION LOGIC
-# Board is a 2D list of characters. ' ' = empty, 'X' and 'O' = player pieces.
-
-# HELPER FUNCTIONS
-# Print the Board
-def print_board(board):
-    """ Prints the connect 4 game board."""
-    for row in board:
-        print('|' + '|'.join(row) + '|')
-    print("-" * (len(board[0]) * 2 + 1))
-    print(' ' + ' '.join(str(i + 1) for i in range(len(board[0]))))
-    return
-
-
-def drop_piece(board, col, symbol):
-    """Contributors:
-    - Jaydev Patel (100%)
-    Representation Logic: Drops a piece with the given symbol into the specified column.
-    The piece will occupy the lowest available row in that column.
-    Returns the row index where the piece lands, or -1 if the column is full."""
-    rows = len(board)
-    for r in range(rows - 1, -1, -1):  # start from bottom row
-        if board[r][col] == ' ':
-            board[r][col] = symbol
-            return r
-    return -1  # column is full
-
-
-def undo_piece(board, row, col):
-    """Contributors:
-    - Jaydev Patel (100%)
-    Representation Logic: Removes a piece from the board at the given (row, col) position.
-    This effectively undoes a move, restoring that cell to empty."""
-    board[row][col] = ' '
-    return
-
-
-def is_win_for(board, symbol):
-    """Contributors:
-    - Jaydev Patel (60%, core algorithm structure)
-    - Phong Diep  (40%, optimized check pattern)
-    Representation/Reasoning Logic: Checks if the given symbol has four in a row on the board.
-    Scans horizontally, vertically, and both diagonal directions for a win."""
-    rows = len(board)
-    cols = len(board[0])
-    # Check horizontal wins
-    for r in range(rows):
-        for c in range(cols - 3):
-            if board[r][c] == symbol and board[r][c + 1] == symbol and board[r][c + 2] == symbol and board[r][
-                c + 3] == symbol:
-                return True
-    # Check vertical wins
-    for c in range(cols):
-        for r in range(rows - 3):
-            if board[r][c] == symbol and board[r + 1][c] == symbol and board[r + 2][c] == symbol and board[r + 3][
-                c] == symbol:
-                return True
-    # Check diagonal (down-right) wins
-    for r in range(rows - 3):
-        for c in range(cols - 3):
-            if board[r][c] == symbol and board[r + 1][c + 1] == symbol and board[r + 2][c + 2] == symbol and \
-                    board[r + 3][c + 3] == symbol:
-                return True
-    # Check diagonal (down-left) wins
-    for r in range(rows - 3):
-        for c in range(3, cols):
-            if board[r][c] == symbol and board[r + 1][c - 1] == symbol and board[r + 2][c - 2] == symbol and \
-                    board[r + 3][c - 3] == symbol:
-                return True
-    return False
-
-
-# REASONING LOGIC – Heuristic evaluation of board states
-def evaluate_window(window, my_symbol, opp_symbol):
-    """Contributors:
-    - Jaydev Patel (50%, core evaluation logic)
-    - Miguel Viray (25%, improved threat detection)
-    - Ziming Wang (25%, scoring adjustments)
-    Reasoning Logic: Scores a window of four cells for the heuristic evaluation.
-    Awards points for windows that are favorable to my_symbol and penalizes ones favorable to opp_symbol."""
-    score = 0
-    # Favorable patterns for my_symbol
-    if window.count(my_symbol) == 4:
-        score += 100  # Winning window (4 in a row for me)
-    elif window.count(my_symbol) == 3 and window.count(' ') == 1:
-        score += 5  # Three of mine and one empty (one move to win)
-    elif window.count(my_symbol) == 2 and window.count(' ') == 2:
-        score += 2  # Two of mine and two empties
-    # Unfavorable patterns (opponent)
-    if window.count(opp_symbol) == 3 and window.count(' ') == 1:
-        score -= 100  # opponent about to win, play defense
-    return score
-
-
-def evaluate_board(board, my_symbol, opp_symbol):
-    """Contributors:
-    - Jaydev Patel (40%, board evaluation structure)
-    - Miguel Viray (30%, improved center column evaluation)
-    - Ziming Wang (30%, diagonal weighting adjustment)
-    Reasoning Logic: Heuristic evaluation function for the board state from the perspective of my_symbol.
-    Returns a numeric score where higher is better for my_symbol."""
-    rows = len(board)
-    cols = len(board[0])
-    score = 0
-
-    # target center column
-    center_col = cols // 2
-    center_count = 0
-    if cols % 2 == 1:
-        # odd number of columns: single center column
-        for r in range(rows):
-            if board[r][center_col] == my_symbol:
-                center_count += 1
-    else:
-        # even number of columns: consider both central columns
-        center_left = center_col - 1
-        for r in range(rows):
-            if board[r][center_col] == my_symbol or board[r][center_left] == my_symbol:
-                center_count += 1
-    score += center_count * 3  # each center piece gets a moderate bonus
-
-    # 2. Evaluate all possible 4-length windows on the board
-    # Horizontal windows
-    for r in range(rows):
-        for c in range(cols - 3):
-            window = [board[r][c + i] for i in range(4)]
-            score += evaluate_window(window, my_symbol, opp_symbol)
-    # Vertical windows
-    for c in range(cols):
-        for r in range(rows - 3):
-            window = [board[r + i][c] for i in range(4)]
-            score += evaluate_window(window, my_symbol, opp_symbol)
-    # Down-right diagonal windows
-    for r in range(rows - 3):
-        for c in range(cols - 3):
-            window = [board[r + i][c + i] for i in range(4)]
-            # Give slightly higher weight to diagonal windows
-            score += evaluate_window(window, my_symbol, opp_symbol) * 1.1
-            # Down-left diagonal windows
-    for r in range(rows - 3):
-        for c in range(3, cols):
-            window = [board[r + i][c - i] for i in range(4)]
-            # Give slightly higher weight to diagonal windows
-            score += evaluate_window(window, my_symbol, opp_symbol) * 1.1
-
-    return score
-
-
-# SEARCH LOGIC – Minimax with Alpha-Beta Pruning
-def alpha_beta_search(board, depth, alpha, beta, maximizing_player, my_symbol, opp_symbol):
-    """Contributors:
-    - Jaydev Patel (50%, core minimax structure)
-    - Phong Diep  (30%, alpha-beta pruning optimizations)
-    - Ziming Wang (20%, improved terminal condition handling)
-    Search Logic: Minimax algorithm with Alpha-Beta pruning.
-    Recursively evaluates moves up to a given depth and returns the heuristic score of the board.
-    Uses alpha (best score for maximizer so far) and beta (best for minimizer) to prune branches."""
-    # Get list of valid moves (columns that are not full)
-    valid_moves = [c for c in range(len(board[0])) if board[0][c] == ' ']
-    # Check terminal conditions
-    is_terminal = is_win_for(board, my_symbol) or is_win_for(board, opp_symbol) or (len(valid_moves) == 0)
-    if depth == 0 or is_terminal:
-        # If at depth limit or game over, return evaluated score
-        if is_terminal:
-            # If game over, return a very large positive/negative/zero score
-            if is_win_for(board, my_symbol):
-                return math.inf  # i have won
-            elif is_win_for(board, opp_symbol):
-                return -math.inf  # opponent has won
-            else:
-                return 0  # no moves left (draw)
-        else:
-            # Depth limit reached, return heuristic evaluation
-            return evaluate_board(board, my_symbol, opp_symbol)
-
-    # Recursive search with alpha-beta pruning
-    if maximizing_player:
-        max_eval = -math.inf
-        for col in valid_moves:
-            # simulate dropping my piece
-            row = drop_piece(board, col, my_symbol)
-            if row == -1:
-                continue  # Skip invalid moves
-            eval_score = alpha_beta_search(board, depth - 1, alpha, beta, False, my_symbol, opp_symbol)
-            # undo move
-            undo_piece(board, row, col)
-            # update the max evaluation
-            if eval_score > max_eval:
-                max_eval = eval_score
-            alpha = max(alpha, max_eval)
-            if alpha >= beta:
-                break  # prune branch
-        return max_eval
-    else:
-        min_eval = math.inf
-        for col in valid_moves:
-            # simulate dropping opponent's piece
-            row = drop_piece(board, col, opp_symbol)
-            if row == -1:
-                continue  # Skip invalid moves
-            eval_score = alpha_beta_search(board, depth - 1, alpha, beta, True, my_symbol, opp_symbol)
-            # undo move
-            undo_piece(board, row, col)
-            # update the min evaluation
-            if eval_score < min_eval:
-                min_eval = eval_score
-            beta = min(beta, min_eval)
-            if alpha >= beta:
-                break  # prune branch
-        return min_eval
-
-
-# Order moves to improve alpha-beta pruning efficiency
-def order_moves(board, moves, my_symbol):
-    """Contributors:
-    - Jaydev Patel (60%, core approach)
-    - Ziming Wang (30%, center proximity and height-based ordering)
-    - Miguel Viray (10%, scoring function)
-    Orders moves to improve alpha-beta pruning efficiency.
-    Prioritizes center columns and columns where placing a piece results in a higher position."""
-    # Start with center columns
-    cols = len(board[0])
-    center_col = cols // 2
-
-    # Calculate center proximity for each move
-    move_scores = []
-    for col in moves:
-        # Score based on proximity to center and height
-        center_distance = abs(col - center_col)
-        row = -1
-        for r in range(len(board) - 1, -1, -1):
-            if board[r][col] == ' ':
-                row = r
-                break
-
-        # Columns closer to center and pieces higher on the board are preferred
-        score = -center_distance - 0.1 * row
-        move_scores.append((col, score))
-
-    # Sort by score (descending)
-    move_scores.sort(key=lambda x: x[1], reverse=True)
-    return [move[0] for move in move_scores]
-
-
-# FUNCTIONS REQUIRED BY THE connect_4_main.py MODULE
-def init_agent(player_symbol, board_num_rows, board_num_cols, board):
-    """ Initializes the agent at the start of a game. This function could set up any necessary state."""
-    # Set up global variables
-    global MY_SYMBOL, OPPONENT_SYMBOL, ROWS, COLS
-    MY_SYMBOL = player_symbol
-    OPPONENT_SYMBOL = 'O' if player_symbol == 'X' else 'X'
-    ROWS = int(board_num_rows)
-    COLS = int(board_num_cols)
-    return True
-
-
-def what_is_your_move(board, game_rows, game_cols, my_game_symbol):
-    """Contributors:
-    - Jaydev Patel (40%, core decision logic and rule-based checks)
-    - Phong Diep  (20%, win/block detection)
-    - Ziming Wang (15%, move ordering enhancements)
-    - Miguel Viray (25%, variable search depth)
-    Decide and return the next move (column number) for the agent.
-    Applies rule-based reasoning for immediate wins/blocks, then uses Alpha-Beta search for the best move.
-    Returns a column index in 1..game_cols (inclusive) to drop a disk."""
-    # Update global variables in case of a new game
-    global MY_SYMBOL, OPPONENT_SYMBOL, ROWS, COLS
-    MY_SYMBOL = my_game_symbol
-    OPPONENT_SYMBOL = 'O' if my_game_symbol == 'X' else 'X'
-    ROWS = int(game_rows)
-    COLS = int(game_cols)
-
-    # REASONING: Rule-based immediate win check
-    # If we can win in this move, do it immediately
-    for col in range(COLS):
-        if board[0][col] != ' ':
-            continue  # skip if column is full
-        row = drop_piece(board, col, MY_SYMBOL)
-        if row != -1 and is_win_for(board, MY_SYMBOL):
-            # Undo the simulation and return this winning move immediately
-            undo_piece(board, row, col)
-            return col + 1  # return 1-indexed column
-        # Undo the move if it didn't result in an immediate win
-        if row != -1:
-            undo_piece(board, row, col)
-
-    # REASONING: Rule-based block opponent's win
-    # If the opponent can win next turn, block them by playing that column
-    for col in range(COLS):
-        if board[0][col] != ' ':
-            continue  # skip if column is full
-        row = drop_piece(board, col, OPPONENT_SYMBOL)
-        if row != -1 and is_win_for(board, OPPONENT_SYMBOL):
-            # This column is a winning move for the opponent, so we must block it
-            undo_piece(board, row, col)
-            return col + 1  # return 1-indexed column
-        # Undo the move if it didn't block an immediate win
-        if row != -1:
-            undo_piece(board, row, col)
-
-    # SEARCH: Use Minimax (Alpha-Beta) to choose the best move if no immediate win/block is found
-    best_score = -math.inf
-    best_col = None
-
-    # Get all valid columns and order them for better pruning
-    valid_columns = [c for c in range(COLS) if board[0][c] == ' ']
-    ordered_columns = order_moves(board, valid_columns, MY_SYMBOL)
-
-    # Try each valid move, pick the one with highest score
-    for col in ordered_columns:
-        # Simulate dropping our piece
-        row = drop_piece(board, col, MY_SYMBOL)
-        if row == -1:
-            continue  # Skip invalid moves (shouldn't happen here)
-
-        # Search with depth 5, starting with opponent's turn (minimizing player)
-        # Use variable depth: deeper near the center, shallower on edges
-        center_col = COLS // 2
-        distance_from_center = abs(col - center_col)
-        depth_adjustment = max(0, 2 - distance_from_center)  # Up to 2 extra levels for center columns
-        search_depth = 4 + depth_adjustment
-
-        score = alpha_beta_search(board, search_depth, -math.inf, math.inf, False, MY_SYMBOL, OPPONENT_SYMBOL)
-
-        # Undo the move
-        undo_piece(board, row, col)
-
-        # Update best move
-        if score > best_score:
-            best_score = score
-            best_col = col
-        # If multiple moves have same score, prefer central columns
-        elif score == best_score:
-            # Calculate center proximity for both current best and new column
-            current_distance = abs(best_col - COLS // 2) if best_col is not None else COLS
-            new_distance = abs(col - COLS // 2)
-            if new_distance < current_distance:
-                best_col = col
-
-    # If for some reason no move was chosen (shouldn't happen with valid columns),
-    # pick the center column or a random valid column
-    if best_col is None:
-        center_col = COLS // 2
-        if board[0][center_col] == ' ':
-            best_col = center_col
-        else:
-            valid_moves = [c for c in range(COLS) if board[0][c] == ' ']
-            best_col = random.choice(valid_moves) if valid_moves else 0
-
-    return best_col + 1  # return as 1-indexed column number
-
-
-def connect_4_result(board, winner, looser):
-    """The Connect 4 manager calls this function when the game is over.
-    If there is a winner, the team name of the winner and looser are the
-    values of the respective argument variables. If there is a draw/tie,
-    the values of winner = looser = 'Draw'."""
-
-    # Check if a draw
-    if winner == "Draw":
-        print(">>> I am player TEAM1 <<<")
-        print(">>> The game resulted in a draw. <<<\n")
-        return True
-
-    print(">>> I am player TEAM1 <<<")
-    print("The winner is " + winner)
-    if winner == "Team1":
-        print("YEAH!!  :-)")
-    else:
-        print("BOO HOO HOO  :~(")
-    print("The looser is " + looser)
-    print()
-
-    return True
-
-
-#####
-# MAKE SURE MODULE IS IMPORTED
-if __name__ == "__main__":
-    print("Team6_Connect_4_Agent.py is intended to be imported and not executed.")
-else:
-    print("Team6_Connect_4_Agent.py has been imported.")
+# IMPORTS
+import atexit
+import concurrent.futures
+import cProfile
+import importlib.machinery
+import importlib.util
+import json
+import os
+import random
+import math
+import mmap
+import struct
+import threading
+import time
+import warnings
+import zlib
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional; only the batch evaluator needs it
+    np = None
+
+try:
+    import sqlite3
+except ImportError:  # sqlite3 is optional; only the position cache needs it
+    sqlite3 = None
+
+
+# DEFINITIONS / REPRESENTATION LOGIC
+# Board is a 2D list of characters. ' ' = empty, 'X' and 'O' = player pieces.
+# Pieces in a row needed to win; set with init_agent(connect_n=...) or the TEAM6_CONNECT_N env var
+CONNECT_N = int(os.environ.get('TEAM6_CONNECT_N', '4'))
+
+# HELPER FUNCTIONS
+# Print the Board
+def print_board(board):
+    """ Prints the connect 4 game board."""
+    for row in board:
+        print('|' + '|'.join(row) + '|')
+    print("-" * (len(board[0]) * 2 + 1))
+    print(' ' + ' '.join(str(i + 1) for i in range(len(board[0]))))
+    return
+
+
+def drop_piece(board, col, symbol):
+    """Contributors:
+    - Jaydev Patel (100%)
+    Representation Logic: Drops a piece with the given symbol into the specified column.
+    The piece will occupy the lowest available row in that column.
+    Returns the row index where the piece lands, or -1 if the column is full."""
+    rows = len(board)
+    for r in range(rows - 1, -1, -1):  # start from bottom row
+        if board[r][col] == ' ':
+            board[r][col] = symbol
+            return r
+    return -1  # column is full
+
+
+def undo_piece(board, row, col):
+    """Contributors:
+    - Jaydev Patel (100%)
+    Representation Logic: Removes a piece from the board at the given (row, col) position.
+    This effectively undoes a move, restoring that cell to empty."""
+    board[row][col] = ' '
+    return
+
+
+def is_win_for(board, symbol):
+    """Contributors:
+    - Jaydev Patel (60%, core algorithm structure)
+    - Phong Diep  (40%, optimized check pattern)
+    Representation/Reasoning Logic: Checks if the given symbol has CONNECT_N (four) in a row on the board.
+    Scans the horizontal, vertical and both diagonal windows listed by board_window_tables for a win."""
+    rows = len(board)
+    cols = len(board[0])
+    straight, diagonal = board_window_tables(rows, cols, CONNECT_N)
+    for windows in (straight, diagonal):
+        for cells in windows:
+            for r, c in cells:
+                if board[r][c] != symbol:
+                    break
+            else:
+                return True
+    return False
+
+
+# BITBOARD REPRESENTATION
+# The search works on a BitBoard instead of the 2D list. Each player's pieces are the bits of
+# a Python int, stored column by column: column c owns bits c*(rows+1) .. c*(rows+1)+rows-1,
+# bottom row first, plus one always-empty sentinel bit on top of the column so shifts used for
+# line detection never wrap from one column into the next.
+# Player 0 is always the agent (MY_SYMBOL) and player 1 is the opponent.
+# The position also carries a Zobrist hash (XOR of one random key per occupied (player, bit)),
+# updated on every play/undo, which keys the transposition table. The hash of the mirror image (column c
+# played as cols-1-c) is kept alongside, so a position and its mirror share one canonical key.
+class BitBoard:
+    """Representation Logic: Connect 4 position as two bitboards plus per-column heights.
+    play/undo are O(1) and four-in-a-row detection is a constant number of shifts.
+    Converts to and from the manager's list board with from_list/to_list.
+    Also keeps the heuristic evaluation up to date: per-window piece counts and running
+    scores are adjusted for the windows through each dropped/removed piece (see evaluate_position)."""
+    __slots__ = ('rows', 'cols', 'connect_n', 'stride', 'bottom', 'board_mask', 'pieces', 'heights', 'num_moves',
+                 'hash', 'zobrist', 'mirror_hash', 'mirror_zobrist', 'codes', 'code_base', 'window_values',
+                 'straight_score', 'diag_score', 'center_count', 'cell_straight', 'cell_diag', 'center_partner')
+
+    def __init__(self, rows, cols, connect_n=4):
+        self.rows = rows
+        self.cols = cols
+        self.connect_n = connect_n  # pieces in a row needed to win
+        self.stride = rows + 1  # bits per column, including the sentinel
+        self.bottom = sum(1 << (c * self.stride) for c in range(cols))  # bottom cell of every column
+        self.board_mask = self.bottom * ((1 << rows) - 1)  # every playable cell (no sentinels)
+        self.pieces = [0, 0]  # bitboards for player 0 (me) and player 1 (opponent)
+        self.heights = [0] * cols  # number of pieces in each column
+        self.num_moves = 0
+        self.zobrist = zobrist_keys(rows, cols)
+        self.hash = 0
+        self.mirror_zobrist = mirror_zobrist_keys(rows, cols)
+        self.mirror_hash = 0  # hash of the mirror image
+        # incremental evaluation state
+        self.cell_straight, self.cell_diag, self.center_partner, num_windows = cell_window_tables(rows, cols, connect_n)
+        self.code_base = connect_n + 1
+        self.window_values = window_values(connect_n)
+        self.codes = [0] * num_windows  # per window: my_count * code_base + opp_count
+        self.straight_score = 0  # sum of horizontal and vertical window scores
+        self.diag_score = 0  # sum of diagonal window scores (weighted by DIAGONAL_WEIGHT in evaluate_position)
+        self.center_count = 0  # center column bonus count, as in evaluate_board
+
+    @classmethod
+    def from_list(cls, board, my_symbol, opp_symbol, connect_n=4):
+        """Builds a BitBoard from the manager's list board (row 0 is the top row)."""
+        rows = len(board)
+        cols = len(board[0])
+        pos = cls(rows, cols, connect_n)
+        for c in range(cols):
+            for r in range(rows - 1, -1, -1):  # start from bottom row
+                cell = board[r][c]
+                if cell == ' ':
+                    break
+                player = 0 if cell == my_symbol else 1
+                pos.play(c, player)
+        return pos
+
+    @classmethod
+    def from_bits(cls, rows, cols, mine, opp, connect_n=4):
+        """Builds a BitBoard from the two piece bitboards of another BitBoard (e.g. one sent to a worker process)."""
+        pos = cls(rows, cols, connect_n)
+        stride = rows + 1
+        for c in range(cols):
+            for r in range(rows):
+                bit = 1 << (c * stride + r)
+                if mine & bit:
+                    pos.play(c, 0)
+                elif opp & bit:
+                    pos.play(c, 1)
+                else:
+                    break
+        return pos
+
+    def to_list(self, my_symbol, opp_symbol):
+        """Returns the position as a list board in the manager's format."""
+        board = [[' ' for _ in range(self.cols)] for _ in range(self.rows)]
+        symbols = (my_symbol, opp_symbol)
+        for c in range(self.cols):
+            for h in range(self.heights[c]):
+                bit = 1 << (c * self.stride + h)
+                player = 0 if self.pieces[0] & bit else 1
+                board[self.rows - 1 - h][c] = symbols[player]
+        return board
+
+    def copy(self):
+        """Returns an independent copy of the position (the lookup tables are shared)."""
+        pos = BitBoard.__new__(BitBoard)
+        for name in BitBoard.__slots__:
+            setattr(pos, name, getattr(self, name))
+        pos.pieces = self.pieces[:]
+        pos.heights = self.heights[:]
+        pos.codes = self.codes[:]
+        return pos
+
+    def can_play(self, col):
+        """Returns True if the column is not full."""
+        return self.heights[col] < self.rows
+
+    def valid_moves(self):
+        """Returns the list of columns that are not full, left to right."""
+        rows = self.rows
+        return [c for c, h in enumerate(self.heights) if h < rows]
+
+    def play(self, col, player):
+        """Drops a piece for player (0 or 1) into col and returns the row it landed in,
+        counted from the bottom. The caller must check can_play first."""
+        row = self.heights[col]
+        index = col * self.stride + row
+        self.pieces[player] |= 1 << index
+        self.heights[col] = row + 1
+        self.num_moves += 1
+        self.hash ^= self.zobrist[player][index]
+        self.mirror_hash ^= self.mirror_zobrist[player][index]
+
+        # update the windows through this cell
+        codes = self.codes
+        values = self.window_values
+        delta = self.code_base if player == 0 else 1
+        change = 0
+        for w in self.cell_straight[index]:
+            code = codes[w]
+            codes[w] = code + delta
+            change += values[code + delta] - values[code]
+        self.straight_score += change
+        change = 0
+        for w in self.cell_diag[index]:
+            code = codes[w]
+            codes[w] = code + delta
+            change += values[code + delta] - values[code]
+        self.diag_score += change
+        if player == 0:
+            partner = self.center_partner[col]
+            # with two center columns a row only counts once
+            if partner is not None and (partner < 0 or not (self.pieces[0] >> (partner * self.stride + row)) & 1):
+                self.center_count += 1
+        return row
+
+    def undo(self, col, player):
+        """Removes the top piece of col, which must belong to player."""
+        row = self.heights[col] - 1
+        index = col * self.stride + row
+        self.pieces[player] ^= 1 << index
+        self.heights[col] = row
+        self.num_moves -= 1
+        self.hash ^= self.zobrist[player][index]
+        self.mirror_hash ^= self.mirror_zobrist[player][index]
+
+        # restore the windows through this cell
+        codes = self.codes
+        values = self.window_values
+        delta = self.code_base if player == 0 else 1
+        change = 0
+        for w in self.cell_straight[index]:
+            code = codes[w]
+            codes[w] = code - delta
+            change += values[code - delta] - values[code]
+        self.straight_score += change
+        change = 0
+        for w in self.cell_diag[index]:
+            code = codes[w]
+            codes[w] = code - delta
+            change += values[code - delta] - values[code]
+        self.diag_score += change
+        if player == 0:
+            partner = self.center_partner[col]
+            if partner is not None and (partner < 0 or not (self.pieces[0] >> (partner * self.stride + row)) & 1):
+                self.center_count -= 1
+
+    def canonical_hash(self):
+        """Returns (key, mirrored): the smaller of the hashes of the position and of its mirror image, and
+        whether the mirror image's was used. Both positions get the same key, so caches keyed by it hold one
+        entry for the pair; a move stored under a mirrored key must be flipped with cols - 1 - col."""
+        if self.mirror_hash < self.hash:
+            return self.mirror_hash, True
+        return self.hash, False
+
+    def is_symmetric(self):
+        """Returns True if the position equals its mirror image (then col and cols-1-col are equivalent)."""
+        return (self.mirror_hash == self.hash
+                and mirror_bits(self.pieces[0], self.rows, self.cols) == self.pieces[0]
+                and mirror_bits(self.pieces[1], self.rows, self.cols) == self.pieces[1])
+
+    def is_win(self, player):
+        """Returns True if player has connect_n in a row anywhere on the board (see has_connection)."""
+        return has_connection(self.pieces[player], self.stride, self.connect_n)
+
+    def playable_cells(self):
+        """Returns the cell each non-full column would be filled at next, one bit per column."""
+        return ((self.pieces[0] | self.pieces[1]) + self.bottom) & self.board_mask
+
+    def threat_cells(self, player):
+        """Returns the empty cells (playable now or not) that would complete four in a row for player."""
+        return winning_cells(self.pieces[player], self.pieces[0] | self.pieces[1], self.stride, self.board_mask,
+                             self.connect_n)
+
+    def is_win_at(self, col, player):
+        """Returns True if the top piece of col, just dropped by player, completes connect_n in a row.
+        Only the lines passing through that cell are examined."""
+        b = self.pieces[player]
+        stride = self.stride
+        n = self.connect_n
+        height = self.heights[col]
+        bit = 1 << (col * stride + height - 1)
+        # Vertical: the n-1 pieces directly below must be ours
+        if height >= n:
+            mask = (bit << 1) - (bit >> (n - 1))
+            if b & mask == mask:
+                return True
+        # Horizontal and both diagonals: count the run through the cell in both directions.
+        # Runs stop at the sentinel row or past the board edge, where no bits are ever set.
+        for shift in (stride, stride - 1, stride + 1):
+            run = 1
+            probe = bit << shift
+            while probe & b:
+                run += 1
+                probe <<= shift
+            probe = bit >> shift
+            while probe & b:
+                run += 1
+                probe >>= shift
+            if run >= n:
+                return True
+        return False
+
+
+# Zobrist keys per board size; the fixed seed keeps hashes identical between runs and processes
+_ZOBRIST_KEYS = {}
+
+
+def zobrist_keys(rows, cols):
+    """Representation Logic: Returns one random 64-bit key per (player, bit index) for a board size."""
+    key = (rows, cols)
+    keys = _ZOBRIST_KEYS.get(key)
+    if keys is None:
+        rng = random.Random(0x6C0AEC7 ^ (rows << 16) ^ cols)
+        size = cols * (rows + 1)
+        keys = (tuple(rng.getrandbits(64) for _ in range(size)), tuple(rng.getrandbits(64) for _ in range(size)))
+        _ZOBRIST_KEYS[key] = keys
+    return keys
+
+
+_MIRROR_ZOBRIST_KEYS = {}
+
+
+def mirror_zobrist_keys(rows, cols):
+    """Representation Logic: Returns the Zobrist keys indexed by the mirrored bit, so that XORing them in
+    as pieces are played yields the hash of the mirror image."""
+    key = (rows, cols)
+    keys = _MIRROR_ZOBRIST_KEYS.get(key)
+    if keys is None:
+        stride = rows + 1
+        mirrored = [(cols - 1 - index // stride) * stride + index % stride for index in range(cols * stride)]
+        keys = tuple(tuple(player_keys[m] for m in mirrored) for player_keys in zobrist_keys(rows, cols))
+        _MIRROR_ZOBRIST_KEYS[key] = keys
+    return keys
+
+
+def winning_cells(pieces, mask, stride, board_mask, connect_n=4):
+    """Representation Logic: Returns the empty cells that would complete connect_n (four) in a row for the owner
+    of `pieces` (mask = all pieces, board_mask = all cells of the board without sentinels)."""
+    if connect_n != 4:
+        return _winning_cells_n(pieces, mask, stride, board_mask, connect_n)
+    # vertical
+    r = (pieces << 1) & (pieces << 2) & (pieces << 3)
+    # horizontal and both diagonals: the missing cell can be at either end or in the middle
+    for shift in (stride, stride - 1, stride + 1):
+        p = (pieces << shift) & (pieces << (2 * shift))
+        r |= p & (pieces << (3 * shift))
+        r |= p & (pieces >> shift)
+        p = (pieces >> shift) & (pieces >> (2 * shift))
+        r |= p & (pieces << shift)
+        r |= p & (pieces >> (3 * shift))
+    return r & (board_mask ^ mask)
+
+
+def has_connection(bits, stride, connect_n=4):
+    """Representation Logic: Returns True if `bits` hold connect_n in a row anywhere on the board.
+    Checks vertical, horizontal and both diagonals with shift-and-mask steps (two each for four in a row)."""
+    n = connect_n
+    for shift in (1, stride, stride - 1, stride + 1):
+        m = bits & (bits >> shift)  # starts of runs of 2
+        run = 2
+        while run * 2 <= n:
+            m &= m >> (run * shift)  # doubles the run length
+            run *= 2
+        if run < n:
+            m &= m >> ((n - run) * shift)  # overlapping runs cover the rest
+        if m:
+            return True
+    return False
+
+
+# Follow-up masks per board size
+_FOLLOW_UP_MASKS = {}
+
+
+def follow_up_masks(rows, cols):
+    """Representation Logic: Returns (lower, upper) cell masks for the follow-up (claimeven) rule. When every
+    column has an even number of empty cells, its lowest empty cell is on a row of the lower parity
+    (Allis's odd rows on a 6-row board, counting the bottom row as 1); if the opponent answers every move
+    in the same column, the player to move gets all lower cells and the opponent all upper ones."""
+    masks = _FOLLOW_UP_MASKS.get((rows, cols))
+    if masks is None:
+        stride = rows + 1
+        lower = upper = 0
+        for c in range(cols):
+            for r in range(rows):
+                if r % 2 == rows % 2:
+                    lower |= 1 << (c * stride + r)
+                else:
+                    upper |= 1 << (c * stride + r)
+        masks = _FOLLOW_UP_MASKS[(rows, cols)] = (lower, upper)
+    return masks
+
+
+def _winning_cells_n(pieces, mask, stride, board_mask, n):
+    """winning_cells for any line length: for each direction and each place of the missing cell in the
+    line, ANDs the shifted copies of pieces that must surround it."""
+    r = pieces << 1
+    for k in range(2, n):
+        r &= pieces << k  # vertical: n-1 pieces directly below
+    for shift in (stride, stride - 1, stride + 1):
+        for below in range(n):  # pieces on the lower/left side of the missing cell
+            p = -1  # all ones
+            for k in range(1, below + 1):
+                p &= pieces << (k * shift)
+            for k in range(1, n - below):
+                p &= pieces >> (k * shift)
+            r |= p
+    return r & (board_mask ^ mask)
+
+
+def mirror_bits(bits, rows, cols):
+    """Representation Logic: Returns a bitboard flipped left to right (column c becomes cols-1-c)."""
+    stride = rows + 1
+    column = (1 << stride) - 1
+    mirrored = 0
+    for c in range(cols):
+        mirrored |= ((bits >> (c * stride)) & column) << ((cols - 1 - c) * stride)
+    return mirrored
+
+
+def position_key(mine, opp, rows, cols):
+    """Representation Logic: Unique integer key of the position where the side to move owns `mine`.
+    Adding the bottom row to the occupancy mask marks the first empty cell of every column, so
+    key = mine + mask + bottom identifies both the heights and who owns each piece."""
+    stride = rows + 1
+    bottom = sum(1 << (c * stride) for c in range(cols))
+    return mine + (mine | opp) + bottom
+
+
+def canonical_position_key(mine, opp, rows, cols):
+    """Representation Logic: Returns (key, mirrored) where key is the smaller of position_key for the
+    position and for its mirror image, and mirrored tells whether the mirror image was used.
+    A move looked up under a mirrored key must be flipped back with cols - 1 - col."""
+    key = position_key(mine, opp, rows, cols)
+    mirror_key = position_key(mirror_bits(mine, rows, cols), mirror_bits(opp, rows, cols), rows, cols)
+    if mirror_key < key:
+        return mirror_key, True
+    return key, False
+
+
+# REASONING LOGIC – Heuristic evaluation of board states
+# EVALUATION WEIGHTS
+# Window scores (connect_n of mine; connect_n - 1 of mine and one empty; connect_n - 2 of mine and two empty;
+# connect_n - 1 of the opponent's and one empty), the bonus per center piece and the diagonal window multiplier.
+# The defaults were set by hand. tools/selfplay.py records self-play games and tools/tune_weights.py fits the
+# weights to them and writes a weights file, which init_agent loads (see load_weights). Window and center
+# weights are rounded to multiples of WEIGHT_QUANTUM, so the incremental sums of BitBoard stay exact.
+WINDOW_WIN_SCORE = 100
+WINDOW_THREE_SCORE = 5
+WINDOW_TWO_SCORE = 2
+WINDOW_BLOCK_SCORE = -100
+CENTER_WEIGHT = 3
+DIAGONAL_WEIGHT = 1.1
+WEIGHT_NAMES = ('window_win', 'window_three', 'window_two', 'window_block', 'center', 'diagonal')
+DEFAULT_WEIGHTS = (WINDOW_WIN_SCORE, WINDOW_THREE_SCORE, WINDOW_TWO_SCORE, WINDOW_BLOCK_SCORE, CENTER_WEIGHT,
+                   DIAGONAL_WEIGHT)
+WEIGHT_QUANTUM = 1 / 64
+# Weights file (JSON, written by tools/tune_weights.py); set with init_agent(weights_path=...) or the
+# TEAM6_WEIGHTS env var. A missing file keeps the default weights.
+WEIGHTS_PATH = os.environ.get('TEAM6_WEIGHTS', os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                                            'Team6_weights.json'))
+
+
+def evaluation_weights():
+    """Returns the weights in use as a tuple in WEIGHT_NAMES order."""
+    return (WINDOW_WIN_SCORE, WINDOW_THREE_SCORE, WINDOW_TWO_SCORE, WINDOW_BLOCK_SCORE, CENTER_WEIGHT,
+            DIAGONAL_WEIGHT)
+
+
+def _quantize_weight(value):
+    """Rounds a window or center weight to a multiple of WEIGHT_QUANTUM; whole numbers stay ints."""
+    value = round(value / WEIGHT_QUANTUM) * WEIGHT_QUANTUM
+    return int(value) if value == int(value) else value
+
+
+def set_evaluation_weights(weights):
+    """Reasoning Logic: Sets the evaluation weights from a tuple in WEIGHT_NAMES order (or a dict keyed by those
+    names, missing ones keeping their default). The cached window scores and compiled-core tables are rebuilt;
+    transposition tables filled under other weights should not be reused. Returns the weights in use."""
+    global WINDOW_WIN_SCORE, WINDOW_THREE_SCORE, WINDOW_TWO_SCORE, WINDOW_BLOCK_SCORE, CENTER_WEIGHT
+    global DIAGONAL_WEIGHT
+    if isinstance(weights, dict):
+        unknown = set(weights) - set(WEIGHT_NAMES)
+        if unknown:
+            raise ValueError('unknown evaluation weights: %s' % ', '.join(sorted(unknown)))
+        weights = tuple(weights.get(name, default) for name, default in zip(WEIGHT_NAMES, DEFAULT_WEIGHTS))
+    *scores, diagonal = weights
+    weights = tuple(_quantize_weight(float(w)) for w in scores) + (float(diagonal),)
+    if weights != evaluation_weights():
+        (WINDOW_WIN_SCORE, WINDOW_THREE_SCORE, WINDOW_TWO_SCORE, WINDOW_BLOCK_SCORE, CENTER_WEIGHT,
+         DIAGONAL_WEIGHT) = weights
+        _WINDOW_VALUES.clear()
+        _NATIVE_GEOMETRIES.clear()
+    return weights
+
+
+def load_weights(path):
+    """Sets the evaluation weights from a weights file, or back to the defaults if there is no file at path.
+    The file is a JSON object with one number per WEIGHT_NAMES entry (other keys, like the fit report
+    tools/tune_weights.py adds, are ignored). Returns the weights in use."""
+    if not path or not os.path.exists(path):
+        return set_evaluation_weights(DEFAULT_WEIGHTS)
+    with open(path) as f:
+        data = json.load(f)
+    return set_evaluation_weights({name: data[name] for name in WEIGHT_NAMES if name in data})
+
+
+def evaluate_window(window, my_symbol, opp_symbol):
+    """Contributors:
+    - Jaydev Patel (50%, core evaluation logic)
+    - Miguel Viray (25%, improved threat detection)
+    - Ziming Wang (25%, scoring adjustments)
+    Reasoning Logic: Scores a window of CONNECT_N (four) cells for the heuristic evaluation.
+    Awards points for windows that are favorable to my_symbol and penalizes ones favorable to opp_symbol."""
+    score = 0
+    n = len(window)
+    # Favorable patterns for my_symbol
+    if window.count(my_symbol) == n:
+        score += WINDOW_WIN_SCORE  # Winning window (4 in a row for me)
+    elif window.count(my_symbol) == n - 1 and window.count(' ') == 1:
+        score += WINDOW_THREE_SCORE  # Three of mine and one empty (one move to win)
+    elif window.count(my_symbol) == n - 2 and window.count(' ') == 2:
+        score += WINDOW_TWO_SCORE  # Two of mine and two empties
+    # Unfavorable patterns (opponent)
+    if window.count(opp_symbol) == n - 1 and window.count(' ') == 1:
+        score += WINDOW_BLOCK_SCORE  # opponent about to win, play defense (negative)
+    return score
+
+
+def evaluate_board(board, my_symbol, opp_symbol):
+    """Contributors:
+    - Jaydev Patel (40%, board evaluation structure)
+    - Miguel Viray (30%, improved center column evaluation)
+    - Ziming Wang (30%, diagonal weighting adjustment)
+    Reasoning Logic: Heuristic evaluation function for the board state from the perspective of my_symbol.
+    Returns a numeric score where higher is better for my_symbol."""
+    rows = len(board)
+    cols = len(board[0])
+    score = 0
+
+    # target center column
+    center_col = cols // 2
+    center_count = 0
+    if cols % 2 == 1:
+        # odd number of columns: single center column
+        for r in range(rows):
+            if board[r][center_col] == my_symbol:
+                center_count += 1
+    else:
+        # even number of columns: consider both central columns
+        center_left = center_col - 1
+        for r in range(rows):
+            if board[r][center_col] == my_symbol or board[r][center_left] == my_symbol:
+                center_count += 1
+    score += center_count * CENTER_WEIGHT  # each center piece gets a moderate bonus
+
+    # 2. Evaluate all possible CONNECT_N-length windows on the board
+    # (the window cells are precomputed per board size, see board_window_tables)
+    straight, diagonal = board_window_tables(rows, cols, CONNECT_N)
+    # Horizontal and vertical windows
+    for cells in straight:
+        window = [board[r][c] for r, c in cells]
+        score += evaluate_window(window, my_symbol, opp_symbol)
+    # Down-right and down-left diagonal windows
+    for cells in diagonal:
+        window = [board[r][c] for r, c in cells]
+        # Give slightly higher weight to diagonal windows
+        score += evaluate_window(window, my_symbol, opp_symbol) * DIAGONAL_WEIGHT
+
+    return score
+
+
+# Window tables, cached per (rows, cols, N) and reused across games; prepare_geometry builds them all
+_BOARD_WINDOW_TABLES = {}
+
+
+def board_window_tables(rows, cols, connect_n=4):
+    """Representation Logic: Returns (straight, diagonal): every window of connect_n cells on a list board,
+    each a tuple of (row, col) pairs (row 0 = top). Horizontal then vertical windows are straight,
+    down-right then down-left windows are diagonal, in the order the original evaluate_board scanned them.
+    All other window tables are derived from these lists."""
+    key = (rows, cols, connect_n)
+    tables = _BOARD_WINDOW_TABLES.get(key)
+    if tables is not None:
+        return tables
+    n = connect_n
+    straight = []
+    diagonal = []
+    # Horizontal windows
+    for r in range(rows):
+        for c in range(cols - n + 1):
+            straight.append(tuple((r, c + i) for i in range(n)))
+    # Vertical windows
+    for c in range(cols):
+        for r in range(rows - n + 1):
+            straight.append(tuple((r + i, c) for i in range(n)))
+    # Down-right diagonal windows
+    for r in range(rows - n + 1):
+        for c in range(cols - n + 1):
+            diagonal.append(tuple((r + i, c + i) for i in range(n)))
+    # Down-left diagonal windows
+    for r in range(rows - n + 1):
+        for c in range(n - 1, cols):
+            diagonal.append(tuple((r + i, c - i) for i in range(n)))
+    tables = (tuple(straight), tuple(diagonal))
+    _BOARD_WINDOW_TABLES[key] = tables
+    return tables
+
+
+# Window masks for the BitBoard evaluation
+_WINDOW_TABLES = {}
+
+
+def window_tables(rows, cols, connect_n=4):
+    """Representation Logic: Returns (straight_masks, diagonal_masks, center_masks) for a board size.
+    Windows are listed in the same order evaluate_board visits them."""
+    key = (rows, cols, connect_n)
+    tables = _WINDOW_TABLES.get(key)
+    if tables is not None:
+        return tables
+    stride = rows + 1
+
+    def bit(r, c):
+        # list board row r (0 = top) -> bit index with row 0 at the bottom
+        return 1 << (c * stride + rows - 1 - r)
+
+    straight_cells, diagonal_cells = board_window_tables(rows, cols, connect_n)
+    straight = [sum(bit(r, c) for r, c in cells) for cells in straight_cells]
+    diagonal = [sum(bit(r, c) for r, c in cells) for cells in diagonal_cells]
+    # Center column(s): one mask per column so the even-width rule can be applied row by row
+    column = (1 << rows) - 1
+    center_col = cols // 2
+    if cols % 2 == 1:
+        center = (column << (center_col * stride),)
+    else:
+        center = (column << ((center_col - 1) * stride), column << (center_col * stride))
+    tables = (tuple(straight), tuple(diagonal), center)
+    _WINDOW_TABLES[key] = tables
+    return tables
+
+
+def _window_score(mine, opp, connect_n=4):
+    """Scores a window from the number of my/opponent pieces in it, exactly like evaluate_window."""
+    n = connect_n
+    empty = n - mine - opp
+    score = 0
+    if mine == n:
+        score += WINDOW_WIN_SCORE
+    elif mine == n - 1 and empty == 1:
+        score += WINDOW_THREE_SCORE
+    elif mine == n - 2 and empty == 2:
+        score += WINDOW_TWO_SCORE
+    if opp == n - 1 and empty == 1:
+        score += WINDOW_BLOCK_SCORE
+    return score
+
+
+# Score of a window indexed by my_count * (N + 1) + opp_count, per N (cleared when the weights change)
+_WINDOW_VALUES = {}
+
+
+def window_values(connect_n=4):
+    """Returns the list of window scores indexed by my_count * (connect_n + 1) + opp_count, for the current
+    weights."""
+    values = _WINDOW_VALUES.get(connect_n)
+    if values is None:
+        base = connect_n + 1
+        values = [_window_score(code // base, code % base, connect_n) if code // base + code % base <= connect_n
+                  else 0 for code in range(base * base)]
+        _WINDOW_VALUES[connect_n] = values
+    return values
+
+
+# Per-cell window lists for the incremental evaluation
+_CELL_WINDOW_TABLES = {}
+
+
+def cell_window_tables(rows, cols, connect_n=4):
+    """Representation Logic: Returns (cell_straight, cell_diag, center_partner, num_windows) for a board size.
+    cell_straight[i] / cell_diag[i] list the ids of the straight/diagonal windows containing bit i.
+    center_partner[c] is None for non-center columns, -1 for the single center column of an odd
+    board, and the other center column for the two center columns of an even board."""
+    key = (rows, cols, connect_n)
+    tables = _CELL_WINDOW_TABLES.get(key)
+    if tables is not None:
+        return tables
+    straight, diagonal, _ = window_tables(rows, cols, connect_n)
+    size = cols * (rows + 1)
+    cell_straight = [[] for _ in range(size)]
+    cell_diag = [[] for _ in range(size)]
+    for w, mask in enumerate(straight):
+        for i in range(size):
+            if mask >> i & 1:
+                cell_straight[i].append(w)
+    for w, mask in enumerate(diagonal):
+        for i in range(size):
+            if mask >> i & 1:
+                cell_diag[i].append(len(straight) + w)
+    center_partner = [None] * cols
+    center_col = cols // 2
+    if cols % 2 == 1:
+        center_partner[center_col] = -1
+    else:
+        center_partner[center_col] = center_col - 1
+        center_partner[center_col - 1] = center_col
+    tables = (tuple(tuple(ws) for ws in cell_straight), tuple(tuple(ws) for ws in cell_diag),
+              tuple(center_partner), len(straight) + len(diagonal))
+    _CELL_WINDOW_TABLES[key] = tables
+    return tables
+
+
+def evaluate_position(pos):
+    """Reasoning Logic: BitBoard version of evaluate_board from the perspective of player 0.
+    The window scores are maintained by BitBoard.play/undo, so this is just a read of the running
+    totals. The totals are exact (window scores are multiples of WEIGHT_QUANTUM), so this matches evaluate_board
+    up to the float rounding of the diagonal weight, which evaluate_board applies window by window and this
+    once to the diagonal total (about 1e-13; benchmarks/evaluation_parity.py checks the bound)."""
+    return pos.center_count * CENTER_WEIGHT + pos.straight_score + pos.diag_score * DIAGONAL_WEIGHT
+
+
+def scan_evaluate_position(pos):
+    """Reasoning Logic: Non-incremental evaluation of pos by scanning every window mask.
+    Gives exactly evaluate_position's score (the same expression on freshly summed totals);
+    benchmarks/evaluation_parity.py uses it to cross-check the incremental totals of BitBoard.play/undo."""
+    straight, diagonal, center = window_tables(pos.rows, pos.cols, pos.connect_n)
+    mine, opp = pos.pieces
+    n = pos.connect_n
+    stride = pos.stride
+
+    # center column bonus; with two center columns a row counts once if either cell is mine
+    if len(center) == 1:
+        center_count = (mine & center[0]).bit_count()
+    else:
+        left = (mine & center[0]) >> ((pos.cols // 2 - 1) * stride)
+        right = (mine & center[1]) >> ((pos.cols // 2) * stride)
+        center_count = (left | right).bit_count()
+
+    straight_score = 0
+    for mask in straight:
+        straight_score += _window_score((mine & mask).bit_count(), (opp & mask).bit_count(), n)
+    diag_score = 0
+    for mask in diagonal:
+        diag_score += _window_score((mine & mask).bit_count(), (opp & mask).bit_count(), n)
+    return center_count * CENTER_WEIGHT + straight_score + diag_score * DIAGONAL_WEIGHT
+
+
+# BATCH EVALUATION (NumPy)
+# Boards are given as an (N, rows, cols) int8 array in the list board's layout (row 0 = top):
+# 1 = my piece, -1 = opponent piece, 0 = empty.
+_BATCH_TABLES = {}
+
+
+def batch_window_tables(rows, cols, connect_n=4):
+    """Representation Logic: Returns (straight, diagonal, center) index arrays into a flattened rows*cols board.
+    straight and diagonal are (windows, connect_n) arrays listed in evaluate_board's order; center holds one
+    array of cell indices per center column."""
+    key = (rows, cols, connect_n)
+    tables = _BATCH_TABLES.get(key)
+    if tables is not None:
+        return tables
+    straight_cells, diagonal_cells = board_window_tables(rows, cols, connect_n)
+    straight = [[r * cols + c for r, c in cells] for cells in straight_cells]
+    diagonal = [[r * cols + c for r, c in cells] for cells in diagonal_cells]
+    center_col = cols // 2
+    center_cols = [center_col] if cols % 2 == 1 else [center_col - 1, center_col]
+    center = tuple(np.array([r * cols + c for r in range(rows)], dtype=np.intp) for c in center_cols)
+    tables = (np.array(straight, dtype=np.intp).reshape(-1, connect_n),
+              np.array(diagonal, dtype=np.intp).reshape(-1, connect_n), center)
+    _BATCH_TABLES[key] = tables
+    return tables
+
+
+def boards_to_array(boards, my_symbol, opp_symbol):
+    """Converts list boards to the (N, rows, cols) int8 array used by evaluate_boards."""
+    codes = {my_symbol: 1, opp_symbol: -1}
+    return np.array([[[codes.get(cell, 0) for cell in row] for row in board] for board in boards], dtype=np.int8)
+
+
+def evaluate_boards(boards, connect_n=4):
+    """Reasoning Logic: Vectorized evaluate_board for an (N, rows, cols) int8 array of positions.
+    Returns a float64 array of N scores identical to evaluate_board on each board: center and straight parts
+    are summed exactly and the weighted diagonal windows are added one window at a time, in
+    evaluate_board's order, so every board sees the same floating point operations."""
+    if np is None:
+        raise ImportError('evaluate_boards requires NumPy')
+    boards = np.asarray(boards, dtype=np.int8)
+    n, rows, cols = boards.shape
+    straight, diagonal, center = batch_window_tables(rows, cols, connect_n)
+    flat = boards.reshape(n, rows * cols)
+    mine = flat == 1
+    opp = flat == -1
+    values = np.array(window_values(connect_n), dtype=np.float64)
+    base = connect_n + 1
+
+    # center column bonus; with two center columns a row counts once if either cell is mine
+    if len(center) == 1:
+        center_count = mine[:, center[0]].sum(axis=1)
+    else:
+        center_count = (mine[:, center[0]] | mine[:, center[1]]).sum(axis=1)
+    scores = center_count.astype(np.float64) * CENTER_WEIGHT
+
+    # window codes are my_count * (connect_n + 1) + opp_count, as in BitBoard.codes
+    straight_codes = mine[:, straight].sum(axis=2) * base + opp[:, straight].sum(axis=2)
+    scores += values[straight_codes].sum(axis=1)
+    diagonal_values = values[mine[:, diagonal].sum(axis=2) * base + opp[:, diagonal].sum(axis=2)]
+    for w in range(diagonal_values.shape[1]):
+        scores += diagonal_values[:, w] * DIAGONAL_WEIGHT
+    return scores
+
+
+def prepare_geometry(rows, cols, connect_n=4):
+    """Representation Logic: Builds every per-geometry table (Zobrist keys, follow-up masks, window lists and
+    masks, per-cell window ids, window scores, and the NumPy index arrays when NumPy is available) for a board
+    size and line length. Called from init_agent so the first move does not pay for it; the tables are cached by
+    (rows, cols, connect_n) and reused by every later game with the same geometry."""
+    zobrist_keys(rows, cols)
+    mirror_zobrist_keys(rows, cols)
+    follow_up_masks(rows, cols)
+    cell_window_tables(rows, cols, connect_n)
+    window_values(connect_n)
+    if np is not None:
+        batch_window_tables(rows, cols, connect_n)
+
+
+# TRANSPOSITION TABLE
+# Bound types stored with each entry
+EXACT, LOWER_BOUND, UPPER_BOUND = 0, 1, 2
+TT_SIZE_MB = 32  # default memory cap for the table
+TT_ENTRY_BYTES = 176  # approximate CPython cost of one slot: list pointer + 6-tuple + key/score objects
+
+
+class TranspositionTable:
+    """Search Logic: Fixed-size hash table of searched positions, keyed by BitBoard.hash
+    (BitBoard.canonical_hash when SYMMETRY is on, with best_move stored for the canonical side).
+    Each entry is (key, depth, score, bound, best_move, generation). The number of slots is derived
+    from a memory cap in MB and never grows. A slot is replaced when it is empty, was written by an
+    earlier search (generation), or the new result is at least as deep (depth-preferred)."""
+    __slots__ = ('size', 'entries', 'generation')
+
+    def __init__(self, size_mb=TT_SIZE_MB):
+        self.size = max(1, int(size_mb * 2 ** 20) // TT_ENTRY_BYTES)
+        self.entries = [None] * self.size
+        self.generation = 0
+
+    def new_search(self):
+        """Marks the entries written so far as old, so the next search may overwrite them."""
+        self.generation += 1
+
+    def clear(self):
+        self.entries = [None] * self.size
+        self.generation = 0
+
+    def probe(self, key):
+        """Returns the entry stored for key, or None."""
+        entry = self.entries[key % self.size]
+        if entry is not None and entry[0] == key:
+            return entry
+        return None
+
+    def store(self, key, depth, score, bound, best_move):
+        index = key % self.size
+        old = self.entries[index]
+        if old is None or depth >= old[1] or old[5] != self.generation:
+            self.entries[index] = (key, depth, score, bound, best_move, self.generation)
+
+
+# Table shared by every search of the current game, created in init_agent
+TRANSPOSITION_TABLE = None
+# When True, the table is keyed by the canonical (mirror-independent) hash and a symmetric root position
+# only searches one of each pair of mirrored moves. Set to False to measure the gain.
+SYMMETRY = True
+# XORed into the key when the opponent is to move, so a table reused across games (where the agent may
+# move first or second) never mixes up positions that only differ by the side to move
+SIDE_TO_MOVE_KEY = random.Random(0x51DE).getrandbits(64)
+# When True, interior nodes of the search with at least THREAT_MIN_DEPTH plies left first run threat_analysis:
+# forced wins and losses are scored without searching further and moves that lose at once are skipped. Set to
+# False to measure the gain. Nearer the leaves the analysis costs the Python search more time than the nodes it
+# saves (benchmarks/threats.py compares the minimum depths on both backends).
+THREAT_ANALYSIS = True
+THREAT_MIN_DEPTH = 2
+# When True, only entries searched to exactly the requested depth are used for cutoffs, which makes the
+# score of a fixed-depth search independent of what the table held before (set in parallel workers)
+TT_EXACT_DEPTH_ONLY = False
+
+
+# TIME MANAGEMENT
+# Seconds of search per move; set with init_agent(move_time=...) or the TEAM6_MOVE_TIME env var
+MOVE_TIME_BUDGET = float(os.environ.get('TEAM6_MOVE_TIME', '1.0'))
+# Deepest iteration what_is_your_move searches (None: only the clock limits it); set with
+# init_agent(max_depth=...) or the TEAM6_MAX_DEPTH env var
+MAX_SEARCH_DEPTH = int(os.environ['TEAM6_MAX_DEPTH']) if os.environ.get('TEAM6_MAX_DEPTH') else None
+TIME_CHECK_MASK = 1023  # read the clock once every 1024 nodes
+SEARCH_DEADLINE = math.inf  # perf_counter() value at which the running search gives up
+SEARCH_ABORTED = False  # set from another thread to stop the running search at its next clock check
+NODE_COUNT = 0
+
+
+class SearchTimeout(Exception):
+    """Raised inside alpha_beta_search when SEARCH_DEADLINE has passed or SEARCH_ABORTED is set.
+    The position being searched is left mid-line, so the caller must discard it."""
+
+
+# MOVE ORDERING inside the search
+# Set to False to search moves left to right (transposition table move first), e.g. to measure the gain
+MOVE_ORDERING = True
+MAX_KILLERS = 2
+KILLER_MOVES = {}  # ply (pieces on the board) -> up to MAX_KILLERS columns that recently caused a cutoff
+HISTORY_SCORES = None  # HISTORY_SCORES[player][col]: depth^2 summed over the cutoffs col caused
+
+
+def reset_move_ordering(cols):
+    """Clears the killer moves and halves the history scores before a new search, so the tables follow
+    the current game without being dominated by old positions."""
+    global HISTORY_SCORES
+    KILLER_MOVES.clear()
+    if NATIVE_STATE is not None:
+        NATIVE_STATE.reset(cols)
+    if HISTORY_SCORES is None or len(HISTORY_SCORES[0]) != cols:
+        HISTORY_SCORES = [[0] * cols, [0] * cols]
+    else:
+        for scores in HISTORY_SCORES:
+            for c in range(cols):
+                scores[c] //= 2
+
+
+def record_cutoff(ply, player, col, depth):
+    """Remembers a move that caused a beta cutoff as a killer for its ply and in the history table."""
+    killers = KILLER_MOVES.get(ply)
+    if killers is None:
+        KILLER_MOVES[ply] = [col]
+    elif col not in killers:
+        killers.insert(0, col)
+        del killers[MAX_KILLERS:]
+    if HISTORY_SCORES is not None and col < len(HISTORY_SCORES[player]):
+        HISTORY_SCORES[player][col] += depth * depth
+
+
+def order_search_moves(pos, moves, player, tt_move, blocks=None):
+    """Search Logic: Orders the moves of player at an interior node: the transposition table move, then
+    moves that win at once, moves that block an immediate opponent win, the killer moves of this ply,
+    and finally the rest by history score, center columns first on ties.
+    blocks, when given, are the opponent's playable threats found by threat_analysis, which also
+    established that player has no immediate win."""
+    if blocks is None:
+        playable = pos.playable_cells()
+        wins = pos.threat_cells(player) & playable
+        blocks = pos.threat_cells(1 - player) & playable
+    else:
+        wins = 0
+    killers = KILLER_MOVES.get(pos.num_moves, ())
+    stride = pos.stride
+    column = (1 << stride) - 1
+    center = pos.cols // 2
+    first, winning, blocking, killer, rest = [], [], [], [], []
+    for col in sorted(moves, key=lambda c: abs(c - center)):
+        if col == tt_move:
+            first.append(col)
+        elif wins >> (col * stride) & column:
+            winning.append(col)
+        elif blocks >> (col * stride) & column:
+            blocking.append(col)
+        elif col in killers:
+            killer.append(col)
+        else:
+            rest.append(col)
+    if len(killer) > 1:
+        killer.sort(key=killers.index)
+    if HISTORY_SCORES is not None and len(rest) > 1:
+        history = HISTORY_SCORES[player]
+        rest.sort(key=lambda c: -history[c])  # stable, keeps center-first order on ties
+    return first + winning + blocking + killer + rest
+
+
+# THREAT ANALYSIS
+# Allis-style threat rules that are exact, so their verdicts can stand in for a search: immediate wins,
+# double threats (two playable opponent threats, or one directly below another), forced blocks, moves
+# that give the opponent the cell above, and the claimeven zugzwang of the follow-up player.
+def threat_analysis(pos, player):
+    """Search Logic: Threat analysis for `player` to move in pos. Returns (outcome, cells, blocks):
+    - a playable cell completing a line for player: outcome 1, cells = the winning cells;
+    - a double threat against player (two playable opponent threats, or the only one directly below
+      another), or every move lands directly below an opponent threat: outcome -1;
+    - zugzwang: every column has an even number of empty cells, so the opponent can answer each move in
+      the same column and claim the upper cell of every pair (follow_up_masks). If those cells complete a
+      line for the opponent while the lower ones complete none for player, player loses: outcome -1;
+    - otherwise outcome 0 and cells = the playable cells still worth trying (the forced block if there is
+      one, never a cell directly below an opponent threat), one bit per column.
+    blocks holds the playable cells where the opponent would win next move."""
+    mine, opp = pos.pieces[player], pos.pieces[1 - player]
+    mask = mine | opp
+    stride, board_mask, n = pos.stride, pos.board_mask, pos.connect_n
+    playable = (mask + pos.bottom) & board_mask
+    wins = winning_cells(mine, mask, stride, board_mask, n) & playable
+    if wins:
+        return 1, wins, 0
+    threats = winning_cells(opp, mask, stride, board_mask, n)
+    blocks = threats & playable
+    cells = playable
+    if blocks:
+        if blocks & (blocks - 1):
+            return -1, 0, blocks  # two threats, cannot block both
+        cells = blocks
+    cells &= ~(threats >> 1)  # playing directly below an opponent threat lets them win on top
+    if not cells:
+        return -1, 0, blocks
+    lower, upper = follow_up_masks(pos.rows, pos.cols)
+    if not playable & upper:  # every column has an even number of empty cells
+        empty = board_mask ^ mask
+        if (has_connection(opp | (empty & upper), stride, n)
+                and not has_connection(mine | (empty & lower), stride, n)):
+            return -1, 0, blocks
+    return 0, cells, blocks
+
+
+def cell_columns(cells, stride):
+    """Returns the columns, left to right, of the cells in a one-bit-per-column mask."""
+    columns = []
+    while cells:
+        low = cells & -cells
+        columns.append((low.bit_length() - 1) // stride)
+        cells ^= low
+    return columns
+
+
+# SEARCH LOGIC – Minimax with Alpha-Beta Pruning
+def alpha_beta_search(pos, depth, alpha, beta, maximizing_player):
+    """Contributors:
+    - Jaydev Patel (50%, core minimax structure)
+    - Phong Diep  (30%, alpha-beta pruning optimizations)
+    - Ziming Wang (20%, improved terminal condition handling)
+    Search Logic: Minimax algorithm with Alpha-Beta pruning on a BitBoard.
+    Recursively evaluates moves up to a given depth and returns the heuristic score of the board
+    from the perspective of player 0 (the agent), who is the maximizing player.
+    Uses alpha (best score for maximizer so far) and beta (best for minimizer) to prune branches.
+    A won position is never searched: the parent checks the lines through each piece it drops
+    and scores a winning move directly, so pos is always undecided when this is called.
+    Results are cached in TRANSPOSITION_TABLE under the canonical key, so a position and its mirror image
+    share an entry. Moves are tried in order_search_moves order
+    (table move, wins, blocks, killers, history) and cutoffs feed the killer and history tables.
+    With THREAT_ANALYSIS on, interior nodes with at least THREAT_MIN_DEPTH plies left that threat_analysis
+    resolves return a win or loss directly and the others only search the moves it leaves.
+    Raises SearchTimeout once SEARCH_DEADLINE has passed."""
+    global NODE_COUNT
+    NODE_COUNT += 1
+    if not NODE_COUNT & TIME_CHECK_MASK and (SEARCH_ABORTED or time.perf_counter() > SEARCH_DEADLINE):
+        raise SearchTimeout
+    # Get list of valid moves (columns that are not full)
+    valid_moves = pos.valid_moves()
+    if len(valid_moves) == 0:
+        return 0  # no moves left (draw)
+    if depth == 0:
+        # Depth limit reached, return heuristic evaluation
+        return evaluate_position(pos)
+
+    # Threat analysis: forced wins and losses need no search, losing moves are left out
+    blocks = None
+    if THREAT_ANALYSIS and depth >= THREAT_MIN_DEPTH:
+        outcome, cells, blocks = threat_analysis(pos, 0 if maximizing_player else 1)
+        if outcome:
+            return math.inf if (outcome > 0) == maximizing_player else -math.inf
+        if cells.bit_count() < len(valid_moves):
+            valid_moves = cell_columns(cells, pos.stride)
+
+    # Look up the position in the transposition table
+    tt = TRANSPOSITION_TABLE
+    alpha_orig, beta_orig = alpha, beta
+    tt_move = None
+    if tt is not None:
+        # canonical key, inlined from BitBoard.canonical_hash
+        mirrored = SYMMETRY and pos.mirror_hash < pos.hash
+        key = pos.mirror_hash if mirrored else pos.hash
+        if not maximizing_player:
+            key ^= SIDE_TO_MOVE_KEY
+        entry = tt.probe(key)
+        if entry is not None:
+            _, tt_depth, tt_score, tt_bound, tt_move, _ = entry
+            if mirrored:
+                tt_move = pos.cols - 1 - tt_move
+            if tt_depth == depth or (tt_depth > depth and not TT_EXACT_DEPTH_ONLY):
+                if tt_bound == EXACT:
+                    if STATS_ENABLED:
+                        SEARCH_COUNTERS['tt_cutoffs'] += 1
+                    return tt_score
+                elif tt_bound == LOWER_BOUND:
+                    alpha = max(alpha, tt_score)
+                else:
+                    beta = min(beta, tt_score)
+                if alpha >= beta:
+                    if STATS_ENABLED:
+                        SEARCH_COUNTERS['tt_cutoffs'] += 1
+                    return tt_score
+
+    # Order the moves for better pruning
+    if MOVE_ORDERING and depth > 1:
+        valid_moves = order_search_moves(pos, valid_moves, 0 if maximizing_player else 1, tt_move, blocks)
+    else:
+        # just above the leaves full ordering costs more than it saves: table move and killers only
+        if MOVE_ORDERING:
+            for col in KILLER_MOVES.get(pos.num_moves, ())[::-1]:
+                if col in valid_moves:
+                    valid_moves.remove(col)
+                    valid_moves.insert(0, col)
+        if tt_move in valid_moves:
+            valid_moves.remove(tt_move)
+            valid_moves.insert(0, tt_move)
+
+    # Recursive search with alpha-beta pruning
+    best_move = valid_moves[0]
+    if maximizing_player:
+        max_eval = -math.inf
+        for col in valid_moves:
+            # simulate dropping my piece
+            pos.play(col, 0)
+            if pos.is_win_at(col, 0):
+                eval_score = math.inf  # i have won
+            else:
+                eval_score = alpha_beta_search(pos, depth - 1, alpha, beta, False)
+            # undo move
+            pos.undo(col, 0)
+            # update the max evaluation
+            if eval_score > max_eval:
+                max_eval = eval_score
+                best_move = col
+            alpha = max(alpha, max_eval)
+            if alpha >= beta:
+                if STATS_ENABLED:
+                    SEARCH_COUNTERS['cutoffs'] += 1
+                if MOVE_ORDERING:
+                    record_cutoff(pos.num_moves, 0, col, depth)
+                break  # prune branch
+        best_score = max_eval
+    else:
+        min_eval = math.inf
+        for col in valid_moves:
+            # simulate dropping opponent's piece
+            pos.play(col, 1)
+            if pos.is_win_at(col, 1):
+                eval_score = -math.inf  # opponent has won
+            else:
+                eval_score = alpha_beta_search(pos, depth - 1, alpha, beta, True)
+            # undo move
+            pos.undo(col, 1)
+            # update the min evaluation
+            if eval_score < min_eval:
+                min_eval = eval_score
+                best_move = col
+            beta = min(beta, min_eval)
+            if alpha >= beta:
+                if STATS_ENABLED:
+                    SEARCH_COUNTERS['cutoffs'] += 1
+                if MOVE_ORDERING:
+                    record_cutoff(pos.num_moves, 1, col, depth)
+                break  # prune branch
+        best_score = min_eval
+
+    if tt is not None:
+        if best_score <= alpha_orig:
+            bound = UPPER_BOUND
+        elif best_score >= beta_orig:
+            bound = LOWER_BOUND
+        else:
+            bound = EXACT
+        tt.store(key, depth, best_score, bound, pos.cols - 1 - best_move if mirrored else best_move)
+    return best_score
+
+
+# COMPILED SEARCH CORE
+# Optional C version of alpha_beta_search (native/_team6_core.c, built with tools/build_native.py). It is loaded
+# at import time when the built module sits next to this file and follows the Python search step by step (same
+# move ordering, table slots and replacement, evaluation arithmetic), so both backends return the same scores,
+# moves and node counts. TEAM6_BACKEND=python keeps the pure-Python search; boards over 128 bits and the
+# endgame solver always use Python. Search statistics cannot time is_win_at/evaluate_position in C.
+# The built module is not versioned with the source, so it can be older than this file: it is only used when
+# its ABI_VERSION equals NATIVE_ABI_VERSION (bumped together with CORE_ABI_VERSION in the C source).
+NATIVE_ABI_VERSION = 2
+
+
+def _load_native_core():
+    """Returns the compiled _team6_core module from this file's directory, or None if it is not built or was
+    built from another version of the C source (with a warning to rebuild it)."""
+    if os.environ.get('TEAM6_BACKEND', '') == 'python':
+        return None
+    here = os.path.dirname(os.path.abspath(__file__))
+    for suffix in importlib.machinery.EXTENSION_SUFFIXES:
+        path = os.path.join(here, '_team6_core' + suffix)
+        if os.path.exists(path):
+            try:
+                spec = importlib.util.spec_from_file_location('_team6_core', path)
+                module = importlib.util.module_from_spec(spec)
+                spec.loader.exec_module(module)
+            except ImportError:
+                return None  # built for another interpreter
+            version = getattr(module, 'ABI_VERSION', None)
+            if version != NATIVE_ABI_VERSION:
+                warnings.warn('%s was built from another version of native/_team6_core.c (ABI %s, expected %d); '
+                              'using the Python search until python tools/build_native.py rebuilds it'
+                              % (os.path.basename(path), version, NATIVE_ABI_VERSION), RuntimeWarning)
+                return None
+            return module
+    return None
+
+
+native_core = _load_native_core()
+SEARCH_BACKEND = 'python' if native_core is None else 'native'
+NATIVE_STATE = None if native_core is None else native_core.SearchState()  # killers/history of the C search
+_NATIVE_GEOMETRIES = {}
+
+
+def use_search_backend(name):
+    """Selects 'native' (if built) or 'python' for the searches that follow and returns the previous backend.
+    The transposition table must be recreated (new_transposition_table) for the choice to take effect."""
+    global SEARCH_BACKEND
+    if name not in ('python', 'native'):
+        raise ValueError('unknown search backend %r' % (name,))
+    if name == 'native' and native_core is None:
+        raise ValueError('the compiled search core is not built (python tools/build_native.py)')
+    previous, SEARCH_BACKEND = SEARCH_BACKEND, name
+    return previous
+
+
+def new_transposition_table(size_mb=TT_SIZE_MB):
+    """Returns an empty transposition table for the selected backend, with the same number of slots either way."""
+    if SEARCH_BACKEND == 'native':
+        return native_core.Table(max(1, int(size_mb * 2 ** 20) // TT_ENTRY_BYTES))
+    return TranspositionTable(size_mb)
+
+
+def native_geometry(rows, cols, connect_n):
+    """Returns the compiled core's tables for a geometry and the current weights (cached), or None if the core
+    cannot handle it."""
+    key = (rows, cols, connect_n)
+    if key not in _NATIVE_GEOMETRIES:
+        cell_straight, cell_diag, center_partner, num_windows = cell_window_tables(rows, cols, connect_n)
+        try:
+            geometry = native_core.Geometry(rows, cols, connect_n, zobrist_keys(rows, cols),
+                                            mirror_zobrist_keys(rows, cols), SIDE_TO_MOVE_KEY, cell_straight,
+                                            cell_diag, num_windows, center_partner, window_values(connect_n),
+                                            CENTER_WEIGHT, DIAGONAL_WEIGHT)
+        except ValueError:
+            geometry = None
+        _NATIVE_GEOMETRIES[key] = geometry
+    return _NATIVE_GEOMETRIES[key]
+
+
+def search_position(pos, depth, alpha, beta, maximizing_player):
+    """Search Logic: alpha_beta_search on pos, run by the compiled core when it is selected, the table is one
+    of its tables (or there is none) and the board fits; otherwise by alpha_beta_search itself."""
+    global NODE_COUNT
+    tt = TRANSPOSITION_TABLE
+    if SEARCH_BACKEND == 'native' and (tt is None or type(tt) is native_core.Table):
+        geometry = native_geometry(pos.rows, pos.cols, pos.connect_n)
+        if geometry is not None:
+            score, NODE_COUNT, cutoffs, tt_cutoffs = native_core.search(
+                geometry, tt, NATIVE_STATE, pos.pieces[0], pos.pieces[1], depth, alpha, beta, maximizing_player,
+                SEARCH_DEADLINE, NODE_COUNT, TIME_CHECK_MASK, MOVE_ORDERING, SYMMETRY, TT_EXACT_DEPTH_ONLY,
+                max(1, THREAT_MIN_DEPTH) if THREAT_ANALYSIS else 0)
+            if STATS_ENABLED:
+                SEARCH_COUNTERS['cutoffs'] += cutoffs
+                SEARCH_COUNTERS['tt_cutoffs'] += tt_cutoffs
+            if score is None:
+                raise SearchTimeout
+            return score
+    return alpha_beta_search(pos, depth, alpha, beta, maximizing_player)
+
+
+def set_search_aborted(aborted):
+    """Sets SEARCH_ABORTED for the Python search and the compiled core's equivalent flag."""
+    global SEARCH_ABORTED
+    SEARCH_ABORTED = aborted
+    if NATIVE_STATE is not None:
+        NATIVE_STATE.abort(aborted)
+
+
+# Root moves scoring within this margin of the best one are treated as ties (broken toward the center)
+ROOT_TIE_MARGIN = 1e-6
+
+
+def search_root(pos, depth, ordered_columns):
+    """Search Logic: Searches each root move of pos (player 0 to move) to the given depth, in the given order.
+    Returns (best_col, best_score, scores). Moves after the first are searched with alpha just below the
+    best score, so a move that cannot tie the best fails low early; ties prefer the central column."""
+    best_score = -math.inf
+    best_col = None
+    scores = {}
+    center_col = pos.cols // 2
+    for col in ordered_columns:
+        # Simulate dropping our piece
+        pos.play(col, 0)
+        if pos.is_win_at(col, 0):
+            score = math.inf
+        else:
+            # Continue with the opponent's turn (minimizing player)
+            score = search_position(pos, depth - 1, best_score - ROOT_TIE_MARGIN, math.inf, False)
+        # Undo the move
+        pos.undo(col, 0)
+        scores[col] = score
+
+        # Update best move
+        if score > best_score + ROOT_TIE_MARGIN or best_col is None:
+            best_score = score
+            best_col = col
+        # If multiple moves have same score, prefer central columns
+        elif score >= best_score - ROOT_TIE_MARGIN:
+            if abs(col - center_col) < abs(best_col - center_col):
+                best_col = col
+    return best_col, best_score, scores
+
+
+# PARALLEL ROOT SEARCH
+# Number of worker processes for the root search; set with init_agent(workers=...) or the TEAM6_WORKERS
+# env var. 1 keeps the search in this process.
+SEARCH_WORKERS = int(os.environ.get('TEAM6_WORKERS', '1'))
+SEARCH_POOL = None  # ProcessPoolExecutor shared by all moves and games, started by start_search_pool
+_POOL_WORKERS = 0
+
+
+def start_search_pool(workers, tt_size_mb=TT_SIZE_MB):
+    """Search Logic: Starts (or reuses) the process pool for parallel_search_root and returns it.
+    Returns None and stops any running pool when workers <= 1."""
+    global SEARCH_POOL, _POOL_WORKERS
+    if workers <= 1:
+        shutdown_search_pool()
+        return None
+    if SEARCH_POOL is not None and _POOL_WORKERS == workers:
+        return SEARCH_POOL
+    shutdown_search_pool()
+    SEARCH_POOL = concurrent.futures.ProcessPoolExecutor(max_workers=workers, initializer=_init_search_worker,
+                                                         initargs=(tt_size_mb,))
+    _POOL_WORKERS = workers
+    return SEARCH_POOL
+
+
+def shutdown_search_pool():
+    """Stops the worker processes, if any."""
+    global SEARCH_POOL, _POOL_WORKERS
+    if SEARCH_POOL is not None:
+        SEARCH_POOL.shutdown(wait=True, cancel_futures=True)
+    SEARCH_POOL = None
+    _POOL_WORKERS = 0
+
+
+atexit.register(shutdown_search_pool)
+
+
+def _init_search_worker(tt_size_mb):
+    """Runs once in each worker process: gives the worker its own table, kept for the life of the pool."""
+    global TRANSPOSITION_TABLE, TT_EXACT_DEPTH_ONLY, TT_SIZE_MB
+    TT_SIZE_MB = tt_size_mb
+    TRANSPOSITION_TABLE = new_transposition_table(tt_size_mb)
+    TT_EXACT_DEPTH_ONLY = True
+
+
+def _search_root_move(rows, cols, connect_n, mine, opp, col, depth, deadline, weights):
+    """Worker task: returns the exact depth-limited score of player 0 playing col, or None if the
+    deadline (a perf_counter() value, which is system-wide) passed first. weights are the caller's
+    evaluation weights; a worker whose table was filled under other weights starts a new one."""
+    global SEARCH_DEADLINE, TRANSPOSITION_TABLE
+    if weights != evaluation_weights():
+        set_evaluation_weights(weights)
+        TRANSPOSITION_TABLE = new_transposition_table(TT_SIZE_MB)
+    if HISTORY_SCORES is None or len(HISTORY_SCORES[0]) != cols:
+        reset_move_ordering(cols)  # the worker's last search was on another board size
+    pos = BitBoard.from_bits(rows, cols, mine, opp, connect_n)
+    pos.play(col, 0)
+    if pos.is_win_at(col, 0):
+        return math.inf
+    TRANSPOSITION_TABLE.new_search()
+    SEARCH_DEADLINE = deadline
+    try:
+        return search_position(pos, depth - 1, -math.inf, math.inf, False)
+    except SearchTimeout:
+        return None
+    finally:
+        SEARCH_DEADLINE = math.inf
+
+
+def parallel_search_root(pos, depth, ordered_columns, deadline):
+    """Search Logic: Same contract as search_root, but each root move is scored in a SEARCH_POOL worker.
+    Every move gets an exact score (full window) and the workers only use same-depth table entries, so
+    the chosen move for a given depth does not depend on the number of workers or on scheduling.
+    Raises SearchTimeout if any move could not be finished before the deadline."""
+    mine, opp = pos.pieces
+    weights = evaluation_weights()
+    futures = [SEARCH_POOL.submit(_search_root_move, pos.rows, pos.cols, pos.connect_n, mine, opp, col, depth, deadline,
+                                  weights) for col in ordered_columns]
+    scores = {}
+    for col, future in zip(ordered_columns, futures):
+        scores[col] = future.result()
+    if any(score is None for score in scores.values()):
+        raise SearchTimeout
+
+    # Combine in the given order with the same tie-break as search_root
+    best_score = -math.inf
+    best_col = None
+    center_col = pos.cols // 2
+    for col in ordered_columns:
+        score = scores[col]
+        if score > best_score + ROOT_TIE_MARGIN or best_col is None:
+            best_score = score
+            best_col = col
+        elif score >= best_score - ROOT_TIE_MARGIN:
+            if abs(col - center_col) < abs(best_col - center_col):
+                best_col = col
+    return best_col, best_score, scores
+
+
+def iterative_deepening(pos, ordered_columns, deadline, max_depth=None, resume=None, parallel=True, timings=None):
+    """Search Logic: Runs search_root at depth 1, 2, 3, ... until the deadline (a perf_counter() value) passes,
+    the result is a proven win/loss, or the whole remaining game has been searched.
+    Each iteration tries the previous iteration's best move first and then the rest by their previous scores;
+    inside the tree the transposition table's best moves continue that principal variation.
+    Uses parallel_search_root instead when SEARCH_POOL is running, unless parallel is False.
+    resume=(best_col, best_score, depth) continues from an earlier search of pos (e.g. a ponder result)
+    at depth + 1 instead of starting over at depth 1.
+    On a symmetric position (with SYMMETRY on) only the moves in the left half and the center are searched.
+    timings, a dict, receives {depth: perf_counter() value when that depth finished}.
+    Returns (best_col, best_score, depth) from the last iteration that finished. Depth 1 always finishes
+    unless SEARCH_ABORTED is set."""
+    global SEARCH_DEADLINE
+    empty_cells = pos.rows * pos.cols - pos.num_moves
+    if max_depth is None or max_depth > empty_cells:
+        max_depth = empty_cells
+    order = list(ordered_columns)
+    if SYMMETRY and pos.is_symmetric():
+        order = [c for c in order if c <= pos.cols - 1 - c]  # cols-1-c scores the same as c
+    best_col, best_score, depth_reached = order[0], None, 0
+    if resume is not None and resume[0] in order:
+        best_col, best_score, depth_reached = resume
+        order.remove(best_col)
+        order.insert(0, best_col)
+        if best_score == math.inf or best_score == -math.inf:
+            return resume
+    for depth in range(depth_reached + 1, max_depth + 1):
+        started = time.perf_counter()
+        SEARCH_DEADLINE = math.inf if depth == 1 else deadline
+        try:
+            if SEARCH_POOL is not None and parallel:
+                col, score, scores = parallel_search_root(pos, depth, order, SEARCH_DEADLINE)
+            else:
+                # search a copy: a timeout leaves the searched position mid-line
+                col, score, scores = search_root(pos.copy(), depth, order)
+        except SearchTimeout:
+            break
+        finally:
+            SEARCH_DEADLINE = math.inf
+        best_col, best_score, depth_reached = col, score, depth
+        if timings is not None:
+            timings[depth] = time.perf_counter()
+
+        # Principal variation first, then the other moves by score (stable, so ties keep their order)
+        order.sort(key=lambda c: scores[c], reverse=True)
+        order.remove(col)
+        order.insert(0, col)
+
+        if score == math.inf or score == -math.inf:
+            break  # forced result found, deeper search cannot change it
+        now = time.perf_counter()
+        if now + (now - started) > deadline:
+            break  # the next iteration takes longer than this one, so it cannot finish in time
+    return best_col, best_score, depth_reached
+
+
+# SEARCH REACH
+# How deep the live search gets in a given time, for the book (and position cache) to decide whether a stored move
+# was searched deeper than a search of this move could go. Measured from the live searches of this process
+SEARCH_DEPTH_TIMES = {}  # (rows, cols, connect_n) -> {depth: slowest seconds a fresh search took to finish it}
+REACH_PROBE_SHARE = 0.1  # share of the move time a first, timed search gets when nothing was measured yet
+REACH_MIN_GROWTH = 1.5  # bounds of the per-depth time growth used to extrapolate past the deepest timed depth
+REACH_MAX_GROWTH = 10.0
+
+
+def record_search_times(pos, timings, started):
+    """Adds the timings dict of an iterative_deepening search of pos that started at depth 1 at perf_counter()
+    value started (possibly resumed later from its own result, with the same dict) to SEARCH_DEPTH_TIMES."""
+    times = SEARCH_DEPTH_TIMES.setdefault((pos.rows, pos.cols, pos.connect_n), {})
+    for depth, finished in timings.items():
+        if finished - started > times.get(depth, 0.0):
+            times[depth] = finished - started
+
+
+def expected_search_depth(pos, seconds):
+    """Reasoning Logic: The depth a fresh search of pos is expected to finish in `seconds`: the deepest depth
+    whose slowest measured time on this board size fits, continued past the deepest measured one by that depth's
+    growth over the one before. Capped by MAX_SEARCH_DEPTH and the empty cells; None before any search was timed."""
+    times = SEARCH_DEPTH_TIMES.get((pos.rows, pos.cols, pos.connect_n))
+    if not times:
+        return None
+    limit = pos.rows * pos.cols - pos.num_moves
+    if MAX_SEARCH_DEPTH is not None:
+        limit = min(limit, MAX_SEARCH_DEPTH)
+    reach = elapsed = 0.0
+    for depth in sorted(times):
+        elapsed = max(elapsed, times[depth])  # a deeper depth never finishes sooner
+        if elapsed > seconds:
+            return min(reach, limit)
+        reach = depth
+    # every measured depth fits; estimate the deeper ones from the growth of the last measured depth
+    growth = elapsed / times[reach - 1] if times.get(reach - 1) else REACH_MAX_GROWTH
+    growth = min(REACH_MAX_GROWTH, max(REACH_MIN_GROWTH, growth))
+    while reach < limit and elapsed * growth <= seconds:
+        elapsed *= growth
+        reach += 1
+    return min(reach, limit)
+
+
+def live_search_reach(pos, ordered_columns, deadline, timings):
+    """Search Logic: Returns (reach, probe) for a move of pos due at deadline: reach is expected_search_depth for
+    the time left, and probe the (best_col, best_score, depth) result of the short search timed into timings
+    when nothing was measured on this board size yet (None otherwise), for the main search to resume from."""
+    now = time.perf_counter()
+    reach = expected_search_depth(pos, deadline - now)
+    if reach is not None:
+        return reach, None
+    probe = iterative_deepening(pos, ordered_columns, now + REACH_PROBE_SHARE * (deadline - now),
+                                max_depth=MAX_SEARCH_DEPTH, timings=timings)
+    record_search_times(pos, timings, now)
+    return expected_search_depth(pos, deadline - now), probe
+
+
+# Order moves to improve alpha-beta pruning efficiency
+def order_moves(pos, moves):
+    """Contributors:
+    - Jaydev Patel (60%, core approach)
+    - Ziming Wang (30%, center proximity and height-based ordering)
+    - Miguel Viray (10%, scoring function)
+    Orders moves to improve alpha-beta pruning efficiency.
+    Prioritizes center columns and columns where placing a piece results in a higher position.
+    Reads the column heights of the BitBoard pos, so it needs neither a list board nor the players' symbols."""
+    # Start with center columns
+    center_col = pos.cols // 2
+
+    # Calculate center proximity for each move
+    move_scores = []
+    for col in moves:
+        # Score based on proximity to center and height
+        center_distance = abs(col - center_col)
+        # list board row (row 0 the top) of the cell the piece lands in
+        row = pos.rows - 1 - pos.heights[col] if pos.heights[col] < pos.rows else -1
+
+        # Columns closer to center and pieces higher on the board are preferred
+        score = -center_distance - 0.1 * row
+        move_scores.append((col, score))
+
+    # Sort by score (descending)
+    move_scores.sort(key=lambda x: x[1], reverse=True)
+    return [move[0] for move in move_scores]
+
+
+# ENDGAME SOLVER
+# Below this many empty cells what_is_your_move solves the game exactly instead of using the heuristic
+# search; set with init_agent(endgame_cells=...) or the TEAM6_ENDGAME_CELLS env var
+ENDGAME_EMPTY_CELLS = int(os.environ.get('TEAM6_ENDGAME_CELLS', '20'))
+ENDGAME_TT_SLOTS = 1 << 18  # entries in the solver's own transposition table
+
+
+class EndgameSolver:
+    """Search Logic: Exact Connect 4 solver for one board size (negamax with alpha-beta and null windows).
+    Works on two ints like BitBoard: `current` holds the pieces of the side to move and `mask` all pieces.
+    Scores are from the side to move's view: 0 is a draw, a win with k of our pieces still to be placed
+    scores k, and a loss scores -k the same way, so quicker wins and slower losses score higher.
+    solve() narrows the score with null-window searches (MTD(f) style); its table stores upper bounds."""
+
+    def __init__(self, rows, cols, tt_slots=ENDGAME_TT_SLOTS, connect_n=4):
+        self.rows = rows
+        self.cols = cols
+        self.connect_n = connect_n
+        self.stride = rows + 1
+        self.cells = rows * cols
+        self.bottom = sum(1 << (c * self.stride) for c in range(cols))
+        self.board_mask = self.bottom * ((1 << rows) - 1)
+        self.column_masks = [((1 << rows) - 1) << (c * self.stride) for c in range(cols)]
+        self.order = sorted(range(cols), key=lambda c: abs(c - cols // 2))  # center first
+        self.min_score = -self.cells // 2 + 3
+        self.tt_slots = tt_slots
+        self.tt_keys = [0] * tt_slots
+        self.tt_values = [0] * tt_slots
+        self.nodes = 0
+        self.deadline = math.inf
+
+    def winning_cells(self, pieces, mask):
+        """Returns the empty cells that would complete connect_n in a row for the owner of `pieces`."""
+        return winning_cells(pieces, mask, self.stride, self.board_mask, self.connect_n)
+
+    def non_losing_moves(self, current, mask):
+        """Returns the playable cells (one bit per column) that do not let the opponent win at once.
+        Returns 0 if every move loses, including when the opponent has two immediate wins."""
+        possible = (mask + self.bottom) & self.board_mask
+        opponent_win = self.winning_cells(current ^ mask, mask)
+        forced = possible & opponent_win
+        if forced:
+            if forced & (forced - 1):
+                return 0  # two threats, cannot block both
+            possible = forced
+        return possible & ~(opponent_win >> 1)  # never play directly below an opponent threat
+
+    def negamax(self, current, mask, moves, alpha, beta):
+        """Returns the exact score if it lies in (alpha, beta), otherwise a bound on the failing side.
+        The side to move must not have an immediate win (solve and this function check that first)."""
+        self.nodes += 1
+        if not self.nodes & TIME_CHECK_MASK and time.perf_counter() > self.deadline:
+            raise SearchTimeout
+        possible = self.non_losing_moves(current, mask)
+        if possible == 0:
+            return -((self.cells - moves) // 2)  # the opponent wins with their next piece
+        if moves >= self.cells - 2:
+            return 0  # no room left for anyone to win
+        low = -((self.cells - 2 - moves) // 2)  # the opponent cannot win before their second move
+        if alpha < low:
+            alpha = low
+            if alpha >= beta:
+                return alpha
+        high = (self.cells - 1 - moves) // 2  # we cannot win with our next piece
+        key = current + mask
+        slot = key % self.tt_slots
+        if self.tt_keys[slot] == key:
+            high = self.tt_values[slot] + self.min_score - 1
+        if beta > high:
+            beta = high
+            if alpha >= beta:
+                return beta
+
+        # try moves that create the most new threats first, center columns first on ties
+        candidates = []
+        for col in self.order:
+            move = possible & self.column_masks[col]
+            if move:
+                threats = self.winning_cells(current | move, mask).bit_count()
+                candidates.append((-threats, move))
+        candidates.sort(key=lambda item: item[0])
+        for _, move in candidates:
+            new_mask = mask | move
+            score = -self.negamax(current ^ mask, new_mask, moves + 1, -beta, -alpha)
+            if score >= beta:
+                return score
+            if score > alpha:
+                alpha = score
+        self.tt_keys[slot] = key
+        self.tt_values[slot] = alpha - self.min_score + 1
+        return alpha
+
+    def can_win_next(self, current, mask):
+        return self.winning_cells(current, mask) & (mask + self.bottom) & self.board_mask
+
+    def solve(self, current, mask, moves):
+        """Returns the exact score of the position for the side to move."""
+        if self.can_win_next(current, mask):
+            return (self.cells + 1 - moves) // 2
+        low = -((self.cells - moves) // 2)
+        high = (self.cells + 1 - moves) // 2
+        while low < high:
+            mid = low + (high - low) // 2
+            if mid <= 0 and low // 2 < mid:
+                mid = low // 2
+            elif mid >= 0 and high // 2 > mid:
+                mid = high // 2
+            result = self.negamax(current, mask, moves, mid, mid + 1)  # null window
+            if result <= mid:
+                high = result
+            else:
+                low = result
+        return low
+
+    def best_move(self, pos, deadline=math.inf):
+        """Solves pos with player 0 to move and returns (col, score), col being a move that achieves the score.
+        Raises SearchTimeout if the deadline (a perf_counter() value) passes first."""
+        self.deadline = deadline
+        self.nodes = 0
+        current, mask, moves = pos.pieces[0], pos.pieces[0] | pos.pieces[1], pos.num_moves
+        try:
+            # an immediate win is always best
+            for col in self.order:
+                if pos.can_play(col):
+                    move = (mask + self.bottom) & self.column_masks[col]
+                    if self.winning_cells(current, mask) & move:
+                        return col, (self.cells + 1 - moves) // 2
+            score = self.solve(current, mask, moves)
+            # find a move whose reply position is worth at most -score to the opponent
+            fallback = None
+            for col in self.order:
+                if not pos.can_play(col):
+                    continue
+                if fallback is None:
+                    fallback = col
+                move = (mask + self.bottom) & self.column_masks[col]
+                child_current, child_mask = current ^ mask, mask | move
+                if self.can_win_next(child_current, child_mask):
+                    continue  # the opponent would win at once
+                if self.negamax(child_current, child_mask, moves + 1, -score, -score + 1) <= -score:
+                    return col, score
+            return fallback, score  # every move loses immediately
+        finally:
+            self.deadline = math.inf
+
+
+ENDGAME_SOLVER = None  # EndgameSolver for the current geometry, kept between moves and games
+
+
+def solve_endgame(pos, deadline):
+    """Search Logic: Returns (col, score) from the exact solver for player 0 to move in pos,
+    or None if it could not finish before the deadline."""
+    global ENDGAME_SOLVER
+    geometry = (pos.rows, pos.cols, pos.connect_n)
+    if ENDGAME_SOLVER is None or (ENDGAME_SOLVER.rows, ENDGAME_SOLVER.cols, ENDGAME_SOLVER.connect_n) != geometry:
+        ENDGAME_SOLVER = EndgameSolver(pos.rows, pos.cols, connect_n=pos.connect_n)
+    try:
+        return ENDGAME_SOLVER.best_move(pos, deadline)
+    except SearchTimeout:
+        return None
+
+
+# OPENING BOOK
+# Binary file written by tools/build_opening_book.py. Header (little-endian):
+#   magic b'C4BK', version u8, rows u8, cols u8, key_bytes u8, entry count u32
+# followed by the entries sorted by key, each:
+#   canonical_position_key (key_bytes, big-endian), best move u8, score i16 (tenths, from the mover's view),
+#   search depth u8 (BOOK_PROVEN_DEPTH for proven results)
+# The file is memory-mapped and binary-searched, so entries are never loaded into Python objects.
+BOOK_MAGIC = b'C4BK'
+BOOK_VERSION = 2
+BOOK_HEADER = struct.Struct('<4sBBBBI')
+BOOK_PAYLOAD = struct.Struct('<BhB')
+BOOK_PROVEN_DEPTH = 255  # stored depth of proven wins and losses, trusted over any search
+BOOK_SCORE_LIMIT = 32767  # stored for proven wins; -BOOK_SCORE_LIMIT for proven losses
+# Book file; set with init_agent(book_path=...) or the TEAM6_BOOK env var
+BOOK_PATH = os.environ.get('TEAM6_BOOK', os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                                      'Team6_opening_book.bin'))
+
+
+def book_key_bytes(rows, cols):
+    """Number of bytes needed for a position_key on a rows x cols board."""
+    return (cols * (rows + 1) + 7) // 8
+
+
+def book_score(score):
+    """Converts a search score to the i16 stored in the book."""
+    if score == math.inf:
+        return BOOK_SCORE_LIMIT
+    if score == -math.inf:
+        return -BOOK_SCORE_LIMIT
+    return max(-BOOK_SCORE_LIMIT + 1, min(BOOK_SCORE_LIMIT - 1, int(round(score * 10))))
+
+
+class OpeningBook:
+    """Reasoning Logic: Read-only view of an opening book file, memory-mapped and binary-searched."""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.rows, self.cols, self.key_bytes, self.count = BOOK_HEADER.unpack_from(self.map, 0)
+        if magic != BOOK_MAGIC or version != BOOK_VERSION:
+            self.map.close()
+            raise ValueError('%s is not a version %d opening book' % (path, BOOK_VERSION))
+        self.entry_size = self.key_bytes + BOOK_PAYLOAD.size
+
+    def close(self):
+        self.map.close()
+
+    def _find(self, key):
+        """Returns (move, score, depth) stored for a canonical key, or None."""
+        target = key.to_bytes(self.key_bytes, 'big')
+        data = self.map
+        kb = self.key_bytes
+        size = self.entry_size
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            offset = BOOK_HEADER.size + mid * size
+            probe = data[offset:offset + kb]
+            if probe < target:
+                lo = mid + 1
+            elif probe > target:
+                hi = mid
+            else:
+                return BOOK_PAYLOAD.unpack_from(data, offset + kb)
+        return None
+
+    def lookup(self, pos, player=0):
+        """Returns (col, score, depth) for `player` to move in pos, or None if the position is not in the book.
+        col is 0-indexed and already un-mirrored; score is in tenths of evaluate_position units and depth is the
+        search depth that found the move (BOOK_PROVEN_DEPTH for proven results)."""
+        if pos.rows != self.rows or pos.cols != self.cols or pos.connect_n != 4:
+            return None  # books are solved for connect-4 on one board size
+        key, mirrored = canonical_position_key(pos.pieces[player], pos.pieces[1 - player], pos.rows, pos.cols)
+        found = self._find(key)
+        if found is None:
+            return None
+        col, score, depth = found
+        if mirrored:
+            col = pos.cols - 1 - col
+        return col, score, depth
+
+
+def write_opening_book(path, rows, cols, entries):
+    """Writes a book file from a {canonical key: (col, score, depth)} dict (col in the canonical orientation)."""
+    kb = book_key_bytes(rows, cols)
+    with open(path, 'wb') as f:
+        f.write(BOOK_HEADER.pack(BOOK_MAGIC, BOOK_VERSION, rows, cols, kb, len(entries)))
+        for key in sorted(entries):
+            col, score, depth = entries[key]
+            if abs(score) == math.inf:
+                depth = BOOK_PROVEN_DEPTH
+            f.write(key.to_bytes(kb, 'big'))
+            f.write(BOOK_PAYLOAD.pack(col, book_score(score), min(depth, BOOK_PROVEN_DEPTH)))
+
+
+OPENING_BOOK = None  # OpeningBook opened by load_opening_book
+
+
+def load_opening_book(path):
+    """Opens the book at path once and keeps it mapped for later games. Returns None if there is no book."""
+    global OPENING_BOOK
+    if OPENING_BOOK is not None and OPENING_BOOK.path == path:
+        return OPENING_BOOK
+    if OPENING_BOOK is not None:
+        OPENING_BOOK.close()
+        OPENING_BOOK = None
+    if path and os.path.exists(path):
+        OPENING_BOOK = OpeningBook(path)
+    return OPENING_BOOK
+
+
+
+# POSITION CACHE
+# Optional SQLite file that keeps searched positions across games (and processes): canonical position key,
+# depth, score and best move. A game's results are collected in memory and written in one transaction by
+# connect_4_result; what_is_your_move looks the position up before searching and plays the stored move when it
+# was searched at least as deep as this move's search could go (live_search_reach), so a position searched deeply
+# in an earlier game costs a lookup; a shallower stored move is searched first. Keys are canonical_position_key
+# bytes with player 0 (the side to move) owning `mine`, so mirror images share an entry. Entries are kept
+# per board geometry and window scores, since scores from another evaluation would mislead the search.
+# Above the size cap the least recently used entries are evicted, the shallowest first among equals.
+# Enabled with init_agent(cache_path=...) or the TEAM6_CACHE env var; needs the sqlite3 module.
+CACHE_PATH = os.environ.get('TEAM6_CACHE') or None
+CACHE_MAX_ENTRIES = int(os.environ.get('TEAM6_CACHE_ENTRIES', '200000'))
+CACHE_BUSY_TIMEOUT = 5.0  # seconds to wait for another process's write to finish
+
+
+class PositionCache:
+    """Reasoning Logic: Cross-game store of search results in an SQLite file, opened on first use.
+    lookup() reads pending results first, then the file; store() only queues; flush() writes the queue,
+    refreshes the last-use time of the entries read this game and evicts down to max_entries."""
+
+    def __init__(self, path, max_entries=CACHE_MAX_ENTRIES):
+        self.path = path
+        self.max_entries = max_entries
+        self.connection = None
+        self.pending = {}  # (variant, key bytes) -> (depth, score, col) still to be written
+        self.used = set()  # (variant, key bytes) read from the file since the last flush
+
+    def _connect(self):
+        if self.connection is None:
+            self.connection = sqlite3.connect(self.path, timeout=CACHE_BUSY_TIMEOUT, check_same_thread=False)
+            self.connection.execute('CREATE TABLE IF NOT EXISTS positions (variant TEXT NOT NULL, key BLOB NOT NULL, '
+                                    'depth INTEGER NOT NULL, score REAL, col INTEGER NOT NULL, used REAL NOT NULL, '
+                                    'PRIMARY KEY (variant, key)) WITHOUT ROWID')
+            self.connection.execute('CREATE INDEX IF NOT EXISTS positions_eviction ON positions (used, depth)')
+        return self.connection
+
+    def close(self):
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
+
+    @staticmethod
+    def _entry_key(pos):
+        """Returns ((variant, key bytes), mirrored) for player 0 to move in pos."""
+        key, mirrored = canonical_position_key(pos.pieces[0], pos.pieces[1], pos.rows, pos.cols)
+        scores = ','.join('%r' % v for v in window_values(pos.connect_n) + [CENTER_WEIGHT, DIAGONAL_WEIGHT]).encode()
+        variant = '%dx%d/%d:%08x' % (pos.rows, pos.cols, pos.connect_n, zlib.crc32(scores))
+        return (variant, key.to_bytes(book_key_bytes(pos.rows, pos.cols), 'big')), mirrored
+
+    def lookup(self, pos):
+        """Returns (col, score, depth) stored for player 0 to move in pos, col un-mirrored, or None."""
+        entry_key, mirrored = self._entry_key(pos)
+        found = self.pending.get(entry_key)
+        if found is None:
+            try:
+                row = self._connect().execute('SELECT depth, score, col FROM positions WHERE variant = ? AND key = ?',
+                                              entry_key).fetchone()
+            except sqlite3.Error:
+                return None  # a locked or damaged file only costs the lookup
+            if row is None:
+                return None
+            self.used.add(entry_key)
+            found = row
+        depth, score, col = found
+        if mirrored:
+            col = pos.cols - 1 - col
+        return col, score, depth
+
+    def store(self, pos, col, score, depth):
+        """Queues the search result for player 0 to move in pos (col 0-indexed), keeping the deeper one."""
+        entry_key, mirrored = self._entry_key(pos)
+        if mirrored:
+            col = pos.cols - 1 - col
+        queued = self.pending.get(entry_key)
+        if queued is None or depth >= queued[0]:
+            self.pending[entry_key] = (depth, score, col)
+
+    def flush(self):
+        """Writes the queued results in one transaction (an entry is only replaced by a deeper one),
+        marks the entries read since the last flush as used now and evicts beyond max_entries."""
+        if not self.pending and not self.used:
+            return
+        now = time.time()
+        try:
+            with self._connect() as connection:
+                connection.executemany(
+                    'INSERT INTO positions (variant, key, depth, score, col, used) VALUES (?, ?, ?, ?, ?, ?) '
+                    'ON CONFLICT (variant, key) DO UPDATE SET depth = excluded.depth, score = excluded.score, '
+                    'col = excluded.col, used = excluded.used WHERE excluded.depth >= positions.depth',
+                    [(variant, key, depth, score, col, now)
+                     for (variant, key), (depth, score, col) in self.pending.items()])
+                connection.executemany('UPDATE positions SET used = ? WHERE variant = ? AND key = ?',
+                                       [(now, variant, key) for variant, key in self.used])
+                excess = connection.execute('SELECT COUNT(*) FROM positions').fetchone()[0] - self.max_entries
+                if excess > 0:
+                    connection.execute('DELETE FROM positions WHERE (variant, key) IN (SELECT variant, key '
+                                       'FROM positions ORDER BY used, depth LIMIT ?)', (excess,))
+        except sqlite3.Error:
+            pass  # keep playing; the queue is written with the next game's flush
+        else:
+            self.pending.clear()
+            self.used.clear()
+
+
+POSITION_CACHE = None  # PositionCache opened by load_position_cache
+
+
+def load_position_cache(path):
+    """Returns the cache for path, keeping the open one when the path is unchanged (None disables it).
+    The file itself is only opened by the first lookup."""
+    global POSITION_CACHE
+    if POSITION_CACHE is not None and POSITION_CACHE.path == path:
+        return POSITION_CACHE
+    close_position_cache()
+    if path and sqlite3 is not None:
+        POSITION_CACHE = PositionCache(path)
+    return POSITION_CACHE
+
+
+def close_position_cache():
+    """Writes any queued results and closes the cache."""
+    global POSITION_CACHE
+    if POSITION_CACHE is not None:
+        POSITION_CACHE.flush()
+        POSITION_CACHE.close()
+        POSITION_CACHE = None
+
+
+atexit.register(close_position_cache)
+
+# PONDERING
+# After what_is_your_move returns, a background thread keeps searching on the opponent's time: it plays the
+# reply the search expects (the transposition table's best move for the opponent, then the other replies
+# center first) and runs the normal iterative deepening for our answer, filling TRANSPOSITION_TABLE.
+# If the opponent plays a pondered reply, the next move resumes from that result. The thread never searches
+# while the agent does: what_is_your_move stops it (SEARCH_ABORTED) before touching the search state.
+# Enabled with init_agent(ponder=True) or the TEAM6_PONDER env var. The thread shares the interpreter,
+# so an opponent running in the same process gets less CPU while we ponder.
+PONDER_ENABLED = os.environ.get('TEAM6_PONDER', '') not in ('', '0')
+
+
+class Ponderer:
+    """Search Logic: Background worker thread that searches the positions after the opponent's likely replies.
+    start(pos) hands it the position after our move (opponent to move); stop() aborts the search, waits
+    until the thread is idle and returns {(mine, opp): (best_col, best_score, depth)} for the finished
+    replies; shutdown() also ends the thread."""
+
+    def __init__(self):
+        self.lock = threading.Condition()
+        self.job = None
+        self.busy = False
+        self.alive = True
+        self.results = {}
+        self.thread = threading.Thread(target=self._run, name='team6-ponder', daemon=True)
+        self.thread.start()
+
+    def start(self, pos):
+        with self.lock:
+            self.job = pos
+            self.results = {}
+            self.lock.notify_all()
+
+    def stop(self):
+        with self.lock:
+            self.job = None
+            if self.busy:
+                set_search_aborted(True)
+                while self.busy:
+                    self.lock.wait()
+                set_search_aborted(False)
+            results, self.results = self.results, {}
+        return results
+
+    def shutdown(self):
+        self.stop()
+        with self.lock:
+            self.alive = False
+            self.lock.notify_all()
+        self.thread.join()
+
+    def _run(self):
+        while True:
+            with self.lock:
+                while self.alive and self.job is None:
+                    self.lock.wait()
+                if not self.alive:
+                    return
+                pos, self.job = self.job, None
+                self.busy = True
+            try:
+                self._ponder(pos)
+            finally:
+                with self.lock:
+                    self.busy = False
+                    self.lock.notify_all()
+
+    def _ponder(self, pos):
+        replies = pos.valid_moves()
+        replies.sort(key=lambda c: abs(c - pos.cols // 2))
+        key, mirrored = pos.canonical_hash() if SYMMETRY else (pos.hash, False)
+        entry = TRANSPOSITION_TABLE.probe(key ^ SIDE_TO_MOVE_KEY) if TRANSPOSITION_TABLE else None
+        if entry is not None:
+            expected = pos.cols - 1 - entry[4] if mirrored else entry[4]
+            if expected in replies:
+                replies.remove(expected)
+                replies.insert(0, expected)  # the reply our own search expects
+        for reply in replies:
+            if SEARCH_ABORTED:
+                return
+            pos.play(reply, 1)
+            if not pos.is_win_at(reply, 1):
+                answers = pos.valid_moves()
+                if answers:
+                    answers.sort(key=lambda c: abs(c - pos.cols // 2))
+                    # runs until stopped unless the whole game below this reply gets searched
+                    result = iterative_deepening(pos, answers, math.inf, parallel=False)
+                    if result[2] > 0:
+                        with self.lock:
+                            self.results[tuple(pos.pieces)] = result
+            pos.undo(reply, 1)
+
+
+# Worker created in init_agent when PONDER_ENABLED and shut down in connect_4_result
+PONDERER = None
+
+
+def stop_pondering(shutdown=False):
+    """Stops the ponder search (and the thread with shutdown=True); returns the finished ponder results."""
+    global PONDERER
+    if PONDERER is None:
+        return {}
+    if not shutdown:
+        return PONDERER.stop()
+    PONDERER.shutdown()
+    PONDERER = None
+    return {}
+
+
+atexit.register(stop_pondering, True)
+
+
+# SEARCH STATISTICS
+# Opt-in per-move counters, enabled with enable_search_stats() or the TEAM6_STATS env var. When disabled
+# the search only pays for one flag test per cutoff; the timers for is_win_at/evaluate_position are
+# swapped in for the duration of a recorded move, so they cost nothing otherwise.
+STATS_ENABLED = os.environ.get('TEAM6_STATS', '') not in ('', '0')
+STATS_LOG_PATH = os.environ.get('TEAM6_STATS_LOG') or None  # append one JSON line per move here
+PROFILE_SAMPLE_RATE = float(os.environ.get('TEAM6_PROFILE_RATE', '0'))  # fraction of moves run under cProfile
+PROFILE_DIR = os.environ.get('TEAM6_PROFILE_DIR', '.')
+SEARCH_COUNTERS = {'cutoffs': 0, 'tt_cutoffs': 0}  # updated by alpha_beta_search while STATS_ENABLED
+LAST_MOVE_STATS = None
+_STAT_TIMERS = {'win_check': 0.0, 'evaluate': 0.0}
+_PROFILE_RNG = random.Random()
+_untimed_is_win_at = BitBoard.is_win_at
+_untimed_evaluate_position = evaluate_position
+
+
+def enable_search_stats(enabled=True, log_path=None, profile_rate=None, profile_dir=None):
+    """Turns per-move statistics on or off. log_path appends each move's stats as a JSON line;
+    profile_rate (0..1) runs that fraction of moves under cProfile, writing .prof files to profile_dir."""
+    global STATS_ENABLED, STATS_LOG_PATH, PROFILE_SAMPLE_RATE, PROFILE_DIR
+    STATS_ENABLED = enabled
+    if log_path is not None:
+        STATS_LOG_PATH = log_path
+    if profile_rate is not None:
+        PROFILE_SAMPLE_RATE = float(profile_rate)
+    if profile_dir is not None:
+        PROFILE_DIR = profile_dir
+
+
+def get_search_stats():
+    """Returns the statistics of the last recorded what_is_your_move call as a dict, or None.
+    Keys: move (1-indexed), ply, source (win/block/book/cache/endgame/search), score, depth, seconds, nodes,
+    nodes_per_sec, cutoffs, tt_cutoffs, win_check_seconds, evaluate_seconds, other_seconds, profile.
+    Nodes searched by parallel workers are not included."""
+    return dict(LAST_MOVE_STATS) if LAST_MOVE_STATS is not None else None
+
+
+def _timed_is_win_at(self, col, player):
+    start = time.perf_counter()
+    result = _untimed_is_win_at(self, col, player)
+    _STAT_TIMERS['win_check'] += time.perf_counter() - start
+    return result
+
+
+def _timed_evaluate_position(pos):
+    start = time.perf_counter()
+    result = _untimed_evaluate_position(pos)
+    _STAT_TIMERS['evaluate'] += time.perf_counter() - start
+    return result
+
+
+def _instrumented_decide_move(pos, deadline, started, resume=None, cached=None):
+    """Runs decide_move with counters and timers switched on, stores the stats and returns its result."""
+    global LAST_MOVE_STATS, NODE_COUNT, evaluate_position
+    NODE_COUNT = 0
+    for name in SEARCH_COUNTERS:
+        SEARCH_COUNTERS[name] = 0
+    for name in _STAT_TIMERS:
+        _STAT_TIMERS[name] = 0.0
+    profiler = None
+    if PROFILE_SAMPLE_RATE and _PROFILE_RNG.random() < PROFILE_SAMPLE_RATE:
+        profiler = cProfile.Profile()
+    if STATS_ENABLED:
+        BitBoard.is_win_at = _timed_is_win_at
+        evaluate_position = _timed_evaluate_position
+    try:
+        if profiler is not None:
+            profiler.enable()
+        col, source, score, depth = decide_move(pos, deadline, resume, cached)
+    finally:
+        if profiler is not None:
+            profiler.disable()
+        BitBoard.is_win_at = _untimed_is_win_at
+        evaluate_position = _untimed_evaluate_position
+
+    profile_path = None
+    if profiler is not None:
+        profile_path = os.path.join(PROFILE_DIR, 'team6_move_%d_%d_%d.prof' % (os.getpid(), pos.num_moves,
+                                                                                 int(time.time() * 1000)))
+        profiler.dump_stats(profile_path)
+    if STATS_ENABLED:
+        seconds = time.perf_counter() - started
+        stats = {
+            'move': col + 1,
+            'ply': pos.num_moves,
+            'source': source,
+            'score': score if score is None or math.isfinite(score) else ('win' if score > 0 else 'loss'),
+            'depth': depth,
+            'seconds': round(seconds, 6),
+            'nodes': NODE_COUNT,
+            'nodes_per_sec': round(NODE_COUNT / seconds) if seconds > 0 else 0,
+            'cutoffs': SEARCH_COUNTERS['cutoffs'],
+            'tt_cutoffs': SEARCH_COUNTERS['tt_cutoffs'],
+            'win_check_seconds': round(_STAT_TIMERS['win_check'], 6),
+            'evaluate_seconds': round(_STAT_TIMERS['evaluate'], 6),
+            'other_seconds': round(seconds - _STAT_TIMERS['win_check'] - _STAT_TIMERS['evaluate'], 6),
+            'profile': profile_path,
+        }
+        if source == 'endgame' and ENDGAME_SOLVER is not None:
+            stats['nodes'] = ENDGAME_SOLVER.nodes
+        LAST_MOVE_STATS = stats
+        if STATS_LOG_PATH:
+            with open(STATS_LOG_PATH, 'a') as log:
+                log.write(json.dumps(stats) + '\n')
+    return col, source, score, depth
+
+
+# SERVICE MODE
+# tools/serve.py hosts the agent for many games at once from one asyncio process. What init_agent and
+# what_is_your_move keep in module globals for the one game the manager plays (symbols, board size, connect_n,
+# time budget, depth cap) is kept per game in a GameSession instead, and the searches run in a process pool
+# shared by all games (start_service_pool). A worker decides one batch of requests at a time, so it can set
+# the search globals for the request in hand; it keeps one transposition table per board geometry, reused by
+# every game it serves. Pondering and the position cache are not used in service mode.
+SERVICE_REPLY_MARGIN = 0.005  # seconds left between the end of a search and the request's deadline
+SERVICE_MIN_SEARCH_TIME = 0.01  # a request with less search time than this left is not started
+_SERVICE_TABLES = {}  # (rows, cols, connect_n) -> transposition table of this service worker
+_SERVICE_TT_SIZE_MB = TT_SIZE_MB
+
+
+class GameSession:
+    """Representation Logic: One game in service mode, with the settings init_agent takes for a game.
+    move_request turns the game's list board into the picklable request serve_moves decides."""
+    __slots__ = ('my_symbol', 'opp_symbol', 'rows', 'cols', 'connect_n', 'move_time', 'max_depth', 'moves')
+
+    def __init__(self, player_symbol, rows, cols, connect_n=4, move_time=None, max_depth=None):
+        if player_symbol not in ('X', 'O'):
+            raise ValueError('player symbol must be X or O, not %r' % (player_symbol,))
+        if not (1 <= rows and 1 <= cols and cols * (rows + 1) <= 128 and 2 <= connect_n <= max(rows, cols)):
+            raise ValueError('board %dx%d with %d in a row is not supported' % (rows, cols, connect_n))
+        self.my_symbol = player_symbol
+        self.opp_symbol = 'O' if player_symbol == 'X' else 'X'
+        self.rows = rows
+        self.cols = cols
+        self.connect_n = connect_n
+        self.move_time = MOVE_TIME_BUDGET if move_time is None else float(move_time)
+        self.max_depth = MAX_SEARCH_DEPTH if max_depth is None else int(max_depth)
+        self.moves = 0  # moves decided for this game so far
+
+    def move_request(self, board, deadline):
+        """Returns the serve_moves request for our move on board (a list board, row 0 the top), to be answered
+        by deadline (a perf_counter() value). Raises ValueError if the board does not fit the game, holds
+        other symbols, or the game on it is already over."""
+        rows, cols = self.rows, self.cols
+        if len(board) != rows or any(len(row) != cols for row in board):
+            raise ValueError('board is not %dx%d' % (rows, cols))
+        stride = rows + 1
+        mine = opp = 0
+        for c in range(cols):
+            for r in range(rows - 1, -1, -1):  # start from bottom row, as BitBoard.from_list
+                cell = board[r][c]
+                if cell == ' ':
+                    break
+                bit = 1 << (c * stride + rows - 1 - r)
+                if cell == self.my_symbol:
+                    mine |= bit
+                elif cell == self.opp_symbol:
+                    opp |= bit
+                else:
+                    raise ValueError('unknown symbol %r on the board' % (cell,))
+        if ((mine | opp).bit_count() == rows * cols or has_connection(mine, stride, self.connect_n)
+                or has_connection(opp, stride, self.connect_n)):
+            raise ValueError('the game on this board is over')
+        return rows, cols, self.connect_n, mine, opp, self.move_time, self.max_depth, deadline
+
+
+def start_service_pool(workers, tt_size_mb=TT_SIZE_MB, weights_path=None, book_path=None):
+    """Search Logic: Returns a new process pool for serve_moves; the caller owns it and shuts it down.
+    Each worker loads the evaluation weights and the opening book (default: WEIGHTS_PATH and BOOK_PATH) once."""
+    return concurrent.futures.ProcessPoolExecutor(
+        max_workers=workers, initializer=_init_service_worker,
+        initargs=(tt_size_mb, WEIGHTS_PATH if weights_path is None else weights_path,
+                  BOOK_PATH if book_path is None else book_path))
+
+
+def _init_service_worker(tt_size_mb, weights_path, book_path):
+    """Runs once in each service worker process."""
+    global _SERVICE_TT_SIZE_MB
+    _SERVICE_TT_SIZE_MB = tt_size_mb
+    load_weights(weights_path)
+    load_opening_book(book_path)
+
+
+def serve_moves(requests):
+    """Worker task: decides the moves of a batch of GameSession.move_request requests, one after another.
+    Returns one result per request: (col, source, score, depth, seconds) with a 1-indexed col, or None if
+    less than SERVICE_MIN_SEARCH_TIME was left before the request's deadline when its turn came. Every search
+    ends SERVICE_REPLY_MARGIN before the request's deadline, or after its session's move time, whichever
+    comes first."""
+    global TRANSPOSITION_TABLE, MAX_SEARCH_DEPTH
+    results = []
+    for rows, cols, connect_n, mine, opp, move_time, max_depth, deadline in requests:
+        started = time.perf_counter()
+        if started + SERVICE_MIN_SEARCH_TIME > deadline - SERVICE_REPLY_MARGIN:
+            results.append(None)
+            continue
+        geometry = (rows, cols, connect_n)
+        table = _SERVICE_TABLES.get(geometry)
+        if table is None:
+            prepare_geometry(rows, cols, connect_n)
+            table = _SERVICE_TABLES[geometry] = new_transposition_table(_SERVICE_TT_SIZE_MB)
+        TRANSPOSITION_TABLE = table
+        MAX_SEARCH_DEPTH = max_depth
+        pos = BitBoard.from_bits(rows, cols, mine, opp, connect_n)
+        table.new_search()
+        reset_move_ordering(cols)
+        search_deadline = min(started + move_time, deadline - SERVICE_REPLY_MARGIN)
+        col, source, score, depth = decide_move(pos, search_deadline)
+        results.append((col + 1, source, score, depth, time.perf_counter() - started))
+    return results
+
+
+def warm_up_service_worker(requests):
+    """Worker task: answers requests like serve_moves to build a worker's tables before the service takes
+    games, then forgets the search times it measured, since a cold worker's searches say little about how deep
+    the searches of real moves will get."""
+    results = serve_moves(requests)
+    SEARCH_DEPTH_TIMES.clear()
+    return results
+
+
+# FUNCTIONS REQUIRED BY THE connect_4_main.py MODULE
+def init_agent(player_symbol, board_num_rows, board_num_cols, board, tt_size_mb=TT_SIZE_MB, move_time=None,
+               workers=None, book_path=None, endgame_cells=None, ponder=None, connect_n=None, max_depth=None,
+               cache_path=None, weights_path=None):
+    """ Initializes the agent at the start of a game. This function could set up any necessary state.
+    Creates a fresh transposition table (capped at tt_size_mb) that is kept for the whole game,
+    so positions searched on one turn are reused on the next.
+    move_time sets the search time per move in seconds (default: TEAM6_MOVE_TIME env var, or 1 second).
+    workers > 1 searches the root moves in that many processes (default: TEAM6_WORKERS env var, or 1);
+    the pool is started here once and reused for every move and later games.
+    book_path selects the opening book file (default: TEAM6_BOOK env var, or Team6_opening_book.bin
+    next to this module); a missing file just disables the book.
+    endgame_cells sets how many empty cells remain when the exact endgame solver takes over
+    (default: TEAM6_ENDGAME_CELLS env var, or 20).
+    ponder=True starts the background thread that searches on the opponent's time
+    (default: TEAM6_PONDER env var, or off).
+    connect_n sets the number of pieces in a row that wins (default: TEAM6_CONNECT_N env var, or 4);
+    the window tables for the board size and connect_n are built here and cached for later games.
+    max_depth caps the search depth of every move (default: TEAM6_MAX_DEPTH env var, or no cap).
+    cache_path selects the SQLite file that keeps search results across games (default: TEAM6_CACHE env var,
+    or no cache); it is opened on the first lookup and kept open for later games.
+    weights_path selects the evaluation weights file (default: TEAM6_WEIGHTS env var, or Team6_weights.json
+    next to this module); a missing file keeps the default weights."""
+    # Set up global variables
+    global MY_SYMBOL, OPPONENT_SYMBOL, ROWS, COLS, TRANSPOSITION_TABLE, MOVE_TIME_BUDGET, SEARCH_WORKERS, BOOK_PATH
+    global ENDGAME_EMPTY_CELLS, PONDER_ENABLED, PONDERER, CONNECT_N, MAX_SEARCH_DEPTH, CACHE_PATH, WEIGHTS_PATH
+    stop_pondering(shutdown=True)  # a worker left over from an unfinished game
+    if workers is not None and int(workers) != SEARCH_WORKERS:
+        SEARCH_DEPTH_TIMES.clear()  # the search runs at another speed now; measure it again
+    if ponder is not None:
+        PONDER_ENABLED = bool(ponder)
+    if endgame_cells is not None:
+        ENDGAME_EMPTY_CELLS = int(endgame_cells)
+    if move_time is not None:
+        MOVE_TIME_BUDGET = float(move_time)
+    if max_depth is not None:
+        MAX_SEARCH_DEPTH = int(max_depth)
+    if workers is not None:
+        SEARCH_WORKERS = int(workers)
+    start_search_pool(SEARCH_WORKERS, tt_size_mb)
+    if book_path is not None:
+        BOOK_PATH = book_path
+    load_opening_book(BOOK_PATH)
+    if cache_path is not None:
+        CACHE_PATH = cache_path
+    load_position_cache(CACHE_PATH)
+    if weights_path is not None:
+        WEIGHTS_PATH = weights_path
+    load_weights(WEIGHTS_PATH)
+    MY_SYMBOL = player_symbol
+    OPPONENT_SYMBOL = 'O' if player_symbol == 'X' else 'X'
+    ROWS = int(board_num_rows)
+    COLS = int(board_num_cols)
+    if connect_n is not None:
+        CONNECT_N = int(connect_n)
+    prepare_geometry(ROWS, COLS, CONNECT_N)
+    TRANSPOSITION_TABLE = new_transposition_table(tt_size_mb)
+    if PONDER_ENABLED:
+        PONDERER = Ponderer()
+    return True
+
+
+def what_is_your_move(board, game_rows, game_cols, my_game_symbol):
+    """Contributors:
+    - Jaydev Patel (40%, core decision logic and rule-based checks)
+    - Phong Diep  (20%, win/block detection)
+    - Ziming Wang (15%, move ordering enhancements)
+    - Miguel Viray (25%, variable search depth)
+    Decide and return the next move (column number) for the agent.
+    Applies rule-based reasoning for immediate wins/blocks, then uses iterative deepening Alpha-Beta search
+    for the best move, going as deep as MOVE_TIME_BUDGET allows (see decide_move).
+    When search statistics are enabled the move's counters are recorded (see get_search_stats).
+    With a position cache a deep enough stored result is played as is, and the search's own result is queued
+    for the file.
+    With pondering on, the ponder search is stopped first and restarted on the position after our move.
+    Returns a column index in 1..game_cols (inclusive) to drop a disk."""
+    started = time.perf_counter()
+    deadline = started + MOVE_TIME_BUDGET
+    pondered = stop_pondering()
+    # Update global variables in case of a new game
+    global MY_SYMBOL, OPPONENT_SYMBOL, ROWS, COLS, TRANSPOSITION_TABLE
+    if TRANSPOSITION_TABLE is None or my_game_symbol != MY_SYMBOL:
+        TRANSPOSITION_TABLE = new_transposition_table()  # init_agent was not called for this game
+    MY_SYMBOL = my_game_symbol
+    OPPONENT_SYMBOL = 'O' if my_game_symbol == 'X' else 'X'
+    ROWS = int(game_rows)
+    COLS = int(game_cols)
+
+    # The search and the rule-based checks run on a BitBoard copy of the position,
+    # never on the list board
+    pos = BitBoard.from_list(board, MY_SYMBOL, OPPONENT_SYMBOL, CONNECT_N)
+    TRANSPOSITION_TABLE.new_search()
+    reset_move_ordering(COLS)
+
+    # Resume from the ponder search if the opponent played one of the pondered replies (it shares our
+    # transposition table); an earlier game's search of this position is used if that one went deeper
+    resume = pondered.get(tuple(pos.pieces))
+    cached = POSITION_CACHE.lookup(pos) if POSITION_CACHE is not None else None
+    if cached is not None and resume is not None and cached[2] <= resume[2]:
+        cached = None
+    if not STATS_ENABLED and not PROFILE_SAMPLE_RATE:
+        best_col, source, score, depth = decide_move(pos, deadline, resume, cached)
+    else:
+        best_col, source, score, depth = _instrumented_decide_move(pos, deadline, started, resume, cached)
+    if POSITION_CACHE is not None and source == 'search':
+        POSITION_CACHE.store(pos, best_col, score, depth)  # written to the file by connect_4_result
+
+    if PONDERER is not None:
+        pos.play(best_col, 0)
+        if not pos.is_win_at(best_col, 0) and pos.valid_moves():
+            PONDERER.start(pos)
+    return best_col + 1  # return as 1-indexed column number
+
+
+def decide_move(pos, deadline, resume=None, cached=None):
+    """Reasoning/Search Logic: Chooses a move for player 0 in the BitBoard pos.
+    Tries, in order: an immediate win, a block of the opponent's immediate win (both from threat_analysis,
+    which also keeps moves that lose at once out of the search), the opening book, cached (a (best_col,
+    best_score, depth) position cache result for pos), the exact endgame solver, and finally the iterative
+    deepening search until the deadline (continuing from resume, a ponder result for pos of the same form).
+    A book move is played only when its entry was searched deeper than the live search is expected to get
+    before the deadline (live_search_reach), a cached move when it was searched at least as deep or proven;
+    otherwise the position is searched, the cached move first.
+    Returns (col, source, score, depth) with a 0-indexed col; source names the stage that decided."""
+    # REASONING: Threat analysis, one pass for the immediate win, the forced block and the losing moves
+    outcome, cells, blocks = threat_analysis(pos, 0)
+    # If we can win in this move, do it immediately
+    if outcome > 0:
+        return cell_columns(cells, pos.stride)[0], 'win', math.inf, 1
+    # If the opponent can win next turn, block them by playing that column
+    if blocks:
+        return cell_columns(blocks, pos.stride)[0], 'block', None, 1
+
+    # Get all valid columns (without those threat analysis found losing) and order them for better pruning;
+    # a search from depth 1 is timed for live_search_reach
+    searched_from = time.perf_counter()
+    timings = {} if resume is None else None
+    valid_columns = cell_columns(cells, pos.stride) if outcome == 0 else pos.valid_moves()
+    ordered_columns = order_moves(pos, valid_columns) if valid_columns else []
+
+    # REASONING: Opening book lookup for positions solved offline, if searched deeper than we can search now
+    if cached is not None and cached[0] in ordered_columns:
+        ordered_columns.remove(cached[0])
+        ordered_columns.insert(0, cached[0])
+    else:
+        cached = None
+    reach = None
+    book_entry = OPENING_BOOK.lookup(pos) if OPENING_BOOK is not None else None
+    if book_entry is not None and pos.can_play(book_entry[0]) and ordered_columns:
+        reach, probe = live_search_reach(pos, ordered_columns, deadline, timings)
+        if book_entry[2] > reach:
+            return book_entry[0], 'book', book_entry[1] / 10, book_entry[2]
+        if resume is None:
+            resume = probe  # its times are in timings, so the main search's deeper ones continue them
+
+    # REASONING: Position cache lookup for positions searched in earlier games
+    if cached is not None:
+        if cached[1] == math.inf or cached[1] == -math.inf:
+            return cached[0], 'cache', cached[1], cached[2]
+        if reach is None:
+            reach, probe = live_search_reach(pos, ordered_columns, deadline, timings)
+            if resume is None:
+                resume = probe
+        if cached[2] >= reach:
+            return cached[0], 'cache', cached[1], cached[2]
+
+    # SEARCH: Solve the game exactly when few empty cells remain
+    empty_cells = pos.rows * pos.cols - pos.num_moves
+    if empty_cells <= ENDGAME_EMPTY_CELLS:
+        # leave half of the remaining time for the heuristic search in case the solver cannot finish
+        now = time.perf_counter()
+        solved = solve_endgame(pos, now + (deadline - now) / 2)
+        if solved is not None:
+            return solved[0], 'endgame', solved[1], empty_cells
+
+    # SEARCH: Use Minimax (Alpha-Beta) to choose the best move if no immediate win/block is found
+    if valid_columns:
+        # Deepen one ply at a time until the time budget is used up (or MAX_SEARCH_DEPTH is reached)
+        best_col, best_score, depth = iterative_deepening(pos, ordered_columns, deadline, max_depth=MAX_SEARCH_DEPTH,
+                                                          resume=resume, timings=timings)
+        if timings:
+            record_search_times(pos, timings, searched_from)
+        if best_col is not None:
+            return best_col, 'search', best_score, depth
+
+    # If for some reason no move was chosen (shouldn't happen with valid columns),
+    # pick the center column or a random valid column
+    center_col = pos.cols // 2
+    if pos.can_play(center_col):
+        return center_col, 'fallback', None, 0
+    return (random.choice(valid_columns) if valid_columns else 0), 'fallback', None, 0
+
+
+def connect_4_result(board, winner, looser):
+    """The Connect 4 manager calls this function when the game is over.
+    If there is a winner, the team name of the winner and looser are the
+    values of the respective argument variables. If there is a draw/tie,
+    the values of winner = looser = 'Draw'."""
+    # Stop searching on the opponent's time; the game is over
+    stop_pondering(shutdown=True)
+    # Write this game's search results to the position cache in one go
+    if POSITION_CACHE is not None:
+        POSITION_CACHE.flush()
+
+    # Check if a draw
+    if winner == "Draw":
+        print(">>> I am player TEAM1 <<<")
+        print(">>> The game resulted in a draw. <<<\n")
+        return True
+
+    print(">>> I am player TEAM1 <<<")
+    print("The winner is " + winner)
+    if winner == "Team1":
+        print("YEAH!!  :-)")
+    else:
+        print("BOO HOO HOO  :~(")
+    print("The looser is " + looser)
+    print()
+
+    return True
+
+
+#####
+# MAKE SURE MODULE IS IMPORTED
+if __name__ == "__main__":
+    print("Team6_Connect_4_Agent.py is intended to be imported and not executed.")
+else:
+    print("Team6_Connect_4_Agent.py has been imported.")
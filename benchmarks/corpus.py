@@ -0,0 +1,39 @@
+"""The checked-in position corpus (benchmarks/positions.json) shared by the benchmarks.
+
+Each position is a dict with id, kind (opening/midgame/endgame), rows, cols, connect_n and moves, a string of
+1-indexed columns played alternately so that player 0 (the agent) is to move at the end; positions with a
+known game-theoretic value also carry value and best_moves (see suite.py).
+"""
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import Team6_Connect_4_Agent as agent
+
+CORPUS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'positions.json')
+KINDS = ('opening', 'midgame', 'endgame')
+
+
+def load_corpus(path=CORPUS_PATH, kind=None):
+    """Returns the corpus positions (dicts), only those of the given kind if one is given."""
+    with open(path) as f:
+        positions = json.load(f)['positions']
+    return [p for p in positions if kind is None or p['kind'] == kind]
+
+
+def build_position(moves, rows, cols, connect_n):
+    """Plays the move sequence, alternating players, so that player 0 is to move at the end."""
+    pos = agent.BitBoard(rows, cols, connect_n)
+    player = len(moves) % 2  # the last move must be the opponent's
+    for ch in moves:
+        pos.play(int(ch) - 1, player)
+        player ^= 1
+    return pos
+
+
+def corpus_position(position):
+    """Returns the BitBoard of a corpus position and sets the agent's CONNECT_N for it, which the evaluation
+    of list boards reads."""
+    agent.CONNECT_N = position['connect_n']
+    return build_position(position['moves'], position['rows'], position['cols'], position['connect_n'])
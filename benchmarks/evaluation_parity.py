@@ -0,0 +1,118 @@
+"""Parity check of Team6_Connect_4_Agent's evaluations: the list-board evaluate_board, the window scan
+scan_evaluate_position, the incremental evaluate_position (running totals kept by BitBoard.play/undo) and, when
+NumPy is installed, the batch evaluate_boards.
+
+Random games are played on several board sizes, taking moves back now and then so the totals go through undo
+as well as play. At every position scan_evaluate_position must give exactly evaluate_position's score, and
+evaluate_boards (all positions of a board size in one call) exactly evaluate_board's. evaluate_position and
+evaluate_board differ by the float rounding of the diagonal weight only, which evaluate_board applies window by
+window and evaluate_position once to the exact diagonal total; they must agree within TOLERANCE (relative to
+the score), and the largest difference seen is reported. The positions are checked with the default weights
+and with --weight-sets random weight sets (window and center weights rounded to WEIGHT_QUANTUM as
+set_evaluation_weights does, any diagonal weight), or with the weights of --weights only. Exits with status 1
+on any mismatch.
+
+Usage: python benchmarks/evaluation_parity.py [--positions 2000] [--weight-sets 3] [--weights file] [--seed 0]
+"""
+import argparse
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import Team6_Connect_4_Agent as agent
+
+# (rows, cols, connect_n) of the games; even widths have two center columns
+GEOMETRIES = [(6, 7, 4), (6, 6, 4), (7, 9, 4), (8, 8, 4), (7, 9, 5)]
+TOLERANCE = 1e-12  # largest relative difference allowed between evaluate_position and evaluate_board
+
+
+def random_weights(rng):
+    """A random weight set with the signs of the defaults."""
+    return (rng.uniform(50, 200), rng.uniform(1, 20), rng.uniform(0.1, 5), -rng.uniform(20, 200),
+            rng.uniform(0, 6), rng.uniform(0.5, 2))
+
+
+def check_positions(count, rng):
+    """Evaluates count positions of random games with the current weights; returns (positions, mismatches,
+    largest difference between evaluate_position and evaluate_board)."""
+    mismatches = checked = 0
+    largest = 0.0
+    batches = {}  # (rows, cols, connect_n) -> [(list board, evaluate_board score)] for evaluate_boards
+    while checked < count:
+        rows, cols, connect_n = rng.choice(GEOMETRIES)
+        agent.CONNECT_N = connect_n  # evaluate_board reads the global
+        pos = agent.BitBoard(rows, cols, connect_n)
+        history = []
+        player = 0
+        while checked < count and pos.valid_moves():
+            if history and rng.random() < 0.2:
+                col, player = history.pop()
+                pos.undo(col, player)
+            else:
+                col = rng.choice(pos.valid_moves())
+                pos.play(col, player)
+                history.append((col, player))
+                if pos.is_win_at(col, player):
+                    break
+                player ^= 1
+            incremental = agent.evaluate_position(pos)
+            scanned = agent.scan_evaluate_position(pos)
+            board = pos.to_list('X', 'O')
+            listed = agent.evaluate_board(board, 'X', 'O')
+            batches.setdefault((rows, cols, connect_n), []).append((board, listed))
+            checked += 1
+            difference = abs(incremental - listed)
+            largest = max(largest, difference)
+            if incremental != scanned or difference > TOLERANCE * max(1.0, abs(listed)):
+                mismatches += 1
+                if mismatches <= 5:
+                    print('  MISMATCH %dx%d/%d %s: incremental %r, scan %r, evaluate_board %r'
+                          % (rows, cols, connect_n, ''.join(str(c + 1) for c, _ in history), incremental, scanned,
+                             listed))
+    if agent.np is not None:
+        for (rows, cols, connect_n), boards in batches.items():
+            batched = agent.evaluate_boards(agent.boards_to_array([board for board, _ in boards], 'X', 'O'),
+                                            connect_n)
+            for (board, listed), score in zip(boards, batched.tolist()):
+                if score != listed:
+                    mismatches += 1
+                    if mismatches <= 5:
+                        print('  MISMATCH %dx%d/%d: evaluate_boards %r, evaluate_board %r'
+                              % (rows, cols, connect_n, score, listed))
+    return checked, mismatches, largest
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--positions', type=int, default=2000, help='positions per weight set')
+    parser.add_argument('--weight-sets', type=int, default=3, help='random weight sets after the defaults')
+    parser.add_argument('--weights', help='check only the weights of this weights file')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    if args.weights and not os.path.exists(args.weights):
+        print('no weights file at %s' % args.weights)
+        return 2
+
+    rng = random.Random(args.seed)
+    if args.weights:
+        weight_sets = [agent.load_weights(args.weights)]
+    else:
+        weight_sets = [agent.DEFAULT_WEIGHTS] + [random_weights(rng) for _ in range(args.weight_sets)]
+    connect_n = agent.CONNECT_N
+    total = 0
+    for weights in weight_sets:
+        weights = agent.set_evaluation_weights(weights)
+        checked, mismatches, largest = check_positions(args.positions, rng)
+        total += mismatches
+        print('weights %s: %d positions, %d mismatches, evaluate_board off by at most %.3g'
+              % (', '.join('%g' % w for w in weights), checked, mismatches, largest))
+    if agent.np is None:
+        print('NumPy is not installed; evaluate_boards was not checked')
+    agent.CONNECT_N = connect_n
+    agent.load_weights(agent.WEIGHTS_PATH)
+    return 1 if total else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,100 @@
+"""Cost of Team6_Connect_4_Agent's tables, evaluation and search on each board geometry the league plays.
+
+For every (rows, cols, N) it reports the number of windows, the time prepare_geometry takes to build the
+tables the first time and when they are already cached, the time of one list-board evaluate_board call
+and of one BitBoard play + undo (which keeps the incremental evaluation up to date), and the nodes and
+nodes/sec of a fixed-depth iterative deepening search from the empty board.
+
+Usage: python benchmarks/geometry.py [--depth 7]
+"""
+import argparse
+import math
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import Team6_Connect_4_Agent as agent
+
+# (rows, cols, pieces in a row)
+GEOMETRIES = [
+    (6, 7, 4),
+    (7, 9, 4),
+    (8, 8, 4),
+    (7, 9, 5),
+]
+
+
+def random_board(rows, cols, connect_n, plies, rng):
+    """Returns a BitBoard after up to `plies` random moves, stopping early if someone wins."""
+    pos = agent.BitBoard(rows, cols, connect_n)
+    player = 0
+    for _ in range(plies):
+        moves = pos.valid_moves()
+        if not moves:
+            break
+        col = rng.choice(moves)
+        pos.play(col, player)
+        if pos.is_win_at(col, player):
+            break
+        player ^= 1
+    return pos
+
+
+def per_call(func, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) / repeat
+
+
+def bench(rows, cols, connect_n, depth):
+    start = time.perf_counter()
+    agent.prepare_geometry(rows, cols, connect_n)
+    cold = time.perf_counter() - start
+    start = time.perf_counter()
+    agent.prepare_geometry(rows, cols, connect_n)
+    warm = time.perf_counter() - start
+    straight, diagonal = agent.board_window_tables(rows, cols, connect_n)
+
+    agent.CONNECT_N = connect_n
+    pos = random_board(rows, cols, connect_n, rows * cols // 3, random.Random(rows * 100 + cols * 10 + connect_n))
+    board = pos.to_list('X', 'O')
+    evaluate = per_call(lambda: agent.evaluate_board(board, 'X', 'O'), 200)
+    col = pos.valid_moves()[0]
+
+    def play_undo():
+        pos.play(col, 0)
+        pos.undo(col, 0)
+    play = per_call(play_undo, 20000)
+
+    empty = agent.BitBoard(rows, cols, connect_n)
+    agent.TRANSPOSITION_TABLE = agent.new_transposition_table()
+    agent.reset_move_ordering(cols)
+    order = sorted(empty.valid_moves(), key=lambda c: abs(c - cols // 2))
+    agent.NODE_COUNT = 0
+    start = time.perf_counter()
+    agent.iterative_deepening(empty, order, math.inf, max_depth=depth)
+    seconds = time.perf_counter() - start
+    agent.CONNECT_N = 4
+    return (len(straight) + len(diagonal), cold, warm, evaluate, play, agent.NODE_COUNT, seconds)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--depth', type=int, default=7)
+    args = parser.parse_args()
+
+    print('%-10s %8s %10s %10s %10s %10s %10s %8s %10s' % ('geometry', 'windows', 'tables', 'cached', 'eval_board',
+                                                           'play+undo', 'nodes', 'time', 'nodes/s'))
+    for rows, cols, connect_n in GEOMETRIES:
+        windows, cold, warm, evaluate, play, nodes, seconds = bench(rows, cols, connect_n, args.depth)
+        print('%-10s %8d %8.2fms %8.3fms %8.1fus %8.2fus %10d %7.2fs %10d'
+              % ('%dx%d/%d' % (rows, cols, connect_n), windows, cold * 1e3, warm * 1e3, evaluate * 1e6, play * 1e6,
+                 nodes, seconds, nodes / seconds))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,218 @@
+"""Load test for the service mode of Team6_Connect_4_Agent (tools/serve.py).
+
+For each concurrency level, plays that many games at once against the service for --duration seconds, one
+connection per game: the service plays one side (X in even games, O in odd ones), the client plays random legal
+moves for the other and starts a new game whenever one ends. Reports moves per second and the latency of move
+requests (from sending to the reply) at p50, p90, p99 and max, plus how many requests were refused as
+overloaded or answered "deadline exceeded". Exits 1 if the service breaks the protocol or plays an illegal move.
+
+The service is started on a free port with --workers processes unless --server points at a running one.
+
+Usage: python benchmarks/load_test.py [--levels 1 10 50 100 500] [--duration 10] [--move-time 0.05] \\
+           [--deadline-ms 1000] [--workers 4] [--server 127.0.0.1:7406] [--output results.json]
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import random
+import signal
+import subprocess
+import sys
+import time
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+import Team6_Connect_4_Agent as agent
+
+SYMBOLS = ('X', 'O')
+
+
+class ProtocolError(Exception):
+    pass
+
+
+class Level:
+    """What the games of one concurrency level saw."""
+
+    def __init__(self):
+        self.latencies = []
+        self.overloaded = 0
+        self.expired = 0
+        self.games = 0
+
+
+async def request(reader, writer, message):
+    writer.write(json.dumps(message).encode() + b'\n')
+    await writer.drain()
+    line = await reader.readline()
+    if not line:
+        raise ProtocolError('connection closed by the service')
+    reply = json.loads(line)
+    if reply.get('id') != message.get('id'):
+        raise ProtocolError('reply %r does not answer request %r' % (reply.get('id'), message.get('id')))
+    return reply
+
+
+async def play_games(address, number, args, stop_at, level):
+    """Plays games on one connection until stop_at; the service plays X in even-numbered games."""
+    rng = random.Random(args.seed * 1000003 + number)
+    rows, cols, connect_n = args.rows, args.cols, args.connect_n
+    stride = rows + 1
+    reader, writer = await asyncio.open_connection(*address)
+    ids = itertools.count(1)
+    played = 0
+    try:
+        while time.perf_counter() < stop_at:
+            service_seat = (number + played) % 2
+            reply = await request(reader, writer, {
+                'op': 'new_game', 'id': next(ids), 'symbol': SYMBOLS[service_seat], 'rows': rows, 'cols': cols,
+                'connect_n': connect_n, 'move_time': args.move_time})
+            if not reply.get('ok'):
+                raise ProtocolError('new_game failed: %s' % reply.get('error'))
+            game = reply['game']
+            board = [[' '] * cols for _ in range(rows)]
+            heights = [0] * cols
+            pieces = [0, 0]
+            seat = 0
+            while time.perf_counter() < stop_at:
+                if seat == service_seat:
+                    message = {'op': 'move', 'id': next(ids), 'game': game, 'board': board,
+                               'deadline_ms': args.deadline_ms}
+                    sent = time.perf_counter()
+                    reply = await request(reader, writer, message)
+                    if not reply.get('ok'):
+                        if reply.get('error') == 'overloaded':
+                            level.overloaded += 1
+                        elif reply.get('error') == 'deadline exceeded':
+                            level.expired += 1
+                        else:
+                            raise ProtocolError('move failed: %s' % reply.get('error'))
+                        await asyncio.sleep(0.01 + 0.04 * rng.random())  # back off and ask again
+                        continue
+                    if time.perf_counter() < stop_at:
+                        level.latencies.append(time.perf_counter() - sent)
+                    col = reply['move'] - 1
+                    if not (0 <= col < cols and heights[col] < rows):
+                        raise ProtocolError('illegal move %r' % reply['move'])
+                else:
+                    col = rng.choice([c for c in range(cols) if heights[c] < rows])
+                pieces[seat] |= 1 << (col * stride + heights[col])
+                board[rows - 1 - heights[col]][col] = SYMBOLS[seat]
+                heights[col] += 1
+                if agent.has_connection(pieces[seat], stride, connect_n) or sum(heights) == rows * cols:
+                    break
+                seat ^= 1
+            await request(reader, writer, {'op': 'end_game', 'id': next(ids), 'game': game})
+            played += 1
+            level.games += 1
+    finally:
+        writer.close()
+
+
+async def run_level(address, games, args):
+    level = Level()
+    start = time.perf_counter()
+    stop_at = start + args.duration
+    await asyncio.gather(*(play_games(address, number, args, stop_at, level) for number in range(games)))
+    return level, min(time.perf_counter(), stop_at) - start
+
+
+def percentile(values, p):
+    return values[min(len(values) - 1, int(p * len(values)))] * 1000 if values else float('nan')
+
+
+def start_server(args):
+    """Starts tools/serve.py on a free port, in a process group of its own with its workers; returns
+    (process, (host, port))."""
+    command = [sys.executable, os.path.join(REPO_DIR, 'tools', 'serve.py'), '--port', '0',
+               '--workers', str(args.workers), '--max-pending', str(args.max_pending)]
+    server = subprocess.Popen(command, stdout=subprocess.PIPE, text=True, start_new_session=True)
+    for line in server.stdout:  # the agent prints a line of its own on import
+        if line.startswith('serving on '):
+            break
+    else:
+        stop_server(server)
+        raise RuntimeError('the service did not start')
+    host, port = line.split()[2].rsplit(':', 1)
+    return server, (host, int(port))
+
+
+def stop_server(server, timeout=10):
+    """Asks the service to stop (it shuts its pool down on SIGTERM), waits for it, then kills whatever is left
+    of its process group, so no worker outlives it holding the output pipe."""
+    server.terminate()
+    try:
+        server.wait(timeout)
+    except subprocess.TimeoutExpired:
+        pass
+    try:
+        os.killpg(server.pid, signal.SIGKILL)
+    except ProcessLookupError:
+        pass  # the whole group is gone already
+    server.wait()
+    server.stdout.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--levels', type=int, nargs='+', default=[1, 10, 50, 100, 500], help='concurrent games')
+    parser.add_argument('--duration', type=float, default=10.0, help='seconds per level')
+    parser.add_argument('--move-time', type=float, default=0.05, help='search time per move of every game')
+    parser.add_argument('--deadline-ms', type=float, default=1000.0, help='deadline of every move request')
+    parser.add_argument('--rows', type=int, default=6)
+    parser.add_argument('--cols', type=int, default=7)
+    parser.add_argument('--connect-n', type=int, default=4)
+    parser.add_argument('--server', help='host:port of a running service (default: start one)')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='workers of a started service')
+    parser.add_argument('--max-pending', type=int, default=1000, help='--max-pending of a started service')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='write the results to this JSON file')
+    args = parser.parse_args()
+
+    server = None
+    if args.server:
+        host, port = args.server.rsplit(':', 1)
+        address = (host, int(port))
+    else:
+        server, address = start_server(args)
+    print('service at %s:%d, move time %.3fs, deadline %.0fms'
+          % (address + (args.move_time, args.deadline_ms)))
+    print('%6s %10s %9s %9s %9s %9s %8s %11s %8s'
+          % ('games', 'moves/s', 'p50 ms', 'p90 ms', 'p99 ms', 'max ms', 'played', 'overloaded', 'expired'))
+    results = []
+    status = 0
+    try:
+        for games in args.levels:
+            try:
+                level, elapsed = asyncio.run(run_level(address, games, args))
+            except (ProtocolError, ValueError) as exc:
+                print('%6d  protocol error: %s' % (games, exc))
+                status = 1
+                break
+            latencies = sorted(level.latencies)
+            row = {'games': games, 'moves_per_second': len(latencies) / elapsed,
+                   'p50_ms': percentile(latencies, 0.5), 'p90_ms': percentile(latencies, 0.9),
+                   'p99_ms': percentile(latencies, 0.99), 'max_ms': percentile(latencies, 1.0),
+                   'moves': len(latencies), 'games_played': level.games, 'overloaded': level.overloaded,
+                   'expired': level.expired}
+            results.append(row)
+            print('%6d %10.1f %9.1f %9.1f %9.1f %9.1f %8d %11d %8d'
+                  % (games, row['moves_per_second'], row['p50_ms'], row['p90_ms'], row['p99_ms'], row['max_ms'],
+                     level.games, level.overloaded, level.expired))
+    finally:
+        if server is not None:
+            stop_server(server)
+    if args.output:
+        meta = {'move_time': args.move_time, 'deadline_ms': args.deadline_ms, 'duration': args.duration,
+                'geometry': [args.rows, args.cols, args.connect_n], 'cpu_count': os.cpu_count(),
+                'workers': None if args.server else args.workers}
+        with open(args.output, 'w') as f:
+            json.dump({'meta': meta, 'levels': results}, f, indent=1)
+            f.write('\n')
+    return status
+
+
+if __name__ == '__main__':
+    sys.exit(main())
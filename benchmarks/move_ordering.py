@@ -0,0 +1,56 @@
+"""Node counts and effective branching factor of Team6_Connect_4_Agent's search with and without
+the in-tree move ordering (MOVE_ORDERING: table move, wins, blocks, killers, history).
+
+Each corpus position (benchmarks/positions.json, or those of --kind) is searched from a fresh transposition
+table by iterative deepening to a fixed depth. The effective branching factor is nodes ** (1 / depth).
+
+Usage: python benchmarks/move_ordering.py [--depth 8] [--kind opening]
+"""
+import argparse
+import math
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import Team6_Connect_4_Agent as agent
+from corpus import KINDS, corpus_position, load_corpus
+
+
+def search(position, depth, ordering):
+    """Returns (nodes, seconds, best column) for one fixed-depth search."""
+    agent.MOVE_ORDERING = ordering
+    agent.TRANSPOSITION_TABLE = agent.new_transposition_table()
+    pos = corpus_position(position)
+    agent.reset_move_ordering(pos.cols)
+    order = sorted(pos.valid_moves(), key=lambda c: abs(c - pos.cols // 2))
+    agent.NODE_COUNT = 0
+    start = time.perf_counter()
+    col, _, _ = agent.iterative_deepening(pos, order, math.inf, max_depth=depth)
+    return agent.NODE_COUNT, time.perf_counter() - start, col + 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--depth', type=int, default=8)
+    parser.add_argument('--kind', choices=KINDS, help='only search these positions')
+    args = parser.parse_args()
+
+    print('%-12s %12s %6s %8s   %12s %6s %8s' % ('position', 'nodes(off)', 'ebf', 'time', 'nodes(on)', 'ebf', 'time'))
+    totals = {False: [0, 0.0], True: [0, 0.0]}
+    for position in load_corpus(kind=args.kind):
+        row = []
+        for ordering in (False, True):
+            nodes, seconds, _ = search(position, args.depth, ordering)
+            totals[ordering][0] += nodes
+            totals[ordering][1] += seconds
+            row.extend([nodes, nodes ** (1.0 / args.depth), seconds])
+        print('%-12s %12d %6.2f %7.2fs   %12d %6.2f %7.2fs' % tuple([position['id']] + row))
+    off, on = totals[False], totals[True]
+    print('%-12s %12d %6s %7.2fs   %12d %6s %7.2fs' % ('total', off[0], '', off[1], on[0], '', on[1]))
+    print('nodes reduced %.1fx, time reduced %.1fx' % (off[0] / on[0], off[1] / on[1]))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,83 @@
+"""Parity check and speed comparison of Team6_Connect_4_Agent's two search backends: the pure-Python
+alpha_beta_search and the compiled core (native/_team6_core.c, built with tools/build_native.py).
+
+Each corpus position (benchmarks/positions.json, or those of --kind) is searched from a fresh transposition
+table by iterative deepening to a fixed depth, once per backend. The backends must agree on the move, the score
+and the number of nodes; nodes/sec are reported for both. --weights searches with the evaluation weights of a
+weights file instead of the defaults. Exits with status 1 on any mismatch and 2 if the compiled core is not
+built.
+
+Usage: python benchmarks/native_parity.py [--depth 7] [--kind endgame] [--python-only] \\
+           [--weights Team6_weights.json]
+"""
+import argparse
+import math
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import Team6_Connect_4_Agent as agent
+from corpus import KINDS, corpus_position, load_corpus
+
+
+def search(backend, position, depth):
+    """Returns (best column, score, nodes, seconds) for one fixed-depth search with the given backend."""
+    agent.use_search_backend(backend)
+    agent.TRANSPOSITION_TABLE = agent.new_transposition_table()
+    pos = corpus_position(position)
+    agent.reset_move_ordering(pos.cols)
+    order = sorted(pos.valid_moves(), key=lambda c: abs(c - pos.cols // 2))
+    agent.NODE_COUNT = 0
+    start = time.perf_counter()
+    col, score, _ = agent.iterative_deepening(pos, order, math.inf, max_depth=depth)
+    return col, score, agent.NODE_COUNT, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--depth', type=int, default=7)
+    parser.add_argument('--kind', choices=KINDS, help='only search these positions')
+    parser.add_argument('--python-only', action='store_true', help='only report the Python backend')
+    parser.add_argument('--weights', help='evaluation weights file (default: the default weights)')
+    args = parser.parse_args()
+    if args.weights and not os.path.exists(args.weights):
+        print('no weights file at %s' % args.weights)
+        return 2
+    agent.load_weights(args.weights)
+    backends = ['python'] if args.python_only else ['python', 'native']
+    if 'native' in backends and agent.native_core is None:
+        print('the compiled core is not built; run python tools/build_native.py (or pass --python-only)')
+        return 2
+
+    print('%-8s %-30s %4s %10s %12s %12s   %s' % ('kind', 'position', 'move', 'score', 'nodes', 'py nodes/s',
+                                                 'native nodes/s  speedup' if len(backends) > 1 else ''))
+    mismatches = 0
+    totals = {backend: [0, 0.0] for backend in backends}
+    for position in load_corpus(kind=args.kind):
+        results = {backend: search(backend, position, args.depth) for backend in backends}
+        for backend, (_, _, nodes, seconds) in results.items():
+            totals[backend][0] += nodes
+            totals[backend][1] += seconds
+        col, score, nodes, seconds = results['python']
+        line = '%-8s %-30s %4d %10s %12d %12d' % (position['kind'], position['moves'] or '(empty)', col + 1,
+                                                  '%.1f' % score, nodes, nodes / seconds)
+        if 'native' in results:
+            native_col, native_score, native_nodes, native_seconds = results['native']
+            line += '   %12d %7.1fx' % (native_nodes / native_seconds, seconds / native_seconds)
+            if (native_col, native_score, native_nodes) != (col, score, nodes):
+                mismatches += 1
+                line += '   MISMATCH: native move %d score %s nodes %d' % (native_col + 1, native_score, native_nodes)
+        print(line)
+    agent.use_search_backend('native' if agent.native_core is not None else 'python')
+
+    for backend in backends:
+        nodes, seconds = totals[backend]
+        print('%-7s total %d nodes in %.2fs, %d nodes/s' % (backend, nodes, seconds, nodes / seconds))
+    if len(backends) > 1:
+        print('speedup %.1fx, %d mismatches' % (totals['python'][1] / totals['native'][1], mismatches))
+    return 1 if mismatches else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,82 @@
+"""Benchmark for the parallel root search of Team6_Connect_4_Agent.
+
+Searches the corpus openings (benchmarks/positions.json; --kind picks other positions) by iterative deepening to
+a fixed depth, first in-process (the sequential search the agent runs without a pool, which is the baseline) and
+then with 2, 4 and 8 worker processes scoring the root moves. Reports the wall time and the speedup over the
+sequential search for each worker count, and whether each worker count picks the same moves as the sequential
+search. Pool start-up is not timed.
+
+Usage: python benchmarks/parallel_search.py [--depth 8] [--workers 2 4 8] [--kind opening]
+"""
+import argparse
+import math
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import Team6_Connect_4_Agent as agent
+from corpus import KINDS, corpus_position, load_corpus
+
+
+def search(pos, depth, parallel):
+    """One iterative deepening search of pos to depth; returns (seconds, 1-indexed move)."""
+    agent.reset_move_ordering(pos.cols)
+    order = sorted(pos.valid_moves(), key=lambda c: abs(c - pos.cols // 2))
+    start = time.perf_counter()
+    col, _, _ = agent.iterative_deepening(pos, order, math.inf, max_depth=depth, parallel=parallel)
+    return time.perf_counter() - start, col + 1
+
+
+def run_sequential(positions, depth, tt_size_mb):
+    """Searches every position in this process, each from a fresh table; returns (seconds, chosen moves)."""
+    elapsed = 0.0
+    moves = []
+    for position in positions:
+        agent.TRANSPOSITION_TABLE = agent.new_transposition_table(tt_size_mb)
+        seconds, move = search(corpus_position(position), depth, parallel=False)
+        elapsed += seconds
+        moves.append(move)
+    return elapsed, moves
+
+
+def run_parallel(positions, workers, depth, tt_size_mb):
+    """Searches every position with a pool of `workers` processes; returns (seconds, chosen moves)."""
+    agent.start_search_pool(workers, tt_size_mb)
+    # make sure the workers are up before timing
+    list(agent.SEARCH_POOL.map(abs, range(workers)))
+    elapsed = 0.0
+    moves = []
+    for position in positions:
+        seconds, move = search(corpus_position(position), depth, parallel=True)
+        elapsed += seconds
+        moves.append(move)
+    agent.shutdown_search_pool()
+    return elapsed, moves
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--depth', type=int, default=8)
+    parser.add_argument('--workers', type=int, nargs='+', default=[2, 4, 8])
+    parser.add_argument('--tt-size-mb', type=float, default=agent.TT_SIZE_MB)
+    parser.add_argument('--kind', choices=KINDS, default='opening', help='corpus positions to search')
+    args = parser.parse_args()
+
+    positions = load_corpus(kind=args.kind)
+    print('cpu count: %s, depth: %d, positions: %d, backend: %s'
+          % (os.cpu_count(), args.depth, len(positions), agent.SEARCH_BACKEND))
+    base_time, base_moves = run_sequential(positions, args.depth, args.tt_size_mb)
+    print('sequential: %8.2fs  moves %s' % (base_time, ''.join(map(str, base_moves))))
+    for workers in args.workers:
+        if workers < 2:
+            print('%2d workers: the sequential search (start_search_pool runs no pool)' % workers)
+            continue
+        elapsed, moves = run_parallel(positions, workers, args.depth, args.tt_size_mb)
+        same = 'same moves' if moves == base_moves else 'DIFFERENT MOVES %s' % ''.join(map(str, moves))
+        print('%2d workers: %8.2fs  speedup %5.2fx  %s' % (workers, elapsed, base_time / elapsed, same))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
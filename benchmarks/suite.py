@@ -0,0 +1,238 @@
+"""Benchmark suite for Team6_Connect_4_Agent on the checked-in position corpus (benchmarks/positions.json).
+
+The corpus holds openings, tactical midgames and endgames on the 6x7 board plus openings on the other
+league geometries, as 1-indexed move sequences with player 0 (the agent) to move at the end. Positions
+with a known game-theoretic value (win/draw/loss for the side to move) list in best_moves every move
+that keeps that value; they come from the exact endgame solver, and for the empty 6x7 board from theory.
+
+Every position is run in two modes, each from a fresh transposition table:
+  search  alpha_beta_search at exactly --depth on every root move (search_root)
+  move    what_is_your_move with MAX_SEARCH_DEPTH = --depth and no time limit, so the win/block checks,
+          the endgame solver and iterative deepening run as in a game (opening book and position cache off)
+Each run records wall time, nodes, nodes/sec, the peak memory Python allocates during the run (measured
+with tracemalloc in a second, untimed run; the table allocated beforehand is not included) and whether
+the move is one of the known best moves.
+
+The results are written as JSON (to --output, or stdout). With --baseline they are compared with an
+earlier results file: the run fails (exit status 1) if the total nodes of a mode grew by more than
+--threshold, its total time by more than --time-threshold, or fewer moves agree with the best moves.
+Node counts are deterministic for a given backend, depth and set of evaluation weights (the agent's weights
+file, see load_weights), so they compare across machines; times only on the same machine. Baselines run
+with another depth, backend, weights or --kind are refused (exit status 2).
+
+Usage: python benchmarks/suite.py [--depth 10] [--kind endgame] [--output new.json] [--baseline old.json]
+                                  [--threshold 0.05] [--time-threshold 0.25] [--no-memory]
+"""
+import argparse
+import gc
+import json
+import math
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+import Team6_Connect_4_Agent as agent
+from corpus import KINDS, build_position, corpus_position, load_corpus
+
+MODES = ('search', 'move')
+
+
+def clear_search_state():
+    """Forgets what earlier positions left behind (history scores, the endgame solver's table), which the
+    agent keeps on purpose between moves and games, so every run starts the same way."""
+    agent.HISTORY_SCORES = None
+    if agent.native_core is not None:
+        agent.NATIVE_STATE = agent.native_core.SearchState()
+    agent.ENDGAME_SOLVER = None
+
+
+def prepare_search(position, depth):
+    """Sets up a fixed-depth alpha_beta_search of every root move; returns the run, which gives (move, nodes)."""
+    clear_search_state()
+    agent.TRANSPOSITION_TABLE = agent.new_transposition_table()
+    pos = corpus_position(position)
+    agent.reset_move_ordering(pos.cols)
+    order = sorted(pos.valid_moves(), key=lambda c: abs(c - pos.cols // 2))
+    depth = min(depth, pos.rows * pos.cols - pos.num_moves)
+
+    def run():
+        agent.NODE_COUNT = 0
+        col, _, _ = agent.search_root(pos, depth, order)
+        return col, agent.NODE_COUNT
+    return run
+
+
+def prepare_move(position, depth):
+    """Starts a game in the position with what_is_your_move capped at depth; returns the run, which gives
+    (move, nodes). Nodes include the endgame solver's."""
+    clear_search_state()
+    rows, cols = position['rows'], position['cols']
+    board = build_position(position['moves'], rows, cols, position['connect_n']).to_list('X', 'O')
+    agent.init_agent('X', rows, cols, board, move_time=math.inf, workers=1, book_path='', ponder=False,
+                     connect_n=position['connect_n'], max_depth=depth, cache_path='')
+
+    def run():
+        agent.NODE_COUNT = 0
+        col = agent.what_is_your_move(board, rows, cols, 'X') - 1
+        return col, agent.NODE_COUNT + (agent.ENDGAME_SOLVER.nodes if agent.ENDGAME_SOLVER is not None else 0)
+    return run
+
+
+def measure(prepare, position, depth, memory):
+    """Runs one mode on one position and returns its result record. Only the run is timed and traced,
+    not the setup (transposition table allocation, init_agent)."""
+    run = prepare(position, depth)
+    gc.collect()
+    start = time.perf_counter()
+    col, nodes = run()
+    seconds = time.perf_counter() - start
+    peak = None
+    if memory:
+        run = prepare(position, depth)
+        gc.collect()
+        tracemalloc.start()
+        run()
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    best = position.get('best_moves')
+    return {
+        'id': position['id'],
+        'kind': position['kind'],
+        'move': col + 1,
+        'best_moves': best,
+        'agrees': None if best is None else col + 1 in best,
+        'seconds': round(seconds, 6),
+        'nodes': nodes,
+        'nodes_per_sec': round(nodes / seconds) if seconds > 0 else 0,
+        'peak_kib': None if peak is None else round(peak / 1024, 1),
+    }
+
+
+def summarize(results):
+    """Totals per mode: positions, nodes, seconds, nodes/sec, largest peak and best-move agreement."""
+    summary = {}
+    for mode, records in results.items():
+        nodes = sum(r['nodes'] for r in records)
+        seconds = sum(r['seconds'] for r in records)
+        peaks = [r['peak_kib'] for r in records if r['peak_kib'] is not None]
+        known = [r for r in records if r['agrees'] is not None]
+        summary[mode] = {
+            'positions': len(records),
+            'nodes': nodes,
+            'seconds': round(seconds, 6),
+            'nodes_per_sec': round(nodes / seconds) if seconds > 0 else 0,
+            'max_peak_kib': max(peaks) if peaks else None,
+            'agreement': sum(r['agrees'] for r in known),
+            'known': len(known),
+        }
+    return summary
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(report, baseline, threshold, time_threshold):
+    """Returns a list of regression messages of report against baseline (empty if none)."""
+    regressions = []
+    for mode, new in report['summary'].items():
+        old = baseline['summary'].get(mode)
+        if old is None:
+            continue
+        if old['nodes'] and new['nodes'] > old['nodes'] * (1 + threshold):
+            regressions.append('%s: nodes %d -> %d (+%.1f%%)' % (mode, old['nodes'], new['nodes'],
+                                                                 100 * (new['nodes'] / old['nodes'] - 1)))
+        if old['seconds'] and new['seconds'] > old['seconds'] * (1 + time_threshold):
+            regressions.append('%s: time %.2fs -> %.2fs (+%.1f%%)' % (mode, old['seconds'], new['seconds'],
+                                                                      100 * (new['seconds'] / old['seconds'] - 1)))
+        if new['agreement'] < old['agreement']:
+            regressions.append('%s: best-move agreement %d/%d -> %d/%d' % (mode, old['agreement'], old['known'],
+                                                                          new['agreement'], new['known']))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--depth', type=int, default=10)
+    parser.add_argument('--kind', choices=KINDS, help='only run these positions')
+    parser.add_argument('--output', help='write the JSON results here instead of stdout')
+    parser.add_argument('--baseline', help='JSON results of an earlier run to compare with')
+    parser.add_argument('--threshold', type=float, default=0.05, help='allowed growth of total nodes (fraction)')
+    parser.add_argument('--time-threshold', type=float, default=0.25, help='allowed growth of total time (fraction)')
+    parser.add_argument('--no-memory', action='store_true', help='skip the traced runs that measure peak memory')
+    args = parser.parse_args()
+
+    weights = list(agent.load_weights(agent.WEIGHTS_PATH))
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        meta = baseline['meta']
+        if ((meta['depth'], meta['backend'], meta['kind'], meta.get('weights', weights))
+                != (args.depth, agent.SEARCH_BACKEND, args.kind, weights)):
+            print('baseline was run at depth %s with the %s backend and weights %s on %s positions; this run differs'
+                  % (meta['depth'], meta['backend'], meta.get('weights', weights), meta['kind'] or 'all'),
+                  file=sys.stderr)
+            return 2
+
+    setups = {'search': prepare_search, 'move': prepare_move}
+    results = {mode: [] for mode in MODES}
+    for position in load_corpus(kind=args.kind):
+        for mode in MODES:
+            record = measure(setups[mode], position, args.depth, not args.no_memory)
+            results[mode].append(record)
+            print('%-6s %-12s move %2d %-6s %10d nodes %8.3fs %9d nodes/s %10s KiB'
+                  % (mode, record['id'], record['move'],
+                     '' if record['agrees'] is None else ('ok' if record['agrees'] else 'MISS'),
+                     record['nodes'], record['seconds'], record['nodes_per_sec'],
+                     '-' if record['peak_kib'] is None else record['peak_kib']), file=sys.stderr)
+    agent.stop_pondering(shutdown=True)
+    agent.shutdown_search_pool()
+
+    report = {
+        'meta': {
+            'commit': git_commit(),
+            'date': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'depth': args.depth,
+            'backend': agent.SEARCH_BACKEND,
+            'kind': args.kind,
+            'endgame_cells': agent.ENDGAME_EMPTY_CELLS,
+            'weights': weights,
+            'python': platform.python_version(),
+            'machine': platform.machine(),
+        },
+        'summary': summarize(results),
+        'results': results,
+    }
+    text = json.dumps(report, indent=1)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text + '\n')
+    else:
+        print(text)
+    for mode, totals in report['summary'].items():
+        print('%-6s total %d nodes in %.2fs, %d nodes/s, best move %d/%d' % (
+            mode, totals['nodes'], totals['seconds'], totals['nodes_per_sec'], totals['agreement'],
+            totals['known']), file=sys.stderr)
+
+    if baseline is not None:
+        regressions = compare(report, baseline, args.threshold, args.time_threshold)
+        for message in regressions:
+            print('REGRESSION ' + message, file=sys.stderr)
+        if regressions:
+            return 1
+        print('no regression against %s' % args.baseline, file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,110 @@
+"""Node counts of Team6_Connect_4_Agent's search with and without mirror symmetry (SYMMETRY: canonical
+transposition table keys and pruning of mirrored root moves on symmetric positions), plus a check that
+moves come back un-mirrored.
+
+Each corpus position (benchmarks/positions.json, or those of --kind) is searched from a fresh transposition
+table by iterative deepening to a fixed depth; on the symmetric ones (the empty board and 44) the root is
+pruned as well. The check searches random positions and their mirror images with a shared table, so the mirror image
+is answered from entries stored for the original; the best moves must be mirror images of each other
+(or both tied with the center) and the scores equal up to float rounding.
+The script exits with status 1 if the check fails.
+
+Usage: python benchmarks/symmetry.py [--depth 8] [--checks 50] [--kind opening]
+"""
+import argparse
+import math
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import Team6_Connect_4_Agent as agent
+from corpus import KINDS, corpus_position, load_corpus
+
+
+def search(pos, depth):
+    """Returns (nodes, seconds, best column, score) for one fixed-depth search with the current table."""
+    agent.reset_move_ordering(pos.cols)
+    order = sorted(pos.valid_moves(), key=lambda c: abs(c - pos.cols // 2))
+    agent.NODE_COUNT = 0
+    start = time.perf_counter()
+    col, score, _ = agent.iterative_deepening(pos, order, math.inf, max_depth=depth)
+    return agent.NODE_COUNT, time.perf_counter() - start, col, score
+
+
+def random_position(rng, plies, rows=6, cols=7):
+    """Returns a random undecided position with player 0 to move, or None if the game ended on the way."""
+    pos = agent.BitBoard(rows, cols)
+    player = plies % 2
+    for _ in range(plies):
+        col = rng.choice(pos.valid_moves())
+        pos.play(col, player)
+        if pos.is_win_at(col, player):
+            return None
+        player ^= 1
+    return pos
+
+
+def mirror_check(depth, count, seed=1):
+    """Searches count random positions and their mirror images; returns the number of mismatches."""
+    agent.SYMMETRY = True
+    agent.TT_EXACT_DEPTH_ONLY = True  # the scores must not depend on deeper entries left by the first search
+    rng = random.Random(seed)
+    failures = checked = 0
+    while checked < count:
+        pos = random_position(rng, rng.randrange(2, 16, 2))
+        if pos is None or pos.is_symmetric():
+            continue
+        mirror = agent.BitBoard.from_bits(pos.rows, pos.cols, agent.mirror_bits(pos.pieces[0], pos.rows, pos.cols),
+                                          agent.mirror_bits(pos.pieces[1], pos.rows, pos.cols))
+        if pos.canonical_hash()[0] != mirror.canonical_hash()[0]:
+            failures += 1
+            print('canonical keys differ for', pos.to_list('X', 'O'))
+            continue
+        agent.TRANSPOSITION_TABLE = agent.new_transposition_table()
+        _, _, col, score = search(pos, depth)
+        # searched again, this time reading the entries written for pos through the mirrored key
+        _, _, mirror_col, mirror_score = search(mirror, depth)
+        center = pos.cols // 2
+        expected = pos.cols - 1 - col
+        tied_with_center = abs(mirror_col - center) == abs(col - center)
+        if not math.isclose(score, mirror_score) or (mirror_col != expected and not tied_with_center):
+            failures += 1
+            print('mismatch: col %d score %s, mirror col %d (expected %d) score %s'
+                  % (col, score, mirror_col, expected, mirror_score))
+        checked += 1
+    agent.TT_EXACT_DEPTH_ONLY = False
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--depth', type=int, default=8)
+    parser.add_argument('--checks', type=int, default=50, help='random positions for the un-mirroring check')
+    parser.add_argument('--kind', choices=KINDS, help='only search these positions')
+    args = parser.parse_args()
+
+    print('%-12s %12s %8s   %12s %8s' % ('position', 'nodes(off)', 'time', 'nodes(on)', 'time'))
+    totals = {False: [0, 0.0], True: [0, 0.0]}
+    for position in load_corpus(kind=args.kind):
+        row = []
+        for symmetry in (False, True):
+            agent.SYMMETRY = symmetry
+            agent.TRANSPOSITION_TABLE = agent.new_transposition_table()
+            nodes, seconds, _, _ = search(corpus_position(position), args.depth)
+            totals[symmetry][0] += nodes
+            totals[symmetry][1] += seconds
+            row.extend([nodes, seconds])
+        print('%-12s %12d %7.2fs   %12d %7.2fs' % tuple([position['id']] + row))
+    off, on = totals[False], totals[True]
+    print('%-12s %12d %7.2fs   %12d %7.2fs' % ('total', off[0], off[1], on[0], on[1]))
+    print('nodes reduced %.1fx, time reduced %.1fx' % (off[0] / on[0], off[1] / on[1]))
+
+    failures = mirror_check(min(args.depth, 6), args.checks)
+    print('un-mirroring check: %d/%d positions mismatched' % (failures, args.checks))
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
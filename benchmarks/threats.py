@@ -0,0 +1,134 @@
+"""Node counts and times of Team6_Connect_4_Agent's search with and without threat analysis (THREAT_ANALYSIS:
+threat_analysis at the interior nodes with at least THREAT_MIN_DEPTH plies left), plus a check that its
+verdicts agree with the exact solver.
+
+Each corpus position (benchmarks/positions.json) is searched from a fresh transposition table by iterative
+deepening to a fixed depth, with the analysis off and with each of --min-depths as THREAT_MIN_DEPTH, on both
+search backends (the compiled one when built). Fewer nodes only pay off if the time goes down too, and the
+analysis costs the Python backend relatively more per node, so the times of both decide THREAT_MIN_DEPTH.
+The check runs threat_analysis on random 6x7 positions with few enough empty cells for the endgame solver:
+every forced win or loss it reports, and every move it leaves out, must be confirmed by the solver. The
+script exits with status 1 if the check fails.
+
+Usage: python benchmarks/threats.py [--depth 10] [--min-depths 1 2 3 4 5] [--repeat 3] [--checks 300] \\
+           [--python-only]
+"""
+import argparse
+import math
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import Team6_Connect_4_Agent as agent
+from corpus import KINDS, corpus_position, load_corpus
+
+
+def search(position, depth):
+    """Returns (nodes, seconds, best column, score) for one fixed-depth search from a fresh table and empty
+    killer and history tables, so no search depends on the ones before it."""
+    agent.TRANSPOSITION_TABLE = agent.new_transposition_table()
+    agent.HISTORY_SCORES = None
+    if agent.native_core is not None:
+        agent.NATIVE_STATE = agent.native_core.SearchState()
+    pos = corpus_position(position)
+    agent.reset_move_ordering(pos.cols)
+    order = sorted(pos.valid_moves(), key=lambda c: abs(c - pos.cols // 2))
+    agent.NODE_COUNT = 0
+    start = time.perf_counter()
+    col, score, _ = agent.iterative_deepening(pos, order, math.inf, max_depth=depth)
+    return agent.NODE_COUNT, time.perf_counter() - start, col, score
+
+
+def random_position(rng, plies):
+    """Returns a random undecided 6x7 position with player 0 to move, or None if the game ended on the way."""
+    pos = agent.BitBoard(6, 7)
+    player = plies % 2
+    for _ in range(plies):
+        col = rng.choice(pos.valid_moves())
+        pos.play(col, player)
+        if pos.is_win_at(col, player):
+            return None
+        player ^= 1
+    return pos
+
+
+def solver_check(count, seed=1):
+    """Compares threat_analysis with the endgame solver on count random positions; returns the failures."""
+    solver = agent.EndgameSolver(6, 7)
+    rng = random.Random(seed)
+    failures = checked = 0
+    while checked < count:
+        pos = random_position(rng, rng.randrange(22, 36))
+        if pos is None or not pos.valid_moves():
+            continue
+        checked += 1
+        outcome, cells, _ = agent.threat_analysis(pos, 0)
+        _, score = solver.best_move(pos)
+        if outcome and (score > 0) != (outcome > 0):
+            failures += 1
+            print('outcome %d but solver score %d for %s' % (outcome, score, pos.to_list('X', 'O')))
+            continue
+        if outcome:
+            continue
+        column = (1 << pos.stride) - 1
+        for col in pos.valid_moves():
+            if cells >> (col * pos.stride) & column:
+                continue
+            pos.play(col, 0)
+            reply = agent.BitBoard.from_bits(6, 7, pos.pieces[1], pos.pieces[0])
+            pos.undo(col, 0)
+            if solver.best_move(reply)[1] <= 0:
+                failures += 1
+                print('move %d left out but it does not lose in %s' % (col + 1, pos.to_list('X', 'O')))
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--depth', type=int, default=10)
+    parser.add_argument('--min-depths', type=int, nargs='+', default=[1, 2, 3, 4, 5],
+                        help='THREAT_MIN_DEPTH values to compare with the analysis off')
+    parser.add_argument('--checks', type=int, default=300, help='random positions for the solver check')
+    parser.add_argument('--python-only', action='store_true', help='only time the Python backend')
+    parser.add_argument('--repeat', type=int, default=3, help='searches per position; the fastest one is timed')
+    args = parser.parse_args()
+
+    backends = ['python'] if args.python_only or agent.native_core is None else ['python', 'native']
+    corpus = load_corpus()
+    min_depth = agent.THREAT_MIN_DEPTH
+    print('%-7s %-9s' % ('backend', 'analysis') + ''.join(' %12s %8s' % (kind, 'time') for kind in KINDS)
+          + '   %12s %8s' % ('total', 'time'))
+    for backend in backends:
+        agent.use_search_backend(backend)
+        baseline = None
+        for setting in [None] + args.min_depths:
+            agent.THREAT_ANALYSIS = setting is not None
+            agent.THREAT_MIN_DEPTH = setting or min_depth
+            totals = {kind: [0, 0.0] for kind in KINDS}
+            for position in corpus:
+                runs = [search(position, args.depth) for _ in range(args.repeat)]
+                nodes, seconds = runs[0][0], min(run[1] for run in runs)
+                totals[position['kind']][0] += nodes
+                totals[position['kind']][1] += seconds
+            nodes = sum(totals[kind][0] for kind in KINDS)
+            seconds = sum(totals[kind][1] for kind in KINDS)
+            if baseline is None:
+                baseline = (nodes, seconds)
+            label = 'off' if setting is None else 'depth>=%d' % setting
+            print('%-7s %-9s' % (backend, label) + ''.join(' %12d %7.2fs' % tuple(totals[kind]) for kind in KINDS)
+                  + '   %12d %7.2fs  nodes %.2fx, time %.2fx of off%s'
+                  % (nodes, seconds, nodes / baseline[0], seconds / baseline[1],
+                     '  (default)' if setting == min_depth else ''))
+    agent.use_search_backend('native' if agent.native_core is not None else 'python')
+    agent.THREAT_ANALYSIS = True
+    agent.THREAT_MIN_DEPTH = min_depth
+    agent.CONNECT_N = 4
+
+    failures = solver_check(args.checks)
+    print('solver check: %d failures on %d positions' % (failures, args.checks))
+    return 1 if failures else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,1089 @@
+/*
+ * _team6_core: optional compiled search core for Team6_Connect_4_Agent.py.
+ *
+ * A C port of alpha_beta_search and everything it calls (BitBoard play/undo with the incremental
+ * evaluation, is_win_at, winning_cells, threat_analysis, order_search_moves, record_cutoff and the
+ * transposition table).
+ * It follows the Python code step by step, so for the same position, depth, window, table contents and
+ * killer/history tables it visits the same nodes and returns the same score. The agent selects it at
+ * import time when the built module sits next to it (see tools/build_native.py).
+ *
+ * Types:
+ *   Geometry     per-(rows, cols, N) tables copied from the Python caches (Zobrist keys, window ids, ...)
+ *   Table        transposition table with TranspositionTable's interface and replacement rule
+ *   SearchState  killer moves, history scores and the abort flag of one agent module
+ * Function:
+ *   search(geometry, table, state, mine, opp, depth, alpha, beta, maximizing, deadline, nodes, check_mask,
+ *          move_ordering, symmetry, exact_depth_only, threat_min_depth)
+ *          -> (score or None on timeout, nodes, cutoffs, tt_cutoffs)
+ *
+ * Bitboards are unsigned 128-bit integers, so boards up to 128 bits (cols * (rows + 1)) are supported.
+ * The search runs without the GIL.
+ *
+ * ABI_VERSION must equal NATIVE_ABI_VERSION in Team6_Connect_4_Agent.py, which ignores a build with another
+ * version. Bump both whenever the arguments of search or Geometry, or the search itself, change.
+ */
+#define PY_SSIZE_T_CLEAN
+#include <Python.h>
+#include <math.h>
+#include <setjmp.h>
+#include <stdint.h>
+#include <stdlib.h>
+#include <string.h>
+#include <time.h>
+
+typedef unsigned __int128 bits_t;
+
+#define CORE_ABI_VERSION 2
+#define MAX_BITS 128
+#define MAX_COLS 64
+#define MAX_PLIES 129
+#define MAX_KILLERS 2
+#define NO_PARTNER (-2)
+
+enum { EXACT = 0, LOWER_BOUND = 1, UPPER_BOUND = 2 };
+
+static inline bits_t shl(bits_t x, int k) { return k >= MAX_BITS ? 0 : x << k; }
+static inline bits_t shr(bits_t x, int k) { return k >= MAX_BITS ? 0 : x >> k; }
+
+static int bits_from_long(PyObject *value, bits_t *out)
+{
+    PyObject *sixty_four, *high_obj;
+    unsigned long long low, high;
+
+    if (!PyLong_Check(value)) {
+        PyErr_SetString(PyExc_TypeError, "bitboard must be an int");
+        return -1;
+    }
+    low = PyLong_AsUnsignedLongLongMask(value);
+    if (low == (unsigned long long)-1 && PyErr_Occurred())
+        return -1;
+    sixty_four = PyLong_FromLong(64);
+    if (sixty_four == NULL)
+        return -1;
+    high_obj = PyNumber_Rshift(value, sixty_four);
+    Py_DECREF(sixty_four);
+    if (high_obj == NULL)
+        return -1;
+    high = PyLong_AsUnsignedLongLongMask(high_obj);
+    Py_DECREF(high_obj);
+    if (high == (unsigned long long)-1 && PyErr_Occurred())
+        return -1;
+    *out = ((bits_t)high << 64) | (bits_t)low;
+    return 0;
+}
+
+static double perf_counter(void)
+{
+    /* time.perf_counter() reads CLOCK_MONOTONIC on Linux, so deadlines can be passed straight through */
+    struct timespec ts;
+    clock_gettime(CLOCK_MONOTONIC, &ts);
+    return (double)ts.tv_sec + (double)ts.tv_nsec * 1e-9;
+}
+
+
+/* ---------------------------------------------------------------- Geometry */
+
+typedef struct {
+    PyObject_HEAD
+    int rows, cols, connect_n, stride, num_bits, code_base, num_windows, num_values;
+    bits_t bottom, board_mask, column;
+    bits_t follow_lower, follow_upper;  /* follow_up_masks */
+    uint64_t zobrist[2][MAX_BITS];
+    uint64_t mirror_zobrist[2][MAX_BITS];
+    uint64_t side_key;
+    int straight_start[MAX_BITS + 1];  /* window ids of bit i: straight_ids[straight_start[i]:straight_start[i+1]] */
+    int diag_start[MAX_BITS + 1];
+    int *straight_ids;
+    int *diag_ids;
+    int center_partner[MAX_COLS];      /* NO_PARTNER, -1 (single center column) or the other center column */
+    double *window_values;
+    double center_weight, diagonal_weight;  /* CENTER_WEIGHT, DIAGONAL_WEIGHT */
+} Geometry;
+
+static int read_keys(PyObject *keys, uint64_t table[2][MAX_BITS], int num_bits)
+{
+    for (int player = 0; player < 2; player++) {
+        PyObject *row = PySequence_GetItem(keys, player);
+        if (row == NULL)
+            return -1;
+        for (int i = 0; i < num_bits; i++) {
+            PyObject *item = PySequence_GetItem(row, i);
+            if (item == NULL) {
+                Py_DECREF(row);
+                return -1;
+            }
+            table[player][i] = PyLong_AsUnsignedLongLong(item);
+            Py_DECREF(item);
+            if (PyErr_Occurred()) {
+                Py_DECREF(row);
+                return -1;
+            }
+        }
+        Py_DECREF(row);
+    }
+    return 0;
+}
+
+static int read_cell_windows(PyObject *cells, int num_bits, int *start, int **ids)
+{
+    Py_ssize_t total = 0;
+    for (int i = 0; i < num_bits; i++) {
+        PyObject *windows = PySequence_GetItem(cells, i);
+        if (windows == NULL)
+            return -1;
+        total += PySequence_Size(windows);
+        Py_DECREF(windows);
+    }
+    *ids = PyMem_Malloc(sizeof(int) * (total > 0 ? total : 1));
+    if (*ids == NULL) {
+        PyErr_NoMemory();
+        return -1;
+    }
+    Py_ssize_t at = 0;
+    for (int i = 0; i < num_bits; i++) {
+        PyObject *windows = PySequence_GetItem(cells, i);
+        if (windows == NULL)
+            return -1;
+        start[i] = (int)at;
+        Py_ssize_t count = PySequence_Size(windows);
+        for (Py_ssize_t k = 0; k < count; k++) {
+            PyObject *item = PySequence_GetItem(windows, k);
+            if (item == NULL) {
+                Py_DECREF(windows);
+                return -1;
+            }
+            (*ids)[at++] = (int)PyLong_AsLong(item);
+            Py_DECREF(item);
+        }
+        Py_DECREF(windows);
+        if (PyErr_Occurred())
+            return -1;
+    }
+    start[num_bits] = (int)at;
+    return 0;
+}
+
+static int Geometry_init(Geometry *self, PyObject *args, PyObject *kwds)
+{
+    int rows, cols, connect_n, num_windows;
+    PyObject *zobrist, *mirror_zobrist, *side_key, *cell_straight, *cell_diag, *center_partner, *values;
+    double center_weight, diagonal_weight;
+
+    if (!PyArg_ParseTuple(args, "iiiOOOOOiOOdd", &rows, &cols, &connect_n, &zobrist, &mirror_zobrist, &side_key,
+                          &cell_straight, &cell_diag, &num_windows, &center_partner, &values, &center_weight,
+                          &diagonal_weight))
+        return -1;
+    if (rows < 1 || cols < 1 || cols > MAX_COLS || cols * (rows + 1) > MAX_BITS || rows * cols >= MAX_PLIES
+        || connect_n < 2 || (connect_n + 1) * (connect_n + 1) > 256) {
+        PyErr_SetString(PyExc_ValueError, "board geometry not supported by the compiled core");
+        return -1;
+    }
+    self->rows = rows;
+    self->cols = cols;
+    self->connect_n = connect_n;
+    self->stride = rows + 1;
+    self->num_bits = cols * self->stride;
+    self->code_base = connect_n + 1;
+    self->num_windows = num_windows;
+    self->center_weight = center_weight;
+    self->diagonal_weight = diagonal_weight;
+    self->bottom = 0;
+    for (int c = 0; c < cols; c++)
+        self->bottom |= (bits_t)1 << (c * self->stride);
+    self->board_mask = self->bottom * ((((bits_t)1) << rows) - 1);
+    self->column = (((bits_t)1) << self->stride) - 1;
+    self->follow_lower = self->follow_upper = 0;
+    for (int c = 0; c < cols; c++)
+        for (int r = 0; r < rows; r++) {
+            if (r % 2 == rows % 2)
+                self->follow_lower |= (bits_t)1 << (c * self->stride + r);
+            else
+                self->follow_upper |= (bits_t)1 << (c * self->stride + r);
+        }
+
+    if (read_keys(zobrist, self->zobrist, self->num_bits) < 0
+        || read_keys(mirror_zobrist, self->mirror_zobrist, self->num_bits) < 0)
+        return -1;
+    self->side_key = PyLong_AsUnsignedLongLong(side_key);
+    if (PyErr_Occurred())
+        return -1;
+    if (read_cell_windows(cell_straight, self->num_bits, self->straight_start, &self->straight_ids) < 0
+        || read_cell_windows(cell_diag, self->num_bits, self->diag_start, &self->diag_ids) < 0)
+        return -1;
+
+    for (int c = 0; c < cols; c++) {
+        PyObject *item = PySequence_GetItem(center_partner, c);
+        if (item == NULL)
+            return -1;
+        self->center_partner[c] = item == Py_None ? NO_PARTNER : (int)PyLong_AsLong(item);
+        Py_DECREF(item);
+        if (PyErr_Occurred())
+            return -1;
+    }
+
+    Py_ssize_t num_values = PySequence_Size(values);
+    if (num_values < self->code_base * self->code_base) {
+        PyErr_SetString(PyExc_ValueError, "window_values is too short");
+        return -1;
+    }
+    self->num_values = (int)num_values;
+    self->window_values = PyMem_Malloc(sizeof(double) * num_values);
+    if (self->window_values == NULL) {
+        PyErr_NoMemory();
+        return -1;
+    }
+    for (Py_ssize_t i = 0; i < num_values; i++) {
+        PyObject *item = PySequence_GetItem(values, i);
+        if (item == NULL)
+            return -1;
+        self->window_values[i] = PyFloat_AsDouble(item);
+        Py_DECREF(item);
+        if (PyErr_Occurred())
+            return -1;
+    }
+    return 0;
+}
+
+static void Geometry_dealloc(Geometry *self)
+{
+    PyMem_Free(self->straight_ids);
+    PyMem_Free(self->diag_ids);
+    PyMem_Free(self->window_values);
+    Py_TYPE(self)->tp_free((PyObject *)self);
+}
+
+static PyTypeObject GeometryType = {
+    PyVarObject_HEAD_INIT(NULL, 0)
+    .tp_name = "_team6_core.Geometry",
+    .tp_doc = "Geometry(rows, cols, connect_n, zobrist, mirror_zobrist, side_key, cell_straight, cell_diag, "
+              "num_windows, center_partner, window_values, center_weight, diagonal_weight): per-geometry tables for "
+              "search().",
+    .tp_basicsize = sizeof(Geometry),
+    .tp_flags = Py_TPFLAGS_DEFAULT,
+    .tp_new = PyType_GenericNew,
+    .tp_init = (initproc)Geometry_init,
+    .tp_dealloc = (destructor)Geometry_dealloc,
+};
+
+
+/* ---------------------------------------------------------------- Table */
+
+typedef struct {
+    uint64_t key;
+    double score;
+    long generation;
+    int32_t depth;
+    int8_t bound;
+    int8_t best_move;
+    int8_t used;
+} Entry;
+
+typedef struct {
+    PyObject_HEAD
+    Py_ssize_t size;
+    long generation;
+    Entry *entries;
+} Table;
+
+static int Table_init(Table *self, PyObject *args, PyObject *kwds)
+{
+    Py_ssize_t size;
+    if (!PyArg_ParseTuple(args, "n", &size))
+        return -1;
+    if (size < 1)
+        size = 1;
+    PyMem_Free(self->entries);
+    self->entries = PyMem_Calloc(size, sizeof(Entry));
+    if (self->entries == NULL) {
+        PyErr_NoMemory();
+        return -1;
+    }
+    self->size = size;
+    self->generation = 0;
+    return 0;
+}
+
+static void Table_dealloc(Table *self)
+{
+    PyMem_Free(self->entries);
+    Py_TYPE(self)->tp_free((PyObject *)self);
+}
+
+static inline void table_store(Table *t, uint64_t key, int depth, double score, int bound, int best_move)
+{
+    Entry *e = &t->entries[key % (uint64_t)t->size];
+    if (!e->used || depth >= e->depth || e->generation != t->generation) {
+        e->key = key;
+        e->depth = depth;
+        e->score = score;
+        e->bound = (int8_t)bound;
+        e->best_move = (int8_t)best_move;
+        e->generation = t->generation;
+        e->used = 1;
+    }
+}
+
+static PyObject *Table_new_search(Table *self, PyObject *unused)
+{
+    self->generation++;
+    Py_RETURN_NONE;
+}
+
+static PyObject *Table_clear(Table *self, PyObject *unused)
+{
+    memset(self->entries, 0, sizeof(Entry) * self->size);
+    self->generation = 0;
+    Py_RETURN_NONE;
+}
+
+static PyObject *Table_probe(Table *self, PyObject *arg)
+{
+    uint64_t key = PyLong_AsUnsignedLongLong(arg);
+    if (PyErr_Occurred())
+        return NULL;
+    Entry *e = &self->entries[key % (uint64_t)self->size];
+    if (!e->used || e->key != key)
+        Py_RETURN_NONE;
+    return Py_BuildValue("(Kidiil)", (unsigned long long)e->key, (int)e->depth, e->score, (int)e->bound,
+                         (int)e->best_move, e->generation);
+}
+
+static PyObject *Table_store(Table *self, PyObject *args)
+{
+    unsigned long long key;
+    int depth, bound, best_move;
+    double score;
+    if (!PyArg_ParseTuple(args, "Kidii", &key, &depth, &score, &bound, &best_move))
+        return NULL;
+    table_store(self, key, depth, score, bound, best_move);
+    Py_RETURN_NONE;
+}
+
+static PyObject *Table_get_size(Table *self, void *closure) { return PyLong_FromSsize_t(self->size); }
+static PyObject *Table_get_generation(Table *self, void *closure) { return PyLong_FromLong(self->generation); }
+
+static PyMethodDef Table_methods[] = {
+    {"new_search", (PyCFunction)Table_new_search, METH_NOARGS,
+     "Marks the entries written so far as old, so the next search may overwrite them."},
+    {"clear", (PyCFunction)Table_clear, METH_NOARGS, "Empties the table."},
+    {"probe", (PyCFunction)Table_probe, METH_O,
+     "Returns the entry (key, depth, score, bound, best_move, generation) stored for key, or None."},
+    {"store", (PyCFunction)Table_store, METH_VARARGS, "store(key, depth, score, bound, best_move)"},
+    {NULL}
+};
+
+static PyGetSetDef Table_getset[] = {
+    {"size", (getter)Table_get_size, NULL, "number of slots", NULL},
+    {"generation", (getter)Table_get_generation, NULL, "current search generation", NULL},
+    {NULL}
+};
+
+static PyTypeObject TableType = {
+    PyVarObject_HEAD_INIT(NULL, 0)
+    .tp_name = "_team6_core.Table",
+    .tp_doc = "Table(slots): transposition table with the same slots and replacement rule as TranspositionTable.",
+    .tp_basicsize = sizeof(Table),
+    .tp_flags = Py_TPFLAGS_DEFAULT,
+    .tp_new = PyType_GenericNew,
+    .tp_init = (initproc)Table_init,
+    .tp_dealloc = (destructor)Table_dealloc,
+    .tp_methods = Table_methods,
+    .tp_getset = Table_getset,
+};
+
+
+/* ---------------------------------------------------------------- SearchState */
+
+typedef struct {
+    PyObject_HEAD
+    int killers[MAX_PLIES][MAX_KILLERS];
+    int killer_count[MAX_PLIES];
+    long long history[2][MAX_COLS];
+    int history_cols;                  /* 0 until the first reset, like HISTORY_SCORES = None */
+    volatile int aborted;
+} SearchState;
+
+static PyObject *SearchState_reset(SearchState *self, PyObject *arg)
+{
+    /* reset_move_ordering: clear the killers, halve the history (or start it for a new width) */
+    int cols = (int)PyLong_AsLong(arg);
+    if (PyErr_Occurred())
+        return NULL;
+    if (cols < 1 || cols > MAX_COLS) {
+        PyErr_SetString(PyExc_ValueError, "cols out of range");
+        return NULL;
+    }
+    memset(self->killer_count, 0, sizeof(self->killer_count));
+    if (self->history_cols != cols) {
+        memset(self->history, 0, sizeof(self->history));
+        self->history_cols = cols;
+    } else {
+        for (int p = 0; p < 2; p++)
+            for (int c = 0; c < cols; c++)
+                self->history[p][c] /= 2;  /* scores are never negative, so this is Python's // */
+    }
+    Py_RETURN_NONE;
+}
+
+static PyObject *SearchState_abort(SearchState *self, PyObject *arg)
+{
+    int flag = PyObject_IsTrue(arg);
+    if (flag < 0)
+        return NULL;
+    self->aborted = flag;
+    Py_RETURN_NONE;
+}
+
+static PyMethodDef SearchState_methods[] = {
+    {"reset", (PyCFunction)SearchState_reset, METH_O,
+     "reset(cols): clears the killer moves and halves the history scores (reset_move_ordering)."},
+    {"abort", (PyCFunction)SearchState_abort, METH_O,
+     "abort(flag): while set, a running search stops at its next clock check (SEARCH_ABORTED)."},
+    {NULL}
+};
+
+static PyTypeObject SearchStateType = {
+    PyVarObject_HEAD_INIT(NULL, 0)
+    .tp_name = "_team6_core.SearchState",
+    .tp_doc = "SearchState(): killer moves, history scores and abort flag shared by the searches of one agent.",
+    .tp_basicsize = sizeof(SearchState),
+    .tp_flags = Py_TPFLAGS_DEFAULT,
+    .tp_new = PyType_GenericNew,
+    .tp_methods = SearchState_methods,
+};
+
+
+/* ---------------------------------------------------------------- Position */
+
+typedef struct {
+    const Geometry *g;
+    bits_t pieces[2];
+    int heights[MAX_COLS];
+    int num_moves;
+    uint64_t hash, mirror_hash;
+    uint8_t *codes;
+    double straight_score, diag_score;
+    long center_count;
+} Position;
+
+static void position_play(Position *pos, int col, int player)
+{
+    const Geometry *g = pos->g;
+    int row = pos->heights[col];
+    int index = col * g->stride + row;
+    pos->pieces[player] |= (bits_t)1 << index;
+    pos->heights[col] = row + 1;
+    pos->num_moves++;
+    pos->hash ^= g->zobrist[player][index];
+    pos->mirror_hash ^= g->mirror_zobrist[player][index];
+
+    uint8_t *codes = pos->codes;
+    const double *values = g->window_values;
+    int delta = player == 0 ? g->code_base : 1;
+    double change = 0;
+    for (int k = g->straight_start[index]; k < g->straight_start[index + 1]; k++) {
+        int w = g->straight_ids[k];
+        int code = codes[w];
+        codes[w] = (uint8_t)(code + delta);
+        change += values[code + delta] - values[code];
+    }
+    pos->straight_score += change;
+    change = 0;
+    for (int k = g->diag_start[index]; k < g->diag_start[index + 1]; k++) {
+        int w = g->diag_ids[k];
+        int code = codes[w];
+        codes[w] = (uint8_t)(code + delta);
+        change += values[code + delta] - values[code];
+    }
+    pos->diag_score += change;
+    if (player == 0) {
+        int partner = g->center_partner[col];
+        if (partner != NO_PARTNER
+            && (partner < 0 || !((pos->pieces[0] >> (partner * g->stride + row)) & 1)))
+            pos->center_count++;
+    }
+}
+
+static void position_undo(Position *pos, int col, int player)
+{
+    const Geometry *g = pos->g;
+    int row = pos->heights[col] - 1;
+    int index = col * g->stride + row;
+    pos->pieces[player] ^= (bits_t)1 << index;
+    pos->heights[col] = row;
+    pos->num_moves--;
+    pos->hash ^= g->zobrist[player][index];
+    pos->mirror_hash ^= g->mirror_zobrist[player][index];
+
+    uint8_t *codes = pos->codes;
+    const double *values = g->window_values;
+    int delta = player == 0 ? g->code_base : 1;
+    double change = 0;
+    for (int k = g->straight_start[index]; k < g->straight_start[index + 1]; k++) {
+        int w = g->straight_ids[k];
+        int code = codes[w];
+        codes[w] = (uint8_t)(code - delta);
+        change += values[code - delta] - values[code];
+    }
+    pos->straight_score += change;
+    change = 0;
+    for (int k = g->diag_start[index]; k < g->diag_start[index + 1]; k++) {
+        int w = g->diag_ids[k];
+        int code = codes[w];
+        codes[w] = (uint8_t)(code - delta);
+        change += values[code - delta] - values[code];
+    }
+    pos->diag_score += change;
+    if (player == 0) {
+        int partner = g->center_partner[col];
+        if (partner != NO_PARTNER
+            && (partner < 0 || !((pos->pieces[0] >> (partner * g->stride + row)) & 1)))
+            pos->center_count--;
+    }
+}
+
+static inline int position_valid_moves(const Position *pos, int *moves)
+{
+    int n = 0;
+    for (int c = 0; c < pos->g->cols; c++)
+        if (pos->heights[c] < pos->g->rows)
+            moves[n++] = c;
+    return n;
+}
+
+static int position_is_win_at(const Position *pos, int col, int player)
+{
+    const Geometry *g = pos->g;
+    bits_t b = pos->pieces[player];
+    int stride = g->stride;
+    int n = g->connect_n;
+    int height = pos->heights[col];
+    bits_t bit = (bits_t)1 << (col * stride + height - 1);
+    if (height >= n) {
+        bits_t mask = (bit << 1) - (bit >> (n - 1));
+        if ((b & mask) == mask)
+            return 1;
+    }
+    const int shifts[3] = {stride, stride - 1, stride + 1};
+    for (int s = 0; s < 3; s++) {
+        int shift = shifts[s];
+        int run = 1;
+        bits_t probe = shl(bit, shift);
+        while (probe & b) {
+            run++;
+            probe = shl(probe, shift);
+        }
+        probe = bit >> shift;
+        while (probe & b) {
+            run++;
+            probe >>= shift;
+        }
+        if (run >= n)
+            return 1;
+    }
+    return 0;
+}
+
+static bits_t winning_cells(const Geometry *g, bits_t pieces, bits_t mask)
+{
+    int stride = g->stride;
+    int n = g->connect_n;
+    const int shifts[3] = {stride, stride - 1, stride + 1};
+    bits_t r;
+    if (n == 4) {
+        r = shl(pieces, 1) & shl(pieces, 2) & shl(pieces, 3);
+        for (int s = 0; s < 3; s++) {
+            int shift = shifts[s];
+            bits_t p = shl(pieces, shift) & shl(pieces, 2 * shift);
+            r |= p & shl(pieces, 3 * shift);
+            r |= p & shr(pieces, shift);
+            p = shr(pieces, shift) & shr(pieces, 2 * shift);
+            r |= p & shl(pieces, shift);
+            r |= p & shr(pieces, 3 * shift);
+        }
+    } else {
+        r = shl(pieces, 1);
+        for (int k = 2; k < n; k++)
+            r &= shl(pieces, k);
+        for (int s = 0; s < 3; s++) {
+            int shift = shifts[s];
+            for (int below = 0; below < n; below++) {
+                bits_t p = ~(bits_t)0;
+                for (int k = 1; k <= below; k++)
+                    p &= shl(pieces, k * shift);
+                for (int k = 1; k < n - below; k++)
+                    p &= shr(pieces, k * shift);
+                r |= p;
+            }
+        }
+    }
+    return r & (g->board_mask ^ mask);
+}
+
+static int has_connection(const Geometry *g, bits_t bits)
+{
+    int n = g->connect_n;
+    const int shifts[4] = {1, g->stride, g->stride - 1, g->stride + 1};
+    for (int s = 0; s < 4; s++) {
+        int shift = shifts[s];
+        bits_t m = bits & shr(bits, shift);
+        int run = 2;
+        while (run * 2 <= n) {
+            m &= shr(m, run * shift);
+            run *= 2;
+        }
+        if (run < n)
+            m &= shr(m, (n - run) * shift);
+        if (m)
+            return 1;
+    }
+    return 0;
+}
+
+static inline int popcount(bits_t x)
+{
+    return __builtin_popcountll((unsigned long long)x) + __builtin_popcountll((unsigned long long)(x >> 64));
+}
+
+static int threat_analysis(const Position *pos, int player, bits_t *cells_out, bits_t *blocks_out)
+{
+    /* threat_analysis: returns the outcome (1, -1 or 0) and stores the cells left to search and the blocks */
+    const Geometry *g = pos->g;
+    bits_t mine = pos->pieces[player], opp = pos->pieces[1 - player];
+    bits_t mask = mine | opp;
+    bits_t playable = (mask + g->bottom) & g->board_mask;
+    bits_t wins = winning_cells(g, mine, mask) & playable;
+    *cells_out = *blocks_out = 0;
+    if (wins) {
+        *cells_out = wins;
+        return 1;
+    }
+    bits_t threats = winning_cells(g, opp, mask);
+    bits_t blocks = threats & playable;
+    bits_t cells = playable;
+    *blocks_out = blocks;
+    if (blocks) {
+        if (blocks & (blocks - 1))
+            return -1;
+        cells = blocks;
+    }
+    cells &= ~(threats >> 1);
+    if (!cells)
+        return -1;
+    if (!(playable & g->follow_upper)) {
+        bits_t empty = g->board_mask ^ mask;
+        if (has_connection(g, opp | (empty & g->follow_upper)) && !has_connection(g, mine | (empty & g->follow_lower)))
+            return -1;
+    }
+    *cells_out = cells;
+    return 0;
+}
+
+static inline double evaluate_position(const Position *pos)
+{
+    /* center_count * CENTER_WEIGHT + straight_score + diag_score * DIAGONAL_WEIGHT, in Python's order; the window
+       and center weights are multiples of WEIGHT_QUANTUM, so the sums before the diagonal product are exact */
+    const Geometry *g = pos->g;
+    return (double)pos->center_count * g->center_weight + pos->straight_score + pos->diag_score * g->diagonal_weight;
+}
+
+
+/* ---------------------------------------------------------------- search */
+
+typedef struct {
+    Position pos;
+    Table *table;
+    SearchState *state;
+    double deadline;
+    unsigned long long nodes;
+    unsigned long long check_mask;
+    long long cutoffs, tt_cutoffs;
+    int move_ordering, symmetry, exact_depth_only;
+    int threat_min_depth; /* threat_analysis at nodes with at least this depth left; 0 = never */
+    jmp_buf timeout;
+} Search;
+
+static void move_to_front(int *moves, int n, int col)
+{
+    for (int i = 0; i < n; i++) {
+        if (moves[i] == col) {
+            for (int k = i; k > 0; k--)
+                moves[k] = moves[k - 1];
+            moves[0] = col;
+            return;
+        }
+    }
+}
+
+static void record_cutoff(SearchState *state, int ply, int player, int col, int depth)
+{
+    int count = state->killer_count[ply];
+    int *killers = state->killers[ply];
+    int known = 0;
+    for (int i = 0; i < count; i++)
+        if (killers[i] == col)
+            known = 1;
+    if (count == 0) {
+        killers[0] = col;
+        state->killer_count[ply] = 1;
+    } else if (!known) {
+        for (int i = (count < MAX_KILLERS ? count : MAX_KILLERS - 1); i > 0; i--)
+            killers[i] = killers[i - 1];
+        killers[0] = col;
+        if (count < MAX_KILLERS)
+            state->killer_count[ply] = count + 1;
+    }
+    if (state->history_cols > 0 && col < state->history_cols)
+        state->history[player][col] += (long long)depth * depth;
+}
+
+static int order_search_moves(Search *s, int *moves, int n, int player, int tt_move, const bits_t *known_blocks)
+{
+    /* known_blocks: the opponent's playable threats from threat_analysis (then player has no immediate win) */
+    const Geometry *g = s->pos.g;
+    const Position *pos = &s->pos;
+    SearchState *state = s->state;
+    bits_t wins = 0, blocks;
+    if (known_blocks != NULL) {
+        blocks = *known_blocks;
+    } else {
+        bits_t mask = pos->pieces[0] | pos->pieces[1];
+        bits_t playable = (mask + g->bottom) & g->board_mask;
+        wins = winning_cells(g, pos->pieces[player], mask) & playable;
+        blocks = winning_cells(g, pos->pieces[1 - player], mask) & playable;
+    }
+    int ply = pos->num_moves;
+    int killer_count = state->killer_count[ply];
+    const int *killers = state->killers[ply];
+    int center = g->cols / 2;
+
+    /* stable sort by distance from the center */
+    int sorted[MAX_COLS];
+    for (int i = 0; i < n; i++) {
+        int col = moves[i], k = i;
+        while (k > 0 && abs(sorted[k - 1] - center) > abs(col - center)) {
+            sorted[k] = sorted[k - 1];
+            k--;
+        }
+        sorted[k] = col;
+    }
+
+    int first[MAX_COLS], winning[MAX_COLS], blocking[MAX_COLS], killer[MAX_COLS], rest[MAX_COLS];
+    int nf = 0, nw = 0, nb = 0, nk = 0, nr = 0;
+    for (int i = 0; i < n; i++) {
+        int col = sorted[i];
+        int is_killer = 0;
+        for (int k = 0; k < killer_count; k++)
+            if (killers[k] == col)
+                is_killer = 1;
+        if (col == tt_move)
+            first[nf++] = col;
+        else if ((wins >> (col * g->stride)) & g->column)
+            winning[nw++] = col;
+        else if ((blocks >> (col * g->stride)) & g->column)
+            blocking[nb++] = col;
+        else if (is_killer)
+            killer[nk++] = col;
+        else
+            rest[nr++] = col;
+    }
+    if (nk > 1) {
+        /* in the killer list's order */
+        int ordered = 0;
+        for (int k = 0; k < killer_count; k++)
+            for (int i = ordered; i < nk; i++)
+                if (killer[i] == killers[k]) {
+                    int tmp = killer[ordered];
+                    killer[ordered] = killer[i];
+                    killer[i] = tmp;
+                    ordered++;
+                    break;
+                }
+    }
+    if (state->history_cols > 0 && nr > 1) {
+        /* stable sort by descending history score */
+        const long long *history = state->history[player];
+        for (int i = 1; i < nr; i++) {
+            int col = rest[i], k = i;
+            while (k > 0 && history[rest[k - 1]] < history[col]) {
+                rest[k] = rest[k - 1];
+                k--;
+            }
+            rest[k] = col;
+        }
+    }
+    int at = 0;
+    for (int i = 0; i < nf; i++) moves[at++] = first[i];
+    for (int i = 0; i < nw; i++) moves[at++] = winning[i];
+    for (int i = 0; i < nb; i++) moves[at++] = blocking[i];
+    for (int i = 0; i < nk; i++) moves[at++] = killer[i];
+    for (int i = 0; i < nr; i++) moves[at++] = rest[i];
+    return at;
+}
+
+static double alpha_beta(Search *s, int depth, double alpha, double beta, int maximizing)
+{
+    Position *pos = &s->pos;
+    const Geometry *g = pos->g;
+    s->nodes++;
+    if (!(s->nodes & s->check_mask) && (s->state->aborted || perf_counter() > s->deadline))
+        longjmp(s->timeout, 1);
+    int moves[MAX_COLS];
+    int n = position_valid_moves(pos, moves);
+    if (n == 0)
+        return 0.0;
+    if (depth == 0)
+        return evaluate_position(pos);
+
+    bits_t blocks = 0;
+    int analysed = s->threat_min_depth && depth >= s->threat_min_depth;
+    if (analysed) {
+        bits_t cells;
+        int outcome = threat_analysis(pos, maximizing ? 0 : 1, &cells, &blocks);
+        if (outcome)
+            return (outcome > 0) == maximizing ? INFINITY : -INFINITY;
+        if (popcount(cells) < n) {
+            n = 0;
+            for (int c = 0; c < g->cols; c++)
+                if ((cells >> (c * g->stride)) & g->column)
+                    moves[n++] = c;
+        }
+    }
+
+    Table *tt = s->table;
+    double alpha_orig = alpha, beta_orig = beta;
+    int tt_move = -1;
+    int mirrored = 0;
+    uint64_t key = 0;
+    if (tt != NULL) {
+        mirrored = s->symmetry && pos->mirror_hash < pos->hash;
+        key = mirrored ? pos->mirror_hash : pos->hash;
+        if (!maximizing)
+            key ^= g->side_key;
+        Entry *e = &tt->entries[key % (uint64_t)tt->size];
+        if (e->used && e->key == key) {
+            tt_move = mirrored ? g->cols - 1 - e->best_move : e->best_move;
+            if (e->depth == depth || (e->depth > depth && !s->exact_depth_only)) {
+                if (e->bound == EXACT) {
+                    s->tt_cutoffs++;
+                    return e->score;
+                } else if (e->bound == LOWER_BOUND) {
+                    if (e->score > alpha)
+                        alpha = e->score;
+                } else {
+                    if (e->score < beta)
+                        beta = e->score;
+                }
+                if (alpha >= beta) {
+                    s->tt_cutoffs++;
+                    return e->score;
+                }
+            }
+        }
+    }
+
+    if (s->move_ordering && depth > 1) {
+        n = order_search_moves(s, moves, n, maximizing ? 0 : 1, tt_move, analysed ? &blocks : NULL);
+    } else {
+        if (s->move_ordering) {
+            int ply = pos->num_moves;
+            for (int k = s->state->killer_count[ply] - 1; k >= 0; k--)
+                move_to_front(moves, n, s->state->killers[ply][k]);
+        }
+        if (tt_move >= 0)
+            move_to_front(moves, n, tt_move);
+    }
+
+    int best_move = moves[0];
+    double best_score;
+    if (maximizing) {
+        double max_eval = -INFINITY;
+        for (int i = 0; i < n; i++) {
+            int col = moves[i];
+            double eval_score;
+            position_play(pos, col, 0);
+            if (position_is_win_at(pos, col, 0))
+                eval_score = INFINITY;
+            else
+                eval_score = alpha_beta(s, depth - 1, alpha, beta, 0);
+            position_undo(pos, col, 0);
+            if (eval_score > max_eval) {
+                max_eval = eval_score;
+                best_move = col;
+            }
+            if (max_eval > alpha)
+                alpha = max_eval;
+            if (alpha >= beta) {
+                s->cutoffs++;
+                if (s->move_ordering)
+                    record_cutoff(s->state, pos->num_moves, 0, col, depth);
+                break;
+            }
+        }
+        best_score = max_eval;
+    } else {
+        double min_eval = INFINITY;
+        for (int i = 0; i < n; i++) {
+            int col = moves[i];
+            double eval_score;
+            position_play(pos, col, 1);
+            if (position_is_win_at(pos, col, 1))
+                eval_score = -INFINITY;
+            else
+                eval_score = alpha_beta(s, depth - 1, alpha, beta, 1);
+            position_undo(pos, col, 1);
+            if (eval_score < min_eval) {
+                min_eval = eval_score;
+                best_move = col;
+            }
+            if (min_eval < beta)
+                beta = min_eval;
+            if (alpha >= beta) {
+                s->cutoffs++;
+                if (s->move_ordering)
+                    record_cutoff(s->state, pos->num_moves, 1, col, depth);
+                break;
+            }
+        }
+        best_score = min_eval;
+    }
+
+    if (tt != NULL) {
+        int bound;
+        if (best_score <= alpha_orig)
+            bound = UPPER_BOUND;
+        else if (best_score >= beta_orig)
+            bound = LOWER_BOUND;
+        else
+            bound = EXACT;
+        table_store(tt, key, depth, best_score, bound, mirrored ? g->cols - 1 - best_move : best_move);
+    }
+    return best_score;
+}
+
+static PyObject *core_search(PyObject *module, PyObject *args)
+{
+    Geometry *geometry;
+    PyObject *table_obj, *mine_obj, *opp_obj;
+    SearchState *state;
+    int depth, maximizing, move_ordering, symmetry, exact_depth_only, threat_min_depth;
+    double alpha, beta, deadline;
+    unsigned long long nodes, check_mask;
+
+    if (!PyArg_ParseTuple(args, "O!OO!OOiddpdKKpppi", &GeometryType, &geometry, &table_obj, &SearchStateType, &state,
+                          &mine_obj, &opp_obj, &depth, &alpha, &beta, &maximizing, &deadline, &nodes, &check_mask,
+                          &move_ordering, &symmetry, &exact_depth_only, &threat_min_depth))
+        return NULL;
+    Table *table = NULL;
+    if (table_obj != Py_None) {
+        if (!PyObject_TypeCheck(table_obj, &TableType)) {
+            PyErr_SetString(PyExc_TypeError, "table must be a _team6_core.Table or None");
+            return NULL;
+        }
+        table = (Table *)table_obj;
+    }
+    if (state->history_cols != 0 && state->history_cols != geometry->cols) {
+        PyErr_SetString(PyExc_ValueError, "SearchState was reset for a different number of columns");
+        return NULL;
+    }
+
+    Search *s = PyMem_Calloc(1, sizeof(Search));
+    uint8_t *codes = PyMem_Calloc(geometry->num_windows > 0 ? geometry->num_windows : 1, 1);
+    if (s == NULL || codes == NULL) {
+        PyMem_Free(s);
+        PyMem_Free(codes);
+        return PyErr_NoMemory();
+    }
+    bits_t mine, opp;
+    if (bits_from_long(mine_obj, &mine) < 0 || bits_from_long(opp_obj, &opp) < 0) {
+        PyMem_Free(s);
+        PyMem_Free(codes);
+        return NULL;
+    }
+    s->pos.g = geometry;
+    s->pos.codes = codes;
+    /* rebuild the position column by column, like BitBoard.from_bits */
+    for (int c = 0; c < geometry->cols; c++) {
+        for (int r = 0; r < geometry->rows; r++) {
+            bits_t bit = (bits_t)1 << (c * geometry->stride + r);
+            if (mine & bit)
+                position_play(&s->pos, c, 0);
+            else if (opp & bit)
+                position_play(&s->pos, c, 1);
+            else
+                break;
+        }
+    }
+    s->table = table;
+    s->state = state;
+    s->deadline = deadline;
+    s->nodes = nodes;
+    s->check_mask = check_mask;
+    s->move_ordering = move_ordering;
+    s->symmetry = symmetry;
+    s->exact_depth_only = exact_depth_only;
+    s->threat_min_depth = threat_min_depth;
+
+    /* the Python objects stay alive: the caller holds references to all of them for the whole call */
+    Py_INCREF(geometry);
+    Py_XINCREF(table_obj);
+    Py_INCREF(state);
+    double score = 0.0;
+    int timed_out = 0;
+    Py_BEGIN_ALLOW_THREADS
+    if (setjmp(s->timeout) == 0)
+        score = alpha_beta(s, depth, alpha, beta, maximizing);
+    else
+        timed_out = 1;
+    Py_END_ALLOW_THREADS
+    Py_DECREF(geometry);
+    Py_XDECREF(table_obj);
+    Py_DECREF(state);
+
+    PyObject *result;
+    if (timed_out)
+        result = Py_BuildValue("(OKLL)", Py_None, s->nodes, s->cutoffs, s->tt_cutoffs);
+    else
+        result = Py_BuildValue("(dKLL)", score, s->nodes, s->cutoffs, s->tt_cutoffs);
+    PyMem_Free(codes);
+    PyMem_Free(s);
+    return result;
+}
+
+static PyMethodDef core_methods[] = {
+    {"search", core_search, METH_VARARGS,
+     "search(geometry, table, state, mine, opp, depth, alpha, beta, maximizing, deadline, nodes, check_mask, "
+     "move_ordering, symmetry, exact_depth_only, threat_min_depth) -> (score or None on timeout, nodes, cutoffs, "
+     "tt_cutoffs)\n"
+     "alpha_beta_search on the position given by the two piece bitboards."},
+    {NULL}
+};
+
+static struct PyModuleDef core_module = {
+    PyModuleDef_HEAD_INIT,
+    .m_name = "_team6_core",
+    .m_doc = "Compiled search core for Team6_Connect_4_Agent.",
+    .m_size = -1,
+    .m_methods = core_methods,
+};
+
+PyMODINIT_FUNC PyInit__team6_core(void)
+{
+    if (PyType_Ready(&GeometryType) < 0 || PyType_Ready(&TableType) < 0 || PyType_Ready(&SearchStateType) < 0)
+        return NULL;
+    PyObject *module = PyModule_Create(&core_module);
+    if (module == NULL)
+        return NULL;
+    Py_INCREF(&GeometryType);
+    Py_INCREF(&TableType);
+    Py_INCREF(&SearchStateType);
+    if (PyModule_AddObject(module, "Geometry", (PyObject *)&GeometryType) < 0
+        || PyModule_AddObject(module, "Table", (PyObject *)&TableType) < 0
+        || PyModule_AddObject(module, "SearchState", (PyObject *)&SearchStateType) < 0
+        || PyModule_AddIntConstant(module, "ABI_VERSION", CORE_ABI_VERSION) < 0) {
+        Py_DECREF(module);
+        return NULL;
+    }
+    return module;
+}
@@ -0,0 +1,30 @@
+"""Builds the optional compiled search core used by Team6_Connect_4_Agent.
+
+Compiles native/_team6_core.c with the local C compiler and places the extension module next to
+Team6_Connect_4_Agent.py, where the agent picks it up at import time. Without it (or with
+TEAM6_BACKEND=python) the agent keeps using the pure-Python search. Needs setuptools and the Python
+headers; nothing else.
+
+Usage: python tools/build_native.py
+"""
+import os
+import sys
+import tempfile
+
+from setuptools import Extension, setup
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def main():
+    source = os.path.join(ROOT, 'native', '_team6_core.c')
+    extension = Extension('_team6_core', [source], extra_compile_args=['-O3'])
+    with tempfile.TemporaryDirectory() as build_temp:
+        setup(name='team6-core', ext_modules=[extension],
+              script_args=['--quiet', 'build_ext', '--build-lib', ROOT, '--build-temp', build_temp])
+    print('built _team6_core in %s' % ROOT)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,102 @@
+"""Builds the opening book used by Team6_Connect_4_Agent.
+
+Enumerates every position reachable in at most --plies moves (skipping games already won), merges
+mirror images through canonical_position_key, searches each remaining position with the agent's
+iterative deepening search to --depth plies, and writes the sorted binary book file that the agent
+memory-maps in init_agent. Each entry records the depth it was searched to, and the agent only plays a book
+move when that depth beats what its live search reaches (15-16 plies in one second with the compiled core on
+6x7); a book built shallower than the live search is simply never used.
+
+The default --depth 18 takes about 4 seconds per position on one core (depth 20 about 20), so the full 4-ply
+book needs --jobs to build in reasonable time.
+
+Usage: python tools/build_opening_book.py [--plies 4] [--depth 18] [--rows 6] [--cols 7] [--jobs 1]
+                                          [--output Team6_opening_book.bin]
+"""
+import argparse
+import concurrent.futures
+import math
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import Team6_Connect_4_Agent as agent
+
+
+def enumerate_positions(rows, cols, plies):
+    """Returns {canonical key: (mine, opp)} for every undecided position with at most `plies` pieces,
+    seen from the side to move (whose pieces are `mine`)."""
+    positions = {}
+    pos = agent.BitBoard(rows, cols)
+
+    def visit(player):
+        # player is the side to move in pos
+        mine, opp = pos.pieces[player], pos.pieces[1 - player]
+        key, mirrored = agent.canonical_position_key(mine, opp, rows, cols)
+        if key in positions:
+            return  # already expanded through another move order or its mirror image
+        if mirrored:
+            mine, opp = agent.mirror_bits(mine, rows, cols), agent.mirror_bits(opp, rows, cols)
+        positions[key] = (mine, opp)
+        if pos.num_moves == plies:
+            return
+        for col in pos.valid_moves():
+            pos.play(col, player)
+            if not pos.is_win_at(col, player):
+                visit(1 - player)
+            pos.undo(col, player)
+
+    visit(0)
+    return positions
+
+
+def solve_position(rows, cols, mine, opp, depth):
+    """Searches one position (side to move owns `mine`) and returns (col, score, depth), depth being the search
+    depth reached (agent.BOOK_PROVEN_DEPTH for an immediate win)."""
+    if agent.TRANSPOSITION_TABLE is None:
+        agent.TRANSPOSITION_TABLE = agent.new_transposition_table()
+    pos = agent.BitBoard.from_bits(rows, cols, mine, opp)
+    agent.TRANSPOSITION_TABLE.new_search()
+    # immediate wins first, as what_is_your_move does
+    for col in pos.valid_moves():
+        pos.play(col, 0)
+        wins = pos.is_win_at(col, 0)
+        pos.undo(col, 0)
+        if wins:
+            return col, math.inf, agent.BOOK_PROVEN_DEPTH
+    order = sorted(pos.valid_moves(), key=lambda c: abs(c - cols // 2))
+    return agent.iterative_deepening(pos, order, math.inf, max_depth=depth)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--plies', type=int, default=4, help='deepest position (number of pieces) to include')
+    parser.add_argument('--depth', type=int, default=18, help='search depth for each book position')
+    parser.add_argument('--rows', type=int, default=6)
+    parser.add_argument('--cols', type=int, default=7)
+    parser.add_argument('--jobs', type=int, default=1, help='worker processes')
+    parser.add_argument('--output', default=agent.BOOK_PATH)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    positions = enumerate_positions(args.rows, args.cols, args.plies)
+    print('%d positions up to ply %d (mirror images merged)' % (len(positions), args.plies))
+
+    entries = {}
+    keys = sorted(positions)
+    with concurrent.futures.ProcessPoolExecutor(max_workers=args.jobs) as pool:
+        futures = {pool.submit(solve_position, args.rows, args.cols, mine, opp, args.depth): key
+                   for key, (mine, opp) in ((k, positions[k]) for k in keys)}
+        for done, future in enumerate(concurrent.futures.as_completed(futures), 1):
+            entries[futures[future]] = future.result()
+            if done % 100 == 0 or done == len(futures):
+                print('%d/%d searched, %.0fs' % (done, len(futures), time.perf_counter() - start), flush=True)
+
+    agent.write_opening_book(args.output, args.rows, args.cols, entries)
+    print('wrote %d entries to %s (%d bytes)' % (len(entries), args.output, os.path.getsize(args.output)))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,266 @@
+"""Streaming self-play data for tuning Team6_Connect_4_Agent's evaluation weights (see tools/tune_weights.py).
+
+The agent plays itself and variants of itself (--variants copies whose window, center and diagonal weights are
+the base weights, each scaled by a random factor within 1 +- --perturb) over a process pool, with a fixed search
+depth and a few random opening moves per game for variety. Every move the agent decides by search is recorded:
+the position with the mover as `mine`, the search score and depth, which weights made the move, and the game's
+result for the mover.
+
+Games are generated in chunks of --games-per-chunk games and each chunk is written to OUTPUT/chunk-000123.bin
+only once it is complete (through a temporary file), so a chunk file is always whole. A chunk's openings and
+pairings depend only on --seed and its number, and finished chunks are skipped, so an interrupted run resumes
+by running the same command again; --chunks can be raised to extend a run. The settings and variant weights
+are kept in OUTPUT/selfplay.json and a resumed run must use the same ones. At most 2 * --jobs chunks are in
+flight and each worker hands back one chunk's records at a time, so memory stays flat however long it runs.
+
+Chunk format (little-endian):
+  header  magic b'C4SP', version u8, rows u8, cols u8, connect_n u8, key_bytes u8, record count u32
+  record  position_key of the mover (key_bytes, big-endian), score f32 (+-inf for proven results),
+          depth u8, variant u8 (0 = base weights), result i8 (1 win, 0 draw, -1 loss for the mover)
+
+Usage: python tools/selfplay.py selfplay-data --chunks 200 --jobs 4 [--games-per-chunk 20] [--depth 6] \\
+           [--variants 4] [--perturb 0.3] [--opening-plies 8] [--weights base.json] [--seed 0]
+"""
+import argparse
+import concurrent.futures
+import contextlib
+import io
+import json
+import math
+import os
+import random
+import struct
+import sys
+import time
+
+from tournament import REPO_DIR, agent_path, load_agent
+
+sys.path.insert(0, REPO_DIR)
+import Team6_Connect_4_Agent as agent
+
+CHUNK_MAGIC = b'C4SP'
+CHUNK_VERSION = 1
+CHUNK_HEADER = struct.Struct('<4sBBBBBI')
+RECORD_PAYLOAD = struct.Struct('<fBBb')
+SYMBOLS = ('X', 'O')  # X moves first
+PROVEN_SCORES = {'win': math.inf, 'loss': -math.inf}  # get_search_stats scores of proven results
+
+
+def chunk_path(directory, index):
+    return os.path.join(directory, 'chunk-%06d.bin' % index)
+
+
+def read_chunk(path):
+    """Returns (header, payload) of a chunk file: header is a dict with rows, cols, connect_n, key_bytes,
+    count and record_size; payload holds the records back to back."""
+    with open(path, 'rb') as f:
+        data = f.read()
+    magic, version, rows, cols, connect_n, key_bytes, count = CHUNK_HEADER.unpack_from(data, 0)
+    if magic != CHUNK_MAGIC or version != CHUNK_VERSION:
+        raise ValueError('%s is not a version %d self-play chunk' % (path, CHUNK_VERSION))
+    header = {'rows': rows, 'cols': cols, 'connect_n': connect_n, 'key_bytes': key_bytes, 'count': count,
+              'record_size': key_bytes + RECORD_PAYLOAD.size}
+    payload = data[CHUNK_HEADER.size:]
+    if len(payload) != count * header['record_size']:
+        raise ValueError('%s is truncated' % path)
+    return header, payload
+
+
+def list_chunks(directory):
+    """Returns the paths of the finished chunks in a data directory, in chunk order."""
+    names = sorted(name for name in os.listdir(directory) if name.startswith('chunk-') and name.endswith('.bin'))
+    return [os.path.join(directory, name) for name in names]
+
+
+def write_chunk(path, rows, cols, connect_n, records):
+    """Writes a chunk atomically: to a temporary file first, then renamed over path."""
+    key_bytes = agent.book_key_bytes(rows, cols)
+    temporary = path + '.tmp'
+    with open(temporary, 'wb') as f:
+        f.write(CHUNK_HEADER.pack(CHUNK_MAGIC, CHUNK_VERSION, rows, cols, connect_n, key_bytes, len(records)))
+        f.write(b''.join(records))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temporary, path)
+
+
+def variant_weights(base, count, perturb, seed):
+    """Returns [base] + count perturbed copies; the win score stays fixed, signs are kept."""
+    rng = random.Random(seed)
+    variants = [list(base)]
+    for _ in range(count):
+        weights = list(base)
+        for i in range(1, len(weights)):
+            weights[i] = weights[i] * rng.uniform(1 - perturb, 1 + perturb)
+        variants.append(list(agent.set_evaluation_weights(weights)))
+    agent.set_evaluation_weights(agent.DEFAULT_WEIGHTS)
+    return variants
+
+
+def play_game(settings, variants, rng):
+    """Plays one game between the weights variants[0] (X) and variants[1] (O); returns the records."""
+    rows, cols, connect_n = settings['rows'], settings['cols'], settings['connect_n']
+    stride = rows + 1
+    modules = [load_agent(settings['agent'], seat) for seat in range(2)]
+    board = [[' ' for _ in range(cols)] for _ in range(rows)]
+    pieces = [0, 0]
+    heights = [0] * cols
+    moves = []  # (seat, key, score, depth) of every searched move
+    winner = None
+    with contextlib.redirect_stdout(io.StringIO()):
+        for seat, module in enumerate(modules):
+            module.enable_search_stats(True)
+            module.init_agent(SYMBOLS[seat], rows, cols, [row[:] for row in board], move_time=math.inf, workers=1,
+                              book_path='', ponder=False, connect_n=connect_n, max_depth=settings['depth'],
+                              cache_path='', weights_path=settings['weights_files'][variants[seat]])
+        opening = rng.randint(0, settings['opening_plies'])
+        for ply in range(rows * cols):
+            seat = ply % 2
+            if ply < opening:
+                col = rng.choice([c for c in range(cols) if heights[c] < rows])
+            else:
+                col = modules[seat].what_is_your_move([row[:] for row in board], rows, cols, SYMBOLS[seat]) - 1
+                stats = modules[seat].get_search_stats()
+                if stats['source'] == 'search' and stats['score'] is not None:
+                    # the stats report proven scores as 'win'/'loss'; the record keeps them as +-inf
+                    score = PROVEN_SCORES.get(stats['score'], stats['score'])
+                    key = agent.position_key(pieces[seat], pieces[1 - seat], rows, cols)
+                    moves.append((seat, key, score, stats['depth']))
+            pieces[seat] |= 1 << (col * stride + heights[col])
+            board[rows - 1 - heights[col]][col] = SYMBOLS[seat]
+            heights[col] += 1
+            if agent.has_connection(pieces[seat], stride, connect_n):
+                winner = seat
+                break
+        results = ('Draw', 'Draw') if winner is None else ('Team6', 'Team6')
+        for module in modules:
+            module.connect_4_result([row[:] for row in board], *results)
+    key_bytes = agent.book_key_bytes(rows, cols)
+    records = []
+    for seat, key, score, depth in moves:
+        result = 0 if winner is None else (1 if winner == seat else -1)
+        records.append(key.to_bytes(key_bytes, 'big')
+                       + RECORD_PAYLOAD.pack(score, min(depth, 255), variants[seat], result))
+    return records, winner
+
+
+def play_chunk(index, settings):
+    """Worker task: plays chunk index's games and returns (index, records, results of the base weights)."""
+    rng = random.Random(settings['seed'] * 1000003 + index)
+    count = len(settings['weights_files'])
+    records = []
+    tally = [0, 0, 0]  # wins, draws, losses of the base weights against the variants
+    for game in range(settings['games_per_chunk']):
+        number = index * settings['games_per_chunk'] + game
+        opponent = 1 + number // 2 % (count - 1) if count > 1 else 0
+        variants = (0, opponent) if number % 2 == 0 else (opponent, 0)
+        game_records, winner = play_game(settings, variants, rng)
+        records.extend(game_records)
+        if winner is None:
+            tally[1] += 1
+        else:
+            tally[0 if variants[winner] == 0 else 2] += 1
+    return index, records, tally
+
+
+def load_settings(directory, settings):
+    """Returns the settings of a run in directory, writing them on the first run. Raises ValueError if an
+    earlier run used other settings, since its chunks would not match."""
+    path = os.path.join(directory, 'selfplay.json')
+    if os.path.exists(path):
+        with open(path) as f:
+            saved = json.load(f)
+        changed = [name for name in settings if name != 'variants' and saved.get(name) != settings[name]]
+        if changed:
+            raise ValueError('%s was generated with other settings (%s)' % (directory, ', '.join(changed)))
+        return saved
+    weights_files = []
+    for i, weights in enumerate(settings['variants']):
+        weights_path = os.path.join(directory, 'weights-%02d.json' % i)
+        with open(weights_path, 'w') as f:
+            json.dump(dict(zip(agent.WEIGHT_NAMES, weights)), f, indent=1)
+            f.write('\n')
+        weights_files.append(weights_path)
+    settings = dict(settings, weights_files=weights_files)
+    with open(path + '.tmp', 'w') as f:
+        json.dump(settings, f, indent=1)
+        f.write('\n')
+    os.replace(path + '.tmp', path)
+    return settings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('output', help='data directory (created if needed)')
+    parser.add_argument('--chunks', type=int, default=100, help='total chunks the directory should hold')
+    parser.add_argument('--games-per-chunk', type=int, default=20)
+    parser.add_argument('--jobs', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--agent', default='Team6_Connect_4_Agent')
+    parser.add_argument('--rows', type=int, default=6)
+    parser.add_argument('--cols', type=int, default=7)
+    parser.add_argument('--connect-n', type=int, default=4)
+    parser.add_argument('--depth', type=int, default=6, help='search depth of every move')
+    parser.add_argument('--opening-plies', type=int, default=8, help='up to this many random moves per game')
+    parser.add_argument('--variants', type=int, default=4, help='perturbed copies of the base weights')
+    parser.add_argument('--perturb', type=float, default=0.3, help='largest relative change of a variant weight')
+    parser.add_argument('--weights', help='base weights file (default: the default weights)')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    if args.weights and not os.path.exists(args.weights):
+        print('no weights file at %s' % args.weights, file=sys.stderr)
+        return 2
+    os.makedirs(args.output, exist_ok=True)
+    base = list(agent.load_weights(args.weights) if args.weights else agent.DEFAULT_WEIGHTS)
+    settings = {
+        'agent': agent_path(args.agent),
+        'rows': args.rows,
+        'cols': args.cols,
+        'connect_n': args.connect_n,
+        'depth': args.depth,
+        'games_per_chunk': args.games_per_chunk,
+        'opening_plies': args.opening_plies,
+        'perturb': args.perturb,
+        'seed': args.seed,
+        'base': base,
+        'variants': variant_weights(base, args.variants, args.perturb, args.seed),
+    }
+    try:
+        settings = load_settings(args.output, settings)
+    except ValueError as exc:
+        print(exc, file=sys.stderr)
+        return 2
+
+    todo = [i for i in range(args.chunks) if not os.path.exists(chunk_path(args.output, i))]
+    print('%d of %d chunks to play in %s' % (len(todo), args.chunks, args.output), flush=True)
+    tally = [0, 0, 0]
+    positions = 0
+    start = time.perf_counter()
+    with concurrent.futures.ProcessPoolExecutor(max_workers=args.jobs) as pool:
+        pending = set()
+        queue = iter(todo)
+        done = 0
+        while True:
+            for index in queue:
+                pending.add(pool.submit(play_chunk, index, settings))
+                if len(pending) >= 2 * args.jobs:
+                    break
+            if not pending:
+                break
+            finished, pending = concurrent.futures.wait(pending, return_when=concurrent.futures.FIRST_COMPLETED)
+            for future in finished:
+                index, records, chunk_tally = future.result()
+                write_chunk(chunk_path(args.output, index), args.rows, args.cols, args.connect_n, records)
+                positions += len(records)
+                tally = [a + b for a, b in zip(tally, chunk_tally)]
+                done += 1
+                elapsed = time.perf_counter() - start
+                print('chunk %d written (%d/%d), %d positions, %.2f games/s'
+                      % (index, done, len(todo), positions, done * args.games_per_chunk / elapsed), flush=True)
+    if todo and len(settings['weights_files']) > 1:
+        print('base weights against the variants: won %d, drew %d, lost %d' % tuple(tally))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
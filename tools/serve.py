@@ -0,0 +1,321 @@
+"""Service mode: serves Team6_Connect_4_Agent moves for many concurrent games from one asyncio process.
+
+Games are GameSession objects instead of the agent's module globals, and every search runs in a process pool
+shared by all games (--workers processes, each keeping one transposition table per board geometry). Move
+requests wait in one queue; whenever workers are free, the dispatcher spreads the queue over all of them, each
+getting one task of up to --batch-size requests, so under load the per-task overhead is shared by a batch and
+at low load a request goes out alone. A batch only takes requests that can still be started in time after the
+move times of the requests before them; the rest wait for the next free worker. Backpressure: with
+--max-pending requests queued or running, new move requests are refused at once ("overloaded"), and a request
+that cannot be searched before its deadline is answered "deadline exceeded", at the latest by the deadline.
+Searches stop in time to answer by the deadline.
+
+Protocol: newline-delimited JSON over TCP (--host/--port) or a Unix socket (--unix). Every request is an object
+with an "op" and an optional "id" that is echoed in its reply; replies carry "ok" and, when it is false,
+"error". Requests on one connection are handled concurrently, so replies may come back out of order.
+  {"op": "new_game", "symbol": "X", "rows": 6, "cols": 7, "connect_n": 4, "move_time": 0.5, "max_depth": null}
+      -> {"ok": true, "game": "1"}            (all but symbol are optional; defaults come from the agent)
+  {"op": "move", "game": "1", "board": [[" ", ...], ...], "deadline_ms": 2000}
+      -> {"ok": true, "move": 4, "source": "search", "score": 12.5, "depth": 9, "queued_ms": 0.4, "search_ms": 498.1}
+         (board rows top first, as the manager passes them; move is 1-indexed; score is "win"/"loss" when proven)
+  {"op": "end_game", "game": "1"} -> {"ok": true}
+  {"op": "stats"} -> {"ok": true, "games": ..., "pending": ..., "counters": {"moves": ..., "overloaded": ...,
+                       "expired": ...}, "batch_sizes": {...}, "latency_ms": {"p50": ..., "p99": ..., ...}}
+Games left open are ended when the connection that started them closes.
+
+Usage: python tools/serve.py [--port 7406 | --unix /tmp/team6.sock] [--workers 4] [--batch-size 8] \\
+           [--max-pending 1000] [--deadline 5.0] [--move-time 1.0] [--tt-size 32] [--weights file]
+"""
+import argparse
+import asyncio
+import collections
+import itertools
+import json
+import math
+import os
+import signal
+import sys
+import time
+
+from tournament import REPO_DIR
+
+sys.path.insert(0, REPO_DIR)
+import Team6_Connect_4_Agent as agent
+
+LATENCY_SAMPLES = 10000  # recent move latencies kept for the stats percentiles
+
+
+class ServiceError(Exception):
+    """A request that cannot be served; its message is the reply's error."""
+
+
+class MoveService:
+    """The sessions, the request queue and the dispatcher feeding the process pool."""
+
+    def __init__(self, pool, workers, batch_size, max_pending, deadline):
+        self.pool = pool
+        self.workers = workers
+        self.batch_size = batch_size
+        self.max_pending = max_pending
+        self.deadline = deadline
+        self.sessions = {}
+        self.game_ids = itertools.count(1)
+        self.queue = collections.deque()  # (request, future, queued_at)
+        self.pending = 0  # move requests queued or being searched
+        self.wakeup = asyncio.Event()  # set when a request is queued or a worker becomes free
+        self.free_workers = workers
+        self.counters = collections.Counter()
+        self.latencies = collections.deque(maxlen=LATENCY_SAMPLES)
+        self.batch_sizes = collections.Counter()
+
+    # GAMES
+    def new_game(self, message):
+        try:
+            session = agent.GameSession(message.get('symbol', 'X'), int(message.get('rows', 6)),
+                                        int(message.get('cols', 7)), int(message.get('connect_n', 4)),
+                                        message.get('move_time'), message.get('max_depth'))
+        except (TypeError, ValueError) as exc:
+            raise ServiceError(str(exc))
+        game = str(next(self.game_ids))
+        self.sessions[game] = session
+        self.counters['games'] += 1
+        return game
+
+    def end_game(self, game):
+        if self.sessions.pop(game, None) is None:
+            raise ServiceError('unknown game %r' % (game,))
+
+    async def move(self, message):
+        session = self.sessions.get(message.get('game'))
+        if session is None:
+            raise ServiceError('unknown game %r' % (message.get('game'),))
+        if self.pending >= self.max_pending:
+            self.counters['overloaded'] += 1
+            raise ServiceError('overloaded')
+        queued_at = time.perf_counter()
+        deadline_ms = message.get('deadline_ms')
+        if deadline_ms is None:
+            deadline_ms = self.deadline * 1000
+        if isinstance(deadline_ms, bool) or not isinstance(deadline_ms, (int, float)) or not deadline_ms >= 0:
+            raise ServiceError('bad deadline_ms %r' % (deadline_ms,))
+        deadline = queued_at + min(deadline_ms / 1000, 86400)
+        try:
+            request = session.move_request(message['board'], deadline)
+        except (KeyError, TypeError, ValueError) as exc:
+            raise ServiceError('bad board: %s' % (exc,))
+        future = asyncio.get_running_loop().create_future()
+        self.pending += 1
+        self.queue.append((request, future, queued_at))
+        self.wakeup.set()
+        try:
+            # a reply that would come after the deadline is not waited for; the dispatcher skips the request
+            # if it is still queued, and a worker's late result is dropped
+            result, started = await asyncio.wait_for(future, deadline - time.perf_counter())
+        except asyncio.TimeoutError:
+            result = None
+        finally:
+            self.pending -= 1
+        if result is None:
+            self.counters['expired'] += 1
+            raise ServiceError('deadline exceeded')
+        col, source, score, depth, seconds = result
+        session.moves += 1
+        self.counters['moves'] += 1
+        latency = time.perf_counter() - queued_at
+        self.latencies.append(latency)
+        if isinstance(score, float) and math.isinf(score):
+            score = 'win' if score > 0 else 'loss'
+        return {'move': col, 'source': source, 'score': score, 'depth': depth,
+                'queued_ms': round((started - queued_at) * 1000, 3), 'search_ms': round(seconds * 1000, 3)}
+
+    # DISPATCH
+    async def dispatch(self):
+        """Hands queued requests to free workers in batches; runs for the life of the service."""
+        loop = asyncio.get_running_loop()
+        while True:
+            while not (self.queue and self.free_workers):
+                self.wakeup.clear()
+                await self.wakeup.wait()
+            now = time.perf_counter()
+            while self.queue and self.free_workers:
+                # share the queue among the free workers rather than giving it all to the first one
+                batch = self._take_batch(min(self.batch_size, -(-len(self.queue) // self.free_workers)), now)
+                if not batch:
+                    continue
+                self.free_workers -= 1
+                self.batch_sizes[len(batch)] += 1
+                task = loop.run_in_executor(self.pool, agent.serve_moves, [request for request, _ in batch])
+                task.add_done_callback(lambda done, batch=batch, started=now: self._finish(done, batch, started))
+
+    def _take_batch(self, size, now):
+        """Takes up to size requests from the front of the queue, answering those that can no longer be
+        searched in time. A request is only added while the move times of the requests before it in the
+        batch still leave it SERVICE_MIN_SEARCH_TIME before its deadline; otherwise it stays queued."""
+        batch = []
+        start = now  # when the next request taken would start in the worker, at the latest
+        while self.queue and len(batch) < size:
+            request, future, _ = self.queue[0]
+            latest = request[-1] - agent.SERVICE_REPLY_MARGIN - agent.SERVICE_MIN_SEARCH_TIME
+            if future.done():  # the client gave up on it already
+                self.queue.popleft()
+                continue
+            if now > latest:
+                self.queue.popleft()
+                future.set_result((None, now))
+                continue
+            if start > latest:
+                break
+            self.queue.popleft()
+            batch.append((request, future))
+            start += min(request[5], request[-1] - agent.SERVICE_REPLY_MARGIN - start)  # its move time
+        return batch
+
+    def _finish(self, done, batch, started):
+        self.free_workers += 1
+        self.wakeup.set()
+        try:
+            results = done.result()
+        except Exception as exc:  # a worker died; fail the batch, the pool reports itself broken next time
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(ServiceError('search failed: %r' % (exc,)))
+            return
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result((result, started))
+
+    def stats(self):
+        latencies = sorted(self.latencies)
+
+        def percentile(p):
+            return round(latencies[min(len(latencies) - 1, int(p * len(latencies)))] * 1000, 3) if latencies else None
+        return {'games': len(self.sessions), 'pending': self.pending, 'queued': len(self.queue),
+                'workers': self.workers, 'counters': dict(self.counters),
+                'batch_sizes': {str(size): count for size, count in sorted(self.batch_sizes.items())},
+                'latency_ms': {'p50': percentile(0.5), 'p90': percentile(0.9), 'p99': percentile(0.99),
+                               'max': percentile(1.0)}}
+
+    # CONNECTIONS
+    async def handle(self, message):
+        op = message.get('op')
+        if op == 'move':
+            return await self.move(message)
+        if op == 'new_game':
+            return {'game': self.new_game(message)}
+        if op == 'end_game':
+            self.end_game(message.get('game'))
+            return {}
+        if op == 'stats':
+            return self.stats()
+        raise ServiceError('unknown op %r' % (op,))
+
+    async def serve_connection(self, reader, writer):
+        games = set()  # games started on this connection, ended when it closes
+        tasks = set()
+
+        async def answer(message):
+            try:
+                reply = await self.handle(message)
+                reply['ok'] = True
+                if message.get('op') == 'new_game':
+                    games.add(reply['game'])
+                elif message.get('op') == 'end_game':
+                    games.discard(message.get('game'))
+            except ServiceError as exc:
+                reply = {'ok': False, 'error': str(exc)}
+            except (KeyError, TypeError, ValueError) as exc:  # fields of the wrong type; still answered
+                reply = {'ok': False, 'error': 'bad request: %r' % (exc,)}
+            if 'id' in message:
+                reply['id'] = message['id']
+            writer.write(json.dumps(reply).encode() + b'\n')
+            await writer.drain()
+
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    message = json.loads(line)
+                    if not isinstance(message, dict):
+                        raise ValueError('not an object')
+                except ValueError as exc:
+                    writer.write(json.dumps({'ok': False, 'error': 'bad request: %s' % exc}).encode() + b'\n')
+                    continue
+                task = asyncio.ensure_future(answer(message))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+        except (ConnectionError, asyncio.LimitOverrunError, ValueError):
+            pass
+        finally:
+            for task in tasks:
+                task.cancel()
+            for game in games:
+                self.sessions.pop(game, None)
+            writer.close()
+
+
+async def run(args):
+    # SIGTERM and SIGINT stop the service through the finally below, so the pool's workers are shut down too
+    loop = asyncio.get_running_loop()
+    stop = asyncio.Event()
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(signum, stop.set)
+    pool = agent.start_service_pool(args.workers, args.tt_size, args.weights, args.book)
+    service = MoveService(pool, args.workers, args.batch_size, args.max_pending, args.deadline)
+    # warm the workers up (tables, weights, book) before accepting requests
+    session = agent.GameSession('X', 6, 7, move_time=0.01)
+    empty = [[' '] * 7 for _ in range(6)]
+    await asyncio.gather(*(loop.run_in_executor(pool, agent.warm_up_service_worker,
+                                                [session.move_request(empty, time.perf_counter() + 10)])
+                           for _ in range(args.workers)))
+    dispatcher = asyncio.ensure_future(service.dispatch())
+    server = None
+    try:
+        if args.unix:
+            server = await asyncio.start_unix_server(service.serve_connection, path=args.unix)
+            where = args.unix
+        else:
+            server = await asyncio.start_server(service.serve_connection, args.host, args.port)
+            where = '%s:%d' % server.sockets[0].getsockname()[:2]
+        print('serving on %s with %d workers' % (where, args.workers), flush=True)
+        await stop.wait()
+    finally:
+        if server is not None:
+            server.close()
+        dispatcher.cancel()
+        # queued tasks are dropped; running searches end by their deadlines, then the workers exit
+        pool.shutdown(wait=True, cancel_futures=True)
+        if args.unix and os.path.exists(args.unix):
+            os.unlink(args.unix)
+    print('service stopped', flush=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=7406, help='0 picks a free port (printed at startup)')
+    parser.add_argument('--unix', help='listen on this Unix socket path instead of TCP')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='search processes')
+    parser.add_argument('--batch-size', type=int, default=8, help='most requests handed to a worker at once')
+    parser.add_argument('--max-pending', type=int, default=1000, help='move requests queued or running before '
+                                                                      'new ones are refused')
+    parser.add_argument('--deadline', type=float, default=5.0, help='seconds to answer a move request without '
+                                                                    'deadline_ms')
+    parser.add_argument('--move-time', type=float, help='default search time per move (default: the agent\'s)')
+    parser.add_argument('--max-depth', type=int, help='default depth cap per move (default: the agent\'s)')
+    parser.add_argument('--tt-size', type=float, default=agent.TT_SIZE_MB, help='MB per table, per geometry '
+                                                                                'and worker')
+    parser.add_argument('--weights', help='evaluation weights file (default: the agent\'s)')
+    parser.add_argument('--book', help='opening book file (default: the agent\'s)')
+    args = parser.parse_args()
+    if args.move_time is not None:
+        agent.MOVE_TIME_BUDGET = args.move_time
+    if args.max_depth is not None:
+        agent.MAX_SEARCH_DEPTH = args.max_depth
+    asyncio.run(run(args))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
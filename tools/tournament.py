@@ -0,0 +1,215 @@
+"""Headless match runner for the TeamN_Connect_4_Agent modules.
+
+Plays many games between two agent modules through the same contract the Connect 4 manager uses
+(init_agent / what_is_your_move / connect_4_result), spread over a process pool, with everything the
+agents print suppressed. Each game is written as one JSON line (moves, per-move times, winner), and a
+win/draw/loss summary with throughput is printed at the end.
+
+Every seat gets its own copy of its module, so an agent can play itself without the two sides sharing
+module globals. A move that takes longer than --move-limit seconds, or an illegal/failed move, loses
+the game for that side.
+
+--connect-n plays another variant (e.g. connect-5 on a wider board); both agents are then told the winning run
+through init_agent(..., connect_n=N), so they must accept that keyword (Team6_Connect_4_Agent does).
+
+Usage: python tools/tournament.py Team6_Connect_4_Agent Team1_Connect_4_Agent --games 1000 --jobs 4 \\
+           [--move-limit 2.0] [--opening-plies 2] [--rows 6] [--cols 7] [--connect-n 4] [--seed 0] \\
+           [--output results.jsonl]
+"""
+import argparse
+import concurrent.futures
+import contextlib
+import importlib.util
+import inspect
+import io
+import json
+import os
+import random
+import signal
+import sys
+import time
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SYMBOLS = ('X', 'O')  # X moves first
+
+_LOADED = {}  # (agent, seat) -> module, cached per worker process
+
+
+class MoveTimeout(Exception):
+    """Raised by the alarm handler when an agent overruns the move limit."""
+
+
+def _alarm(signum, frame):
+    raise MoveTimeout
+
+
+def agent_path(agent):
+    """Accepts a module name (looked up in the repo directory) or a path to a .py file."""
+    if agent.endswith('.py'):
+        return os.path.abspath(agent)
+    return os.path.join(REPO_DIR, agent + '.py')
+
+
+def team_name(agent):
+    """'Team6_Connect_4_Agent' -> 'Team6', the name the manager reports as winner/looser."""
+    return os.path.basename(agent).split('_')[0].replace('.py', '')
+
+
+def load_agent(agent, seat):
+    """Imports a private copy of the agent module for one seat, with its import-time output suppressed."""
+    module = _LOADED.get((agent, seat))
+    if module is None:
+        path = agent_path(agent)
+        name = '%s_seat%d' % (os.path.splitext(os.path.basename(path))[0], seat)
+        spec = importlib.util.spec_from_file_location(name, path)
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[name] = module  # lets the module's own process pools pickle its functions
+        with contextlib.redirect_stdout(io.StringIO()):
+            spec.loader.exec_module(module)
+        _LOADED[(agent, seat)] = module
+    return module
+
+
+def drop(board, col, symbol):
+    for r in range(len(board) - 1, -1, -1):
+        if board[r][col] == ' ':
+            board[r][col] = symbol
+            return r
+    return -1
+
+
+def wins_at(board, row, col, symbol, connect_n=4):
+    """True if the piece at (row, col) is part of connect_n in a row."""
+    rows, cols = len(board), len(board[0])
+    for dr, dc in ((0, 1), (1, 0), (1, 1), (1, -1)):
+        run = 1
+        for sign in (1, -1):
+            r, c = row + sign * dr, col + sign * dc
+            while 0 <= r < rows and 0 <= c < cols and board[r][c] == symbol:
+                run += 1
+                r, c = r + sign * dr, c + sign * dc
+        if run >= connect_n:
+            return True
+    return False
+
+
+def play_game(game_id, agents, rows, cols, move_limit, opening_plies, seed, connect_n=4):
+    """Plays one game of connect_n in a row; agents[0] plays X (moves first). Returns the JSON-serializable game
+    record."""
+    rng = random.Random(seed)
+    board = [[' ' for _ in range(cols)] for _ in range(rows)]
+    modules = [load_agent(agent, seat) for seat, agent in enumerate(agents)]
+    names = [team_name(agent) for agent in agents]
+    record = {'game': game_id, 'seed': seed, 'x': agents[0], 'o': agents[1], 'rows': rows, 'cols': cols,
+              'connect_n': connect_n, 'moves': [], 'times': [], 'winner': 'Draw', 'winner_seat': None, 'reason': 'draw'}
+    sink = io.StringIO()
+    loser = None
+    previous = signal.signal(signal.SIGALRM, _alarm)
+    try:
+        with contextlib.redirect_stdout(sink):
+            # agents that only know the manager's contract still get the standard call for connect-4
+            variant = {} if connect_n == 4 else {'connect_n': connect_n}
+            for seat, module in enumerate(modules):
+                module.init_agent(SYMBOLS[seat], rows, cols, [row[:] for row in board], **variant)
+            for ply in range(rows * cols):
+                seat = ply % 2
+                symbol = SYMBOLS[seat]
+                start = time.perf_counter()
+                if ply < opening_plies:
+                    col = rng.choice([c for c in range(cols) if board[0][c] == ' ']) + 1
+                else:
+                    try:
+                        signal.setitimer(signal.ITIMER_REAL, move_limit)
+                        col = modules[seat].what_is_your_move([row[:] for row in board], rows, cols, symbol)
+                    except MoveTimeout:
+                        loser, record['reason'] = seat, 'timeout'
+                    except Exception as exc:
+                        loser, record['reason'] = seat, 'error: %r' % exc
+                    finally:
+                        signal.setitimer(signal.ITIMER_REAL, 0)
+                elapsed = time.perf_counter() - start
+                record['times'].append(round(elapsed, 6))
+                if loser is not None:
+                    break
+                if elapsed > move_limit:
+                    loser, record['reason'] = seat, 'timeout'
+                    break
+                if not isinstance(col, int) or not 1 <= col <= cols or board[0][col - 1] != ' ':
+                    loser, record['reason'] = seat, 'illegal move %r' % (col,)
+                    break
+                record['moves'].append(col)
+                row = drop(board, col - 1, symbol)
+                if wins_at(board, row, col - 1, symbol, connect_n):
+                    loser, record['reason'] = 1 - seat, 'connect'
+                    break
+            if loser is None:
+                results = ('Draw', 'Draw')
+            else:
+                record['winner'] = agents[1 - loser]
+                record['winner_seat'] = SYMBOLS[1 - loser].lower()
+                results = (names[1 - loser], names[loser])
+            for module in modules:
+                try:
+                    module.connect_4_result([row[:] for row in board], *results)
+                except Exception:
+                    pass
+    finally:
+        signal.signal(signal.SIGALRM, previous)
+    return record
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('agent_a')
+    parser.add_argument('agent_b')
+    parser.add_argument('--games', type=int, default=100)
+    parser.add_argument('--jobs', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--rows', type=int, default=6)
+    parser.add_argument('--cols', type=int, default=7)
+    parser.add_argument('--connect-n', type=int, default=4, help='pieces in a row that win')
+    parser.add_argument('--move-limit', type=float, default=5.0, help='seconds per move before forfeiting')
+    parser.add_argument('--opening-plies', type=int, default=2, help='random moves at the start of each game')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', default='tournament_results.jsonl')
+    args = parser.parse_args()
+    if args.connect_n != 4:
+        for agent in (args.agent_a, args.agent_b):
+            if 'connect_n' not in inspect.signature(load_agent(agent, 0).init_agent).parameters:
+                print('%s cannot play connect-%d: its init_agent takes no connect_n' % (agent, args.connect_n))
+                return 2
+
+    tally = [[0, 0, 0], [0, 0, 0]]  # wins, draws, losses of agent_a and agent_b
+    start = time.perf_counter()
+    with open(args.output, 'w') as out, \
+            concurrent.futures.ProcessPoolExecutor(max_workers=args.jobs) as pool:
+        futures = []
+        for game in range(args.games):
+            # alternate who moves first; the two games of a pair share their random opening
+            agents = (args.agent_a, args.agent_b) if game % 2 == 0 else (args.agent_b, args.agent_a)
+            futures.append(pool.submit(play_game, game, agents, args.rows, args.cols, args.move_limit,
+                                       args.opening_plies, args.seed * 1000003 + game // 2, args.connect_n))
+        for done, future in enumerate(concurrent.futures.as_completed(futures), 1):
+            record = future.result()
+            out.write(json.dumps(record) + '\n')
+            a_seat = 'x' if record['game'] % 2 == 0 else 'o'
+            if record['winner_seat'] is None:
+                tally[0][1] += 1
+                tally[1][1] += 1
+            else:
+                winner = 0 if record['winner_seat'] == a_seat else 1
+                tally[winner][0] += 1
+                tally[1 - winner][2] += 1
+            if done % 50 == 0:
+                print('%d/%d games, %.1f games/s' % (done, args.games, done / (time.perf_counter() - start)),
+                      flush=True)
+
+    elapsed = time.perf_counter() - start
+    print('%d games in %.1fs (%.2f games/s), results in %s' % (args.games, elapsed, args.games / elapsed, args.output))
+    for label, agent, (w, d, l) in zip('AB', (args.agent_a, args.agent_b), tally):
+        score = (w + 0.5 * d) / max(1, w + d + l)
+        print('%s %-30s won %5d  drew %5d  lost %5d  score %.3f' % (label, agent, w, d, l, score))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
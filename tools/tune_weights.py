@@ -0,0 +1,257 @@
+"""Fits Team6_Connect_4_Agent's evaluation weights to self-play data (tools/selfplay.py) and writes a weights file
+that init_agent loads (TEAM6_WEIGHTS, or Team6_weights.json next to the agent).
+
+Texel-style logistic fit: the evaluation of a recorded position, scaled by K, predicts the mover's expected
+result through sigmoid(K * eval), and the weights are chosen to minimize the mean squared error against the
+results (1 win, 0.5 draw, 0 loss). K is fitted first with the starting weights and then held fixed. With
+--score-weight L the target is (1 - L) * result + L * sigmoid(K * search score) for moves made with the base
+weights, which is smoother than results alone. Positions with proven search scores are left out. They are
+the moves the agent searched (immediate wins and blocks are not recorded), so none has a win on the board.
+
+The evaluation is linear in the window and center weights: per position the chunks are decoded with NumPy
+into counts of straight and diagonal windows of each kind plus the center count, so every step of the fit is a
+handful of array operations. The win score is kept, since a finished window never occurs in a recorded
+position. Every tenth chunk is held out and the validation error is reported before and after the fit.
+The linear model is checked against the agent's own batch evaluation (evaluate_boards) on a sample of the
+decoded positions, with the starting and the fitted weights; the fit is not written if they disagree.
+
+Usage: python tools/tune_weights.py selfplay-data [--output Team6_weights.json] [--iterations 2000] \\
+           [--learning-rate 0.01] [--score-weight 0.0] [--min-depth 1]
+"""
+import argparse
+import json
+import math
+import os
+import sys
+import time
+
+try:
+    import numpy as np
+except ImportError:  # reported in main
+    np = None
+
+from selfplay import RECORD_PAYLOAD, list_chunks, read_chunk
+from tournament import REPO_DIR
+
+sys.path.insert(0, REPO_DIR)
+import Team6_Connect_4_Agent as agent
+
+FITTED = ('window_three', 'window_two', 'window_block', 'center', 'diagonal')
+VALIDATION_EVERY = 10  # every tenth chunk is held out
+CHECK_SAMPLE = 2000  # decoded positions kept to check the linear model against evaluate_boards
+MODEL_TOLERANCE = 1e-9  # float32 counts are exact; only the summation order differs
+
+
+def decode_boards(keys, rows, cols):
+    """Decodes a (N, key_bytes) uint8 array of big-endian position keys into the (N, rows, cols) int8 boards of
+    evaluate_boards (row 0 = top, 1 = the mover's piece, -1 = the opponent's). In each column of a key the
+    highest set bit marks the column height and the bits below it are the mover's pieces."""
+    stride = rows + 1
+    bits = np.unpackbits(keys, axis=1)[:, ::-1][:, :cols * stride].reshape(-1, cols, stride).astype(bool)
+    heights = stride - 1 - np.argmax(bits[:, :, ::-1], axis=2)
+    occupied = np.arange(stride) < heights[:, :, None]
+    cells = np.where(occupied, np.where(bits, 1, -1), 0).astype(np.int8)[:, :, :rows]
+    return np.ascontiguousarray(cells.transpose(0, 2, 1)[:, ::-1, :])
+
+
+def window_features(boards, connect_n):
+    """Returns an (N, 9) float32 array per position: straight windows of the kinds win, three, two and block,
+    the same for diagonal windows, and the center count (as evaluate_boards counts it)."""
+    n, rows, cols = boards.shape
+    straight, diagonal, center = agent.batch_window_tables(rows, cols, connect_n)
+    flat = boards.reshape(n, rows * cols)
+    mine = flat == 1
+    opp = flat == -1
+    columns = []
+    for windows in (straight, diagonal):
+        my_count = mine[:, windows].sum(axis=2)
+        opp_count = opp[:, windows].sum(axis=2)
+        empty = connect_n - my_count - opp_count
+        columns.append((my_count == connect_n).sum(axis=1))
+        columns.append(((my_count == connect_n - 1) & (empty == 1)).sum(axis=1))
+        columns.append(((my_count == connect_n - 2) & (empty == 2)).sum(axis=1))
+        columns.append(((opp_count == connect_n - 1) & (empty == 1)).sum(axis=1))
+    if len(center) == 1:
+        columns.append(mine[:, center[0]].sum(axis=1))
+    else:
+        columns.append((mine[:, center[0]] | mine[:, center[1]]).sum(axis=1))
+    return np.stack(columns, axis=1).astype(np.float32)
+
+
+def load_data(directory, min_depth):
+    """Streams the chunks of a data directory into (train, validation, geometry, sample); each set is a tuple of
+    (features, results in [0, 1], search scores, base-weights mask). Only the features are kept per position,
+    besides the boards of the first CHECK_SAMPLE positions (sample)."""
+    sets = {False: [], True: []}
+    geometry = None
+    sample = []
+    for path in list_chunks(directory):
+        header, payload = read_chunk(path)
+        if header['count'] == 0:
+            continue
+        chunk_geometry = (header['rows'], header['cols'], header['connect_n'])
+        if geometry is None:
+            geometry = chunk_geometry
+        elif chunk_geometry != geometry:
+            raise ValueError('%s holds %dx%d/%d positions, not %dx%d/%d' % ((path,) + chunk_geometry + geometry))
+        kb = header['key_bytes']
+        dtype = np.dtype([('key', 'u1', (kb,)), ('score', '<f4'), ('depth', 'u1'), ('variant', 'u1'),
+                          ('result', 'i1')])
+        assert dtype.itemsize == kb + RECORD_PAYLOAD.size
+        records = np.frombuffer(payload, dtype=dtype)
+        records = records[np.isfinite(records['score']) & (records['depth'] >= min_depth)]
+        if len(records) == 0:
+            continue
+        boards = decode_boards(records['key'], header['rows'], header['cols'])
+        kept = sum(len(part) for part in sample)
+        if kept < CHECK_SAMPLE:
+            sample.append(boards[:CHECK_SAMPLE - kept])
+        index = int(os.path.basename(path)[len('chunk-'):-len('.bin')])
+        sets[index % VALIDATION_EVERY == VALIDATION_EVERY - 1].append((
+            window_features(boards, header['connect_n']),
+            (records['result'].astype(np.float64) + 1) / 2,
+            records['score'].astype(np.float64),
+            records['variant'] == 0))
+    joined = []
+    for held_out in (False, True):
+        parts = sets[held_out]
+        joined.append(tuple(np.concatenate(column) for column in zip(*parts)) if parts else None)
+    return joined[0], joined[1], geometry, np.concatenate(sample) if sample else None
+
+
+def evaluate(features, weights):
+    """Evaluations of the featurized positions under weights (a WEIGHT_NAMES-ordered sequence)."""
+    win, three, two, block, center, diagonal = weights
+    window = np.array([win, three, two, block])
+    return features[:, :4] @ window + center * features[:, 8] + diagonal * (features[:, 4:8] @ window)
+
+
+def model_error(boards, connect_n, weights):
+    """Largest relative difference between evaluate() on the boards' window_features and the agent's
+    evaluate_boards, both under weights (which are left set in the agent)."""
+    weights = agent.set_evaluation_weights(tuple(weights))
+    expected = agent.evaluate_boards(boards, connect_n)
+    predicted = evaluate(window_features(boards, connect_n), weights)
+    return float(np.max(np.abs(predicted - expected) / np.maximum(1.0, np.abs(expected))))
+
+
+def sigmoid(x):
+    return 0.5 * (1 + np.tanh(0.5 * x))
+
+
+def loss(features, targets, weights, k):
+    return float(np.mean((sigmoid(k * evaluate(features, weights)) - targets) ** 2))
+
+
+def fit_k(features, targets, weights):
+    """Golden-section search for the K of the lowest error, over log K."""
+    lo, hi = math.log(1e-4), math.log(1.0)
+    ratio = (math.sqrt(5) - 1) / 2
+    for _ in range(60):
+        a = hi - ratio * (hi - lo)
+        b = lo + ratio * (hi - lo)
+        if loss(features, targets, weights, math.exp(a)) < loss(features, targets, weights, math.exp(b)):
+            hi = b
+        else:
+            lo = a
+    return math.exp((lo + hi) / 2)
+
+
+def fit_weights(features, targets, weights, k, iterations, learning_rate):
+    """Adam on the mean squared error; each weight's step is scaled by its starting size, so the large
+    block score and the small two score move at the same relative rate. Returns the fitted weights."""
+    weights = np.array(weights, dtype=np.float64)
+    fitted = np.array([agent.WEIGHT_NAMES.index(name) for name in FITTED])
+    scale = np.maximum(np.abs(weights[fitted]), 0.1)
+    m = np.zeros(len(fitted))
+    v = np.zeros(len(fitted))
+    straight, diagonal, center = features[:, :4], features[:, 4:8], features[:, 8]
+    for step in range(1, iterations + 1):
+        window = weights[:4]
+        diagonal_sum = diagonal @ window
+        p = sigmoid(k * (straight @ window + weights[4] * center + weights[5] * diagonal_sum))
+        # d error / d eval for every position
+        g = 2 * (p - targets) * p * (1 - p) * k / len(targets)
+        window_grad = (straight + weights[5] * diagonal).T @ g
+        gradient = np.array([window_grad[1], window_grad[2], window_grad[3], center @ g, diagonal_sum @ g])
+        m = 0.9 * m + 0.1 * gradient
+        v = 0.999 * v + 0.001 * gradient ** 2
+        m_hat = m / (1 - 0.9 ** step)
+        v_hat = v / (1 - 0.999 ** step)
+        weights[fitted] -= learning_rate * scale * m_hat / (np.sqrt(v_hat) + 1e-12)
+    return weights
+
+
+def targets_of(data, k, score_weight):
+    """Results blended with the predicted result of the base weights' search scores."""
+    _, results, scores, base = data
+    if not score_weight:
+        return results
+    blended = (1 - score_weight) * results + score_weight * sigmoid(k * scores)
+    return np.where(base, blended, results)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('data', help='directory written by tools/selfplay.py')
+    parser.add_argument('--output', default=os.path.join(REPO_DIR, 'Team6_weights.json'))
+    parser.add_argument('--iterations', type=int, default=2000)
+    parser.add_argument('--learning-rate', type=float, default=0.01, help='Adam step, relative to each weight')
+    parser.add_argument('--score-weight', type=float, default=0.0, help='share of the search score in the target')
+    parser.add_argument('--min-depth', type=int, default=1, help='leave out moves searched less deeply')
+    args = parser.parse_args()
+    if np is None:
+        print('tune_weights.py requires NumPy', file=sys.stderr)
+        return 2
+
+    start = time.perf_counter()
+    train, validation, geometry, sample = load_data(args.data, args.min_depth)
+    if train is None:
+        print('no usable positions in %s' % args.data, file=sys.stderr)
+        return 1
+    with open(os.path.join(args.data, 'selfplay.json')) as f:
+        base = tuple(json.load(f)['base'])
+    print('%d training and %d validation positions (%dx%d/%d), loaded in %.1fs'
+          % ((len(train[1]), 0 if validation is None else len(validation[1])) + geometry
+             + (time.perf_counter() - start,)))
+
+    error = model_error(sample, geometry[2], base)
+    if error > MODEL_TOLERANCE:
+        print('window_features disagrees with evaluate_boards (relative error %.3g)' % error, file=sys.stderr)
+        return 1
+
+    k = fit_k(train[0], train[1], base)
+    train_targets = targets_of(train, k, args.score_weight)
+    before = loss(train[0], train_targets, base, k)
+    fitted = fit_weights(train[0], train_targets, base, k, args.iterations, args.learning_rate)
+    weights = agent.set_evaluation_weights(tuple(float(w) for w in fitted))  # rounded as the agent will use them
+    after = loss(train[0], train_targets, weights, k)
+    print('K = %.5f, training error %.6f -> %.6f' % (k, before, after))
+    report = {'positions': len(train[1]), 'k': k, 'score_weight': args.score_weight, 'min_depth': args.min_depth,
+              'training_error': [before, after], 'data': os.path.abspath(args.data), 'base': list(base),
+              'date': time.strftime('%Y-%m-%dT%H:%M:%S')}
+    if validation is not None:
+        validation_targets = targets_of(validation, k, args.score_weight)
+        report['validation_positions'] = len(validation[1])
+        report['validation_error'] = [loss(validation[0], validation_targets, base, k),
+                                      loss(validation[0], validation_targets, weights, k)]
+        print('validation error %.6f -> %.6f' % tuple(report['validation_error']))
+    for name, old, new in zip(agent.WEIGHT_NAMES, base, weights):
+        print('%-13s %10.4f -> %10.4f' % (name, old, new))
+    error = model_error(sample, geometry[2], weights)
+    print('model vs evaluate_boards on %d positions: relative error %.3g' % (len(sample), error))
+    if error > MODEL_TOLERANCE:
+        print('the fitted weights do not evaluate as the agent does; not written', file=sys.stderr)
+        return 1
+
+    output = dict(zip(agent.WEIGHT_NAMES, weights), fit=report)
+    with open(args.output + '.tmp', 'w') as f:
+        json.dump(output, f, indent=1)
+        f.write('\n')
+    os.replace(args.output + '.tmp', args.output)
+    print('weights written to %s' % args.output)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())